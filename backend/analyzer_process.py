@@ -0,0 +1,463 @@
+"""
+Ayrı Süreç Analizör Modülü
+Kamera + MediaPipe + OpenCV işini ayrı bir süreçte çalıştırır
+
+- Analiz süreci son sonuçları ve JPEG kareleri paylaşılan bellekteki
+  sıra numaralı bir halka tampona yazar
+- API süreci sadece paylaşılan bellekten okur (GIL rekabeti yok)
+- Başlat/durdur/eşik gibi komutlar ince bir Pipe kanalından gider
+- Analiz süreci çökerse (ör. native kod hatası) API ayakta kalır ve
+  süreç bir sonraki çağrıda yeniden başlatılır
+"""
+
+import base64
+import json
+import multiprocessing as mp
+import struct
+import threading
+import time
+from multiprocessing import shared_memory
+from typing import Optional, Dict, Any, Tuple, List
+
+from camera_profiles import DEFAULT_PROFILE, get_profile, describe_profiles
+from sampling_profiler import SamplingProfiler
+
+
+SLOT_COUNT = 4
+SLOT_SIZE = 1024 * 1024  # 1 MB: meta JSON + JPEG + derinlik önizlemesi
+
+# Halka başlığı: son yazılan sıra no, son nabız zamanı, durum bayrakları
+_RING_HEADER = struct.Struct("<QdI")
+RING_FLAG_STALLED = 1  # Kare akışı takıldı (bekçi kurtarma yapıyor)
+# Slot başlığı: sıra no, meta uzunluğu, JPEG uzunluğu, önizleme uzunluğu
+_SLOT_HEADER = struct.Struct("<QIII")
+
+
+class FrameRing:
+    """
+    Paylaşılan bellek üzerinde tek yazıcılı, çok okuyuculu halka tampon
+    Okuyucu, slotun sıra numarasını kopyadan önce ve sonra kontrol ederek
+    yarım yazılmış slotları atlar
+    """
+
+    def __init__(self, buf: memoryview, slot_count: int = SLOT_COUNT, slot_size: int = SLOT_SIZE):
+        self.buf = buf
+        self.slot_count = slot_count
+        self.slot_size = slot_size
+        self.flags = 0  # Yazıcının her nabızda yayınladığı bayraklar
+        self._seq = 0
+
+    @staticmethod
+    def required_size(slot_count: int = SLOT_COUNT, slot_size: int = SLOT_SIZE) -> int:
+        return _RING_HEADER.size + slot_count * slot_size
+
+    def _slot_offset(self, seq: int) -> int:
+        return _RING_HEADER.size + (seq % self.slot_count) * self.slot_size
+
+    # ---- Yazıcı (analiz süreci) ----
+
+    def write(self, meta: bytes, jpeg: bytes, preview: bytes = b"") -> bool:
+        # jpeg, bytes ya da kopyalanmamış 1-boyutlu uint8 numpy dizisi olabilir (buffer protokolü)
+        payload = len(meta) + len(jpeg) + len(preview)
+        if _SLOT_HEADER.size + payload > self.slot_size:
+            return False
+
+        seq = self._seq + 1
+        offset = self._slot_offset(seq)
+
+        # Önce slotu geçersiz işaretle, sonra veriyi yaz, en son sıra numarasını yayınla
+        _SLOT_HEADER.pack_into(self.buf, offset, 0, 0, 0, 0)
+        pos = offset + _SLOT_HEADER.size
+        self.buf[pos:pos + len(meta)] = meta
+        pos += len(meta)
+        self.buf[pos:pos + len(jpeg)] = jpeg
+        pos += len(jpeg)
+        self.buf[pos:pos + len(preview)] = preview
+        _SLOT_HEADER.pack_into(self.buf, offset, seq, len(meta), len(jpeg), len(preview))
+
+        _RING_HEADER.pack_into(self.buf, 0, seq, time.time(), self.flags)
+        self._seq = seq
+        return True
+
+    def heartbeat(self):
+        _RING_HEADER.pack_into(self.buf, 0, self._seq, time.time(), self.flags)
+
+    # ---- Okuyucu (API süreci) ----
+
+    def latest_seq(self) -> Tuple[int, float]:
+        seq, heartbeat, _ = _RING_HEADER.unpack_from(self.buf, 0)
+        return seq, heartbeat
+
+    def read_flags(self) -> int:
+        return _RING_HEADER.unpack_from(self.buf, 0)[2]
+
+    def read(self, after_seq: int = 0) -> Optional[Tuple[int, bytes, bytes, bytes]]:
+        """after_seq'ten yeni bir kare varsa (seq, meta, jpeg, önizleme) döndür"""
+        for _ in range(3):
+            seq = _RING_HEADER.unpack_from(self.buf, 0)[0]
+            if seq == 0 or seq <= after_seq:
+                return None
+
+            offset = self._slot_offset(seq)
+            slot_seq, meta_len, jpeg_len, preview_len = _SLOT_HEADER.unpack_from(self.buf, offset)
+            if slot_seq != seq:
+                continue
+
+            pos = offset + _SLOT_HEADER.size
+            meta = bytes(self.buf[pos:pos + meta_len])
+            pos += meta_len
+            jpeg = bytes(self.buf[pos:pos + jpeg_len])
+            pos += jpeg_len
+            preview = bytes(self.buf[pos:pos + preview_len])
+
+            # Kopyalama sırasında yazıcı bu slotu ezdiyse tekrar dene
+            if _SLOT_HEADER.unpack_from(self.buf, offset)[0] == seq:
+                return seq, meta, jpeg, preview
+        return None
+
+
+def run_analyzer_daemon(shm_name: str, conn):
+    """Analiz sürecinin ana döngüsü"""
+    from posture_analyzer import PostureAnalyzer
+
+    shm = shared_memory.SharedMemory(name=shm_name)
+    ring = FrameRing(shm.buf)
+    analyzer: Optional[PostureAnalyzer] = None
+    last_preview_seq = 0
+    profiler = SamplingProfiler()
+
+    def get_analyzer() -> PostureAnalyzer:
+        nonlocal analyzer
+        if analyzer is None:
+            analyzer = PostureAnalyzer()
+            analyzer.frame_format = "jpeg"
+        return analyzer
+
+    # Kontrol komutları: isim -> (analizör, argümanlar) -> cevap
+    handlers = {
+        "ping": lambda a: True,
+        "start": lambda a: a.start(),
+        "stop": lambda a: a.stop(),
+        "threshold": lambda a, value: a.set_threshold(value),
+        "preview_subscribers": lambda a, n: setattr(a, "depth_preview_subscribers", n),
+        "start_video": lambda a, output_dir, session_id: a.start_video_recording(output_dir, session_id),
+        "stop_video": lambda a: a.stop_video_recording(),
+        "start_raw": lambda a, path: a.start_raw_recording(path),
+        "stop_raw": lambda a: a.stop_raw_recording(),
+        "recording_status": lambda a: a.get_recording_status(),
+        "pose_config": lambda a: a.get_pose_config(),
+        "latency_budget": lambda a, budget_ms: a.set_latency_budget(budget_ms),
+        "camera_profile": lambda a, name, filters: a.set_camera_profile(name, filters),
+        "camera_profiles": lambda a: a.get_camera_profiles(),
+        "camera_health": lambda a: a.get_camera_health(),
+        "idle": lambda a, idle: a.set_idle(idle),
+        "metric_config": lambda a: a.get_metric_config(),
+        "metric_thresholds": lambda a, name, low, high: a.set_metric_thresholds(name, low, high),
+        "profile_start": lambda a, seconds, interval_ms, threads: profiler.start(seconds, interval_ms, threads),
+        "profile_result": lambda a: profiler.result,
+    }
+
+    print("🧠 Analiz süreci başlatıldı")
+    try:
+        while True:
+            # Boşta (oturum duraklatıldı) iken de kare döngüsü çalışmaz
+            running = analyzer is not None and analyzer.is_running and not analyzer.is_idle
+
+            # Kontrol kanalını işle (çalışmıyorsa komut beklerken uyu)
+            while conn.poll(0 if running else 0.1):
+                command, args = conn.recv()
+                if command == "shutdown":
+                    return
+                try:
+                    reply = {"ok": True, "value": handlers[command](get_analyzer(), *args)}
+                except Exception as e:
+                    reply = {"ok": False, "error": str(e)}
+                conn.send(reply)
+                running = analyzer is not None and analyzer.is_running and not analyzer.is_idle
+
+            if not running:
+                ring.flags = 0
+                ring.heartbeat()
+                continue
+
+            frame = analyzer.get_frame()
+            ring.flags = RING_FLAG_STALLED if analyzer.is_stalled else 0
+            if frame is None:
+                if analyzer.is_recovering:
+                    time.sleep(0.05)  # Kurtarma thread'i çalışırken boşa dönme
+                ring.heartbeat()
+                continue
+
+            jpeg = frame.pop("frame_jpeg", b"")
+            preview = b""
+            if analyzer.depth_preview_seq != last_preview_seq and analyzer.depth_preview:
+                last_preview_seq = analyzer.depth_preview_seq
+                preview = analyzer.depth_preview
+            ring.write(json.dumps(frame).encode("utf-8"), jpeg, preview)
+    except (EOFError, KeyboardInterrupt):
+        pass
+    finally:
+        if analyzer is not None:
+            analyzer.stop()
+        shm.close()
+        print("🧠 Analiz süreci kapatıldı")
+
+
+class AnalyzerProcessClient:
+    """
+    API sürecinde PostureAnalyzer ile aynı arayüzü sunan ince istemci
+    Kareler paylaşılan bellekten okunur; get_frame asla bloklamaz
+    Diğer kontrol çağrıları kilit ve cevap beklediği için olay döngüsünden
+    executor üzerinden çağrılmalıdır (bkz. main._analyzer_call)
+    """
+
+    def __init__(self, call_timeout: float = 15.0):
+        self.call_timeout = call_timeout
+        self.restart_count = 0
+        self.good_posture_threshold = 40
+
+        # main.py ile uyum için analizör özellikleri
+        self.depth_preview: Optional[bytes] = None
+        self.depth_preview_seq = 0
+        self.depth_preview_interval = 0.2
+        self._preview_subscribers = 0
+        self.profile = get_profile(DEFAULT_PROFILE)
+        self._metric_thresholds: Dict[str, Tuple[Optional[float], Optional[float]]] = {}
+        self.is_idle = False
+
+        self._ctx = mp.get_context("spawn")
+        self._lock = threading.Lock()
+        self._shm = shared_memory.SharedMemory(create=True, size=FrameRing.required_size())
+        self._ring = FrameRing(self._shm.buf)
+        self._process = None
+        self._conn = None
+        self._last_seq = 0
+        self._want_running = False
+        self._respawning = False  # Arka planda yeniden başlatma sürüyor
+
+        self._spawn()
+
+    # ---- Süreç yönetimi ----
+
+    def _spawn(self):
+        parent_conn, child_conn = self._ctx.Pipe()
+        # Yeni süreç sıra numaralarını baştan başlatır
+        self._ring.buf[:_RING_HEADER.size] = bytes(_RING_HEADER.size)
+        self._last_seq = 0
+        self._process = self._ctx.Process(
+            target=run_analyzer_daemon,
+            args=(self._shm.name, child_conn),
+            name="posture-analyzer",
+            daemon=True
+        )
+        self._process.start()
+        self._conn = parent_conn
+
+    def _ensure_alive(self) -> bool:
+        """Süreç ölmüşse yeniden başlat; önceki durumu (çalışıyor, eşik) geri yükle"""
+        if self._process is not None and self._process.is_alive():
+            return False
+
+        self.restart_count += 1
+        print(f"⚠️ Analiz süreci yeniden başlatılıyor (#{self.restart_count})")
+        self._spawn()
+
+        self._send("threshold", self.good_posture_threshold)
+        self._send("camera_profile", self.profile.name, list(self.profile.filters))
+        for name, (low, high) in self._metric_thresholds.items():
+            self._send("metric_thresholds", name, low, high)
+        if self._preview_subscribers:
+            self._send("preview_subscribers", self._preview_subscribers)
+        if self._want_running:
+            self._send("start")
+            if self.is_idle:
+                self._send("idle", True)
+        return True
+
+    def _respawn_in_background(self):
+        """
+        Ölen süreci bir kez, arka plan thread'inde yeniden başlat
+        Yeniden başlatma kamerayı açar ve kalibrasyon yapar (saniyeler sürebilir);
+        olay döngüsünden çağrılan get_frame bu sürede sadece None döndürür
+        """
+        if self._respawning:
+            return
+        self._respawning = True
+        threading.Thread(target=self._respawn, name="analyzer-respawn", daemon=True).start()
+
+    def _respawn(self):
+        try:
+            with self._lock:
+                self._ensure_alive()
+        finally:
+            self._respawning = False
+
+    def _send(self, command: str, *args) -> Dict[str, Any]:
+        try:
+            self._conn.send((command, args))
+            if not self._conn.poll(self.call_timeout):
+                raise TimeoutError(f"Analiz süreci cevap vermedi: {command}")
+            return self._conn.recv()
+        except (EOFError, OSError, TimeoutError) as e:
+            # Süreci sonlandır; bir sonraki çağrıda yeniden başlatılır
+            if self._process is not None and self._process.is_alive():
+                self._process.terminate()
+            return {"ok": False, "error": str(e)}
+
+    def _call(self, command: str, *args) -> Dict[str, Any]:
+        with self._lock:
+            self._ensure_alive()
+            return self._send(command, *args)
+
+    # ---- PostureAnalyzer arayüzü ----
+
+    @property
+    def is_running(self) -> bool:
+        return self._want_running and self._process is not None and self._process.is_alive()
+
+    def start(self) -> bool:
+        self._want_running = True
+        self.is_idle = False
+        reply = self._call("start")
+        ok = reply.get("ok", False) and bool(reply.get("value"))
+        if not ok:
+            self._want_running = False
+            print(f"❌ Kamera başlatma hatası (analiz süreci): {reply.get('error', 'başlatılamadı')}")
+        return ok
+
+    def stop(self):
+        self._want_running = False
+        self.is_idle = False
+        self._call("stop")
+        self.depth_preview = None
+
+    def set_threshold(self, threshold: float):
+        self.good_posture_threshold = threshold
+        self._call("threshold", threshold)
+
+    @property
+    def depth_preview_subscribers(self) -> int:
+        return self._preview_subscribers
+
+    @depth_preview_subscribers.setter
+    def depth_preview_subscribers(self, n: int):
+        self._preview_subscribers = n
+        self._call("preview_subscribers", n)
+
+    def start_video_recording(self, output_dir: str, session_id: str):
+        self._call("start_video", output_dir, session_id)
+
+    def stop_video_recording(self):
+        self._call("stop_video")
+
+    def start_raw_recording(self, path: str) -> bool:
+        reply = self._call("start_raw", path)
+        return reply.get("ok", False) and bool(reply.get("value"))
+
+    def stop_raw_recording(self):
+        self._call("stop_raw")
+
+    def get_recording_status(self) -> Dict[str, Any]:
+        return self._call("recording_status").get("value") or {"video": None, "raw": None}
+
+    def set_latency_budget(self, budget_ms: float):
+        self._call("latency_budget", budget_ms)
+
+    def get_pose_config(self) -> Dict[str, Any]:
+        return self._call("pose_config").get("value") or {}
+
+    def set_camera_profile(self, name: str, filters: Optional[List[str]] = None):
+        profile = get_profile(name, filters)
+        reply = self._call("camera_profile", profile.name, list(profile.filters))
+        if not reply.get("ok", False):
+            raise RuntimeError(reply.get("error", "Kamera profili ayarlanamadı"))
+        self.profile = profile
+
+    def get_camera_profiles(self) -> Dict[str, Any]:
+        return self._call("camera_profiles").get("value") or describe_profiles({}, self.profile)
+
+    @property
+    def is_stalled(self) -> bool:
+        """Analiz sürecindeki bekçinin takılma bayrağı (paylaşılan bellekten, bloklamaz)"""
+        return self._want_running and bool(self._ring.read_flags() & RING_FLAG_STALLED)
+
+    def get_camera_health(self) -> Dict[str, Any]:
+        return self._call("camera_health").get("value") or {"stalled": self.is_stalled}
+
+    def get_metric_config(self) -> List[Dict[str, Any]]:
+        return self._call("metric_config").get("value") or []
+
+    def set_metric_thresholds(self, name: str, warn_below: Optional[float], warn_above: Optional[float]):
+        reply = self._call("metric_thresholds", name, warn_below, warn_above)
+        if not reply.get("ok", False):
+            raise ValueError(reply.get("error", "Metrik eşikleri ayarlanamadı"))
+        self._metric_thresholds[name] = (warn_below, warn_above)
+
+    def set_idle(self, idle: bool):
+        self.is_idle = idle
+        self._call("idle", idle)
+
+    def start_profile(self, seconds: float, interval_ms: float,
+                      threads: Optional[List[str]] = None) -> bool:
+        """Analiz sürecinde örneklemeli profili başlat (bloklamaz)"""
+        reply = self._call("profile_start", seconds, interval_ms, threads)
+        if not reply.get("ok", False):
+            raise ValueError(reply.get("error", "Profil başlatılamadı"))
+        return bool(reply.get("value"))
+
+    def get_profile_result(self) -> Optional[Dict[str, Any]]:
+        return self._call("profile_result").get("value")
+
+    def get_frame(self) -> Optional[Dict[str, Any]]:
+        """Paylaşılan bellekteki en yeni kareyi döndür (yeni kare yoksa None)"""
+        if not self._want_running or self._respawning:
+            return None
+        if self._process is None or not self._process.is_alive():
+            # Olay döngüsünden çağrılır: yeniden başlatma ve durum geri yükleme
+            # arka planda yapılır, yeni süreç hazır olana kadar kare dönmez
+            self._respawn_in_background()
+            return None
+
+        item = self._ring.read(self._last_seq)
+        if item is None:
+            return None
+
+        seq, meta, jpeg, preview = item
+        self._last_seq = seq
+        if preview:
+            self.depth_preview = preview
+            self.depth_preview_seq += 1
+
+        frame = json.loads(meta)
+        # Kimse yokken kare kodlanmaz (boş JPEG); istemcide son görüntü kalır
+        frame["frame_base64"] = base64.b64encode(jpeg).decode('utf-8') if jpeg else None
+        # Süreçler arası aktarımın payı gecikme izinde ayrı görünsün
+        if frame.get("trace") is not None:
+            frame["trace"]["delivered"] = time.time() * 1000
+        return frame
+
+    def get_process_status(self) -> Dict[str, Any]:
+        """Analiz sürecinin durumunu döndür"""
+        seq, heartbeat = self._ring.latest_seq()
+        return {
+            "alive": self._process is not None and self._process.is_alive(),
+            "pid": self._process.pid if self._process else None,
+            "restart_count": self.restart_count,
+            "respawning": self._respawning,
+            "last_seq": seq,
+            "heartbeat_age": round(time.time() - heartbeat, 2) if heartbeat else None
+        }
+
+    def close(self):
+        """Süreci kapat ve paylaşılan belleği serbest bırak"""
+        with self._lock:
+            if self._process is not None and self._process.is_alive():
+                try:
+                    self._conn.send(("shutdown", ()))
+                except (EOFError, OSError):
+                    pass
+                self._process.join(timeout=5.0)
+                if self._process.is_alive():
+                    self._process.terminate()
+            self._shm.close()
+            self._shm.unlink()
@@ -0,0 +1,81 @@
+"""
+Kamera Başlatma İşi Modülü
+Kamera ve model açılışı saniyeler sürebildiği için /api/session/start bunu
+arka planda bir iş olarak çalıştırır ve hemen iş kimliğini döndürür
+
+Durumlar: starting -> ready | failed | cancelled
+İlerleme WebSocket üzerinden "camera" mesajlarıyla duyurulur.
+"""
+
+import itertools
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional, Dict, Any
+
+
+JOB_STARTING = "starting"
+JOB_READY = "ready"
+JOB_FAILED = "failed"
+JOB_CANCELLED = "cancelled"
+
+_job_ids = itertools.count(1)
+
+
+@dataclass
+class CameraStartJob:
+    """Tek bir kamera başlatma isteğinin durumu"""
+    id: str
+    profile: str
+    state: str = JOB_STARTING
+    message: str = "Kamera başlatılıyor..."
+    session_id: Optional[str] = None
+    started_at: float = 0.0
+    finished_at: Optional[float] = None
+    cancel_requested: bool = False
+
+    @classmethod
+    def create(cls, profile: str) -> "CameraStartJob":
+        return cls(id=f"camera_{next(_job_ids)}_{int(time.time())}", profile=profile,
+                   started_at=time.time())
+
+    @property
+    def done(self) -> bool:
+        return self.state != JOB_STARTING
+
+    def finish(self, state: str, message: str, session_id: Optional[str] = None):
+        self.state = state
+        self.message = message
+        self.session_id = session_id
+        self.finished_at = time.time()
+
+    def to_dict(self) -> Dict[str, Any]:
+        end = self.finished_at if self.finished_at is not None else time.time()
+        return {
+            "job_id": self.id,
+            "state": self.state,
+            "message": self.message,
+            "profile": self.profile,
+            "session_id": self.session_id,
+            "elapsed": round(end - self.started_at, 2)
+        }
+
+
+class CameraJobRegistry:
+    """Son başlatma işleri (iş kimliğiyle sorgulamak için sınırlı sayıda tutulur)"""
+
+    def __init__(self, keep: int = 10):
+        self.keep = keep
+        self._jobs: "OrderedDict[str, CameraStartJob]" = OrderedDict()
+
+    @property
+    def latest(self) -> Optional[CameraStartJob]:
+        return next(reversed(self._jobs.values()), None)
+
+    def add(self, job: CameraStartJob):
+        self._jobs[job.id] = job
+        while len(self._jobs) > self.keep:
+            self._jobs.popitem(last=False)
+
+    def get(self, job_id: str) -> Optional[CameraStartJob]:
+        return self._jobs.get(job_id)
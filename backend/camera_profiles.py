@@ -0,0 +1,223 @@
+"""
+Kamera Profili Modülü
+Çözünürlük/FPS profilleri, gövde bölgesine (ROI) sınırlı derinlik filtreleri
+ve profil başına ölçülen CPU maliyeti / kare gecikmesi
+
+Filtreler RealSense post-processing bloklarının (decimation, spatial,
+temporal, hole filling) davranışını taklit eder ama tüm kare yerine sadece
+gövde bölgesinde çalışır; böylece zayıf cihazlarda maliyet ROI boyutuyla sınırlı kalır.
+"""
+
+import time
+from dataclasses import dataclass, asdict, field
+from typing import Optional, Dict, Any, Tuple, List
+
+import cv2
+import numpy as np
+
+
+DEPTH_FILTERS = ("decimation", "spatial", "temporal", "hole_filling")
+
+
+@dataclass(frozen=True)
+class CameraProfile:
+    """Tek bir kamera akış ayarı"""
+    name: str
+    width: int
+    height: int
+    fps: int
+    filters: Tuple[str, ...] = ()
+    description: str = ""
+
+    def with_filters(self, filters: List[str]) -> "CameraProfile":
+        return CameraProfile(self.name, self.width, self.height, self.fps,
+                             tuple(filters), self.description)
+
+
+CAMERA_PROFILES: Dict[str, CameraProfile] = {
+    "low_power": CameraProfile(
+        "low_power", 424, 240, 15,
+        filters=("temporal", "hole_filling"),
+        description="Zayıf cihazlar için düşük çözünürlük ve kare hızı"
+    ),
+    "default": CameraProfile(
+        "default", 640, 480, 30,
+        description="Dengeli varsayılan ayar"
+    ),
+    "high_rate": CameraProfile(
+        "high_rate", 848, 480, 60,
+        filters=("spatial",),
+        description="Hızlı hareketler için yüksek kare hızı"
+    ),
+}
+
+DEFAULT_PROFILE = "default"
+
+
+def get_profile(name: str, filters: Optional[List[str]] = None) -> CameraProfile:
+    """
+    İsimden profil döndür; filters verilirse profilin filtrelerinin yerine geçer
+    Bilinmeyen profil veya filtre için ValueError fırlatır
+    """
+    if name not in CAMERA_PROFILES:
+        raise ValueError(f"Bilinmeyen kamera profili: {name}")
+    profile = CAMERA_PROFILES[name]
+    if filters is not None:
+        unknown = [f for f in filters if f not in DEPTH_FILTERS]
+        if unknown:
+            raise ValueError(f"Bilinmeyen derinlik filtresi: {', '.join(unknown)}")
+        profile = profile.with_filters(filters)
+    return profile
+
+
+class RoiDepthFilter:
+    """
+    Derinlik görüntüsünün sadece gövde bölgesine filtre uygular
+
+    Sonuç önceden ayrılmış tam boyutlu bir tampona yazılır: ROI dışı ham
+    derinliktir, ROI içi filtrelenmiştir. Temporal filtre durumu da tam
+    boyutlu tutulur, böylece ROI kareden kareye kaydığında geçmiş kaybolmaz.
+    """
+
+    def __init__(self, filters: Tuple[str, ...] = (), decimation: int = 2,
+                 spatial_kernel: int = 5, temporal_alpha: float = 0.4,
+                 temporal_delta_mm: float = 20.0):
+        self.filters = tuple(f for f in DEPTH_FILTERS if f in filters)  # RealSense sırası
+        self.decimation = decimation
+        self.spatial_kernel = spatial_kernel
+        self.temporal_alpha = temporal_alpha
+        self.temporal_delta_mm = temporal_delta_mm
+
+        self._output: Optional[np.ndarray] = None
+        self._history: Optional[np.ndarray] = None
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.filters)
+
+    def reset(self):
+        if self._history is not None:
+            self._history.fill(0)
+
+    def apply(self, depth_image: np.ndarray, roi: Optional[Tuple[int, int, int, int]],
+              depth_scale: float) -> np.ndarray:
+        """
+        Filtrelenmiş derinlik görüntüsünü döndür (filtre veya ROI yoksa girişin kendisi)
+        roi: (x0, y0, x1, y1)
+        """
+        if not self.filters or roi is None:
+            return depth_image
+
+        h, w = depth_image.shape[:2]
+        if self._output is None or self._output.shape != (h, w):
+            self._output = np.empty((h, w), dtype=np.uint16)
+            self._history = np.zeros((h, w), dtype=np.float32)
+
+        x0, y0 = max(roi[0], 0), max(roi[1], 0)
+        x1, y1 = min(roi[2], w), min(roi[3], h)
+        np.copyto(self._output, depth_image)
+        if x1 - x0 < 4 or y1 - y0 < 4:
+            return self._output
+
+        region = self._output[y0:y1, x0:x1]
+        if "decimation" in self.filters:
+            self._decimate(region)
+        if "spatial" in self.filters:
+            region[...] = cv2.medianBlur(region, self.spatial_kernel)
+        if "temporal" in self.filters:
+            self._temporal(region, self._history[y0:y1, x0:x1],
+                           self.temporal_delta_mm / (depth_scale * 1000.0))
+        if "hole_filling" in self.filters:
+            self._fill_holes(region)
+        return self._output
+
+    def _decimate(self, region: np.ndarray):
+        """k x k bloklarda geçerli piksellerin medyanı, bloğa geri yayılır"""
+        k = self.decimation
+        bh, bw = region.shape[0] // k, region.shape[1] // k
+        blocks = region[:bh * k, :bw * k].reshape(bh, k, bw, k).swapaxes(1, 2).reshape(bh, bw, k * k)
+        # Sıralı blokta sıfırlar (geçersiz) başa gelir; geçerlilerin ortası seçilir
+        ordered = np.sort(blocks, axis=2)
+        valid = np.count_nonzero(ordered, axis=2)
+        index = np.minimum(k * k - valid + valid // 2, k * k - 1)
+        medians = np.take_along_axis(ordered, index[..., None], axis=2)[..., 0]
+        region[:bh * k, :bw * k] = np.repeat(np.repeat(medians, k, axis=0), k, axis=1)
+
+    def _fill_holes(self, region: np.ndarray):
+        """Geçersiz pikselleri soldaki son geçerli pikselle doldur (RealSense "fill_from_left" modu)"""
+        width = region.shape[1]
+        columns = np.where(region > 0, np.arange(width), 0)
+        np.maximum.accumulate(columns, axis=1, out=columns)
+        region[...] = np.take_along_axis(region, columns, axis=1)
+
+    def _temporal(self, region: np.ndarray, history: np.ndarray, delta: float):
+        """Üstel yumuşatma; büyük sıçramalarda (gerçek hareket) geçmiş sıfırlanır"""
+        current = region.astype(np.float32)
+        valid = current > 0
+        reset = valid & ((history == 0) | (np.abs(current - history) > delta))
+        blend = valid & ~reset
+        history[reset] = current[reset]
+        history[blend] += self.temporal_alpha * (current[blend] - history[blend])
+        # Geçersiz piksellerde son bilinen değer kullanılır
+        region[...] = history.astype(np.uint16)
+
+
+@dataclass
+class ProfileStats:
+    """Bir profilin ölçülen maliyeti (hareketli ortalama)"""
+    frames: int = 0
+    cpu_ms: Optional[float] = None        # Kare başına süreç CPU zamanı
+    processing_ms: Optional[float] = None  # get_frame duvar saati süresi
+    latency_ms: Optional[float] = None     # Yakalama anından sonucun hazır olmasına kadar
+    effective_fps: Optional[float] = None
+    _last_frame_at: float = field(default=0.0, repr=False)
+
+    def record(self, cpu_ms: float, processing_ms: float, latency_ms: Optional[float],
+               smoothing: float = 0.05):
+        now = time.monotonic()
+        self.cpu_ms = _ewma(self.cpu_ms, cpu_ms, smoothing)
+        self.processing_ms = _ewma(self.processing_ms, processing_ms, smoothing)
+        if latency_ms is not None:
+            self.latency_ms = _ewma(self.latency_ms, latency_ms, smoothing)
+        if self._last_frame_at:
+            interval = now - self._last_frame_at
+            if interval > 0:
+                self.effective_fps = _ewma(self.effective_fps, 1.0 / interval, smoothing)
+        self._last_frame_at = now
+        self.frames += 1
+
+    def pause(self):
+        """Kamera durunca aradaki süre FPS'e katılmasın"""
+        self._last_frame_at = 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        def r(value):
+            return round(value, 2) if value is not None else None
+        return {
+            "frames": self.frames,
+            "cpu_ms": r(self.cpu_ms),
+            "processing_ms": r(self.processing_ms),
+            "latency_ms": r(self.latency_ms),
+            "effective_fps": r(self.effective_fps)
+        }
+
+
+def _ewma(current: Optional[float], value: float, smoothing: float) -> float:
+    if current is None:
+        return value
+    return current + smoothing * (value - current)
+
+
+def describe_profiles(stats: Dict[str, ProfileStats], active: Optional[CameraProfile] = None) -> Dict[str, Any]:
+    """Profil listesi ve ölçümleri (API cevabı için)"""
+    return {
+        "active": asdict(active) if active else None,
+        "filters": list(DEPTH_FILTERS),
+        "profiles": [
+            {
+                **asdict(profile),
+                "measured": stats[name].to_dict() if name in stats else None
+            }
+            for name, profile in CAMERA_PROFILES.items()
+        ]
+    }
@@ -0,0 +1,63 @@
+"""
+Derinlik Önizleme Modülü
+Hizalanmış derinlik görüntüsünü gövde bölgesi etrafında küçültüp 8-bit ikili pakete çevirir
+
+Paket düzeni (little-endian):
+    magic "PKDP" | genişlik u16 | yükseklik u16 | roi_x u16 | roi_y u16 | adım u16 | rezerv u16
+    | yakın_mm f32 | uzak_mm f32 | genişlik*yükseklik adet uint8 piksel
+
+Piksel değeri 0 = geçersiz derinlik, 1..255 = uzaktan yakına (255 en yakın)
+"""
+
+import numpy as np
+import struct
+from typing import Optional, Tuple
+
+
+DEPTH_PREVIEW_MAGIC = b"PKDP"
+_HEADER = struct.Struct("<4sHHHHHHff")
+
+
+def torso_roi(points: Tuple[Tuple[int, int], ...], width: int, height: int,
+              margin: int = 80) -> Tuple[int, int, int, int]:
+    """Omuz ve göğüs noktalarını çevreleyen bölgeyi (x0, y0, x1, y1) döndür"""
+    xs = [p[0] for p in points]
+    ys = [p[1] for p in points]
+    x0 = max(0, min(xs) - margin)
+    y0 = max(0, min(ys) - margin)
+    x1 = min(width, max(xs) + margin)
+    y1 = min(height, max(ys) + margin * 2)
+    return x0, y0, x1, y1
+
+
+def encode_depth_preview(depth_image: np.ndarray, depth_scale: float,
+                         roi: Optional[Tuple[int, int, int, int]] = None,
+                         step: int = 4) -> bytes:
+    """
+    Derinlik görüntüsünü küçült ve uyarlamalı aralıkta 8-bit'e indir
+    Aralık, bölgedeki geçerli piksellerin %2-%98 yüzdeliklerinden belirlenir
+    """
+    h, w = depth_image.shape[:2]
+    x0, y0, x1, y1 = roi if roi is not None else (0, 0, w, h)
+
+    # Dilimleme kopyasız bir görünüm döndürür
+    sub = depth_image[y0:y1:step, x0:x1:step]
+    valid = sub > 0
+
+    out = np.zeros(sub.shape, dtype=np.uint8)
+    near = far = 0.0
+    if valid.any():
+        near, far = np.percentile(sub[valid], (2, 98))
+        span = max(far - near, 1.0)
+        scaled = (far - sub.astype(np.float32)) * (254.0 / span)
+        np.clip(scaled, 0, 254, out=scaled)
+        out[valid] = scaled[valid].astype(np.uint8) + 1
+
+    scale_mm = depth_scale * 1000.0
+    header = _HEADER.pack(
+        DEPTH_PREVIEW_MAGIC,
+        out.shape[1], out.shape[0],
+        x0, y0, step, 0,
+        float(near) * scale_mm, float(far) * scale_mm
+    )
+    return header + out.tobytes()
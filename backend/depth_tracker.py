@@ -0,0 +1,241 @@
+"""
+Derinlik Tabanlı Gövde Takip Modülü
+MediaPipe çalıştırılmayan karelerde omuzları sadece derinlik görüntüsünden takip eder
+
+Mantık:
+- Son başarılı MediaPipe karesinde omuz noktaları ve çevrelerindeki
+  göreli derinlik yamaları (şablon) kaydedilir
+- Sonraki karelerde her omuz, arama penceresi içinde derinlik
+  segmentasyonu (referans derinliğe yakın pikseller) ve şablon
+  eşleştirmesi (SAD) ile vektörel olarak aranır
+- Göğüs noktası, omuz ortasına göre bağıl konumundan türetilir
+- Eşleşme zayıfsa takip kaybedilmiş sayılır ve MediaPipe yeniden çalışır
+"""
+
+import math
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from typing import Optional, Tuple
+
+
+Point = Tuple[int, int]
+
+
+class DepthTorsoTracker:
+    """Omuz noktalarını derinlik görüntüsünde takip eder"""
+
+    def __init__(self, search_radius: int = 12, patch_radius: int = 6,
+                 depth_tolerance_mm: float = 150.0, min_fill: float = 0.35,
+                 max_sad_mm: float = 25.0, max_width_change: float = 0.25):
+        self.search_radius = search_radius
+        self.patch_radius = patch_radius
+        self.depth_tolerance_mm = depth_tolerance_mm
+        self.min_fill = min_fill
+        self.max_sad_mm = max_sad_mm
+        self.max_width_change = max_width_change
+
+        self.active = False
+        self.frames_tracked = 0
+        self.losses = 0
+
+        self._depth_scale_mm = 1.0
+        self._points = np.zeros((2, 2), dtype=np.int64)        # sol/sağ omuz (x, y)
+        self._ref_depth = np.zeros(2, dtype=np.float32)         # ham derinlik birimi
+        self._templates = np.zeros((2, 2 * patch_radius + 1, 2 * patch_radius + 1), dtype=np.float32)
+        self._template_fg = np.zeros_like(self._templates)  # 0/1 ağırlık (float32)
+        self._chest_offset = np.zeros(2, dtype=np.int64)
+        self._anchor_width = 1.0
+
+        # Arama çalışma tamponları: her karede yeniden ayrılmaz. Maskeler 0/1 float32
+        # tutulur; böylece toplamalarda tür dönüşümü (ve geçici dönüşüm tamponu) olmaz
+        side = 2 * (patch_radius + search_radius) + 1
+        grid = (2 * search_radius + 1, 2 * search_radius + 1)
+        shape = grid + self._templates.shape[1:]
+        self._region = np.empty((side, side), dtype=np.float32)
+        self._region_tmp = np.empty((side, side), dtype=np.float32)
+        self._fg = np.empty((side, side), dtype=bool)
+        self._fg_tmp = np.empty((side, side), dtype=bool)
+        self._fg_weights = np.empty((side, side), dtype=np.float32)
+        # Şablon ve maskesi her aday konum için çoğaltılır (sabitlemede bir kez). Pencereler
+        # de önce bitişik tampona kopyalanır: yayınlı (broadcast) veya örtüşen adımlı
+        # girişli ufunc işlemleri NumPy'da geçici tampon ayırır, eş şekilli bitişikler ayırmaz
+        self._tiled_templates = np.zeros((2,) + shape, dtype=np.float32)
+        self._tiled_template_fg = np.zeros((2,) + shape, dtype=np.float32)
+        self._tiled_offsets = np.empty(shape, dtype=np.float32)
+        self._mask = np.empty(shape, dtype=np.float32)
+        self._mismatch_mask = np.empty(shape, dtype=np.float32)
+        self._relative = np.empty(shape, dtype=np.float32)
+        self._counts = np.empty(grid, dtype=np.float32)
+        self._counts_safe = np.empty(grid, dtype=np.float32)
+        self._mismatch = np.empty(grid, dtype=np.float32)
+        self._grid_flag = np.empty(grid, dtype=bool)
+        self._offsets = np.empty(grid, dtype=np.float32)
+        self._sad = np.empty(grid, dtype=np.float32)
+        self._patch_values = np.empty(self._templates.shape[1:], dtype=np.float32)
+        self._patch_invalid = np.empty(self._templates.shape[1:], dtype=bool)
+        # Tamponlar sabit olduğu için pencere görünümleri de bir kez oluşturulur
+        self._windows = sliding_window_view(self._region, self._templates.shape[1:])
+        self._fg_windows = sliding_window_view(self._fg_weights, self._templates.shape[1:])
+
+    def reset(self):
+        self.active = False
+
+    def anchor(self, depth_image: np.ndarray, depth_scale: float,
+               left: Point, right: Point, chest: Point) -> bool:
+        """MediaPipe sonucuyla takipçiyi yeniden sabitle"""
+        self._depth_scale_mm = depth_scale * 1000.0
+        points = np.array([left, right], dtype=np.int64)
+
+        h, w = depth_image.shape[:2]
+        margin = self.patch_radius + self.search_radius
+        if (points[:, 0] < margin).any() or (points[:, 0] >= w - margin).any() \
+                or (points[:, 1] < margin).any() or (points[:, 1] >= h - margin).any():
+            self.active = False
+            return False
+
+        r = self.patch_radius
+        tolerance = self.depth_tolerance_mm / self._depth_scale_mm
+        for i, (x, y) in enumerate(points):
+            patch = depth_image[y - r:y + r + 1, x - r:x + r + 1].astype(np.float32)
+            valid = patch > 0
+            if valid.mean() < self.min_fill:
+                self.active = False
+                return False
+            ref = self._masked_median(patch, valid)
+            self._ref_depth[i] = ref
+            self._templates[i] = patch - ref  # göreli şekil, mesafeden bağımsız
+            # Şablonun ön plan maskesi: gövde kenarı (omuz hattı) bu maskede görünür
+            self._template_fg[i] = valid & (np.abs(patch - ref) < tolerance)
+            np.copyto(self._tiled_templates[i], self._templates[i])
+            np.copyto(self._tiled_template_fg[i], self._template_fg[i])
+
+        self._points = points
+        mid = points.mean(axis=0).astype(np.int64)
+        self._chest_offset = np.array(chest, dtype=np.int64) - mid
+        self._anchor_width = max(float(np.linalg.norm(points[0] - points[1])), 1.0)
+        self.active = True
+        return True
+
+    def track(self, depth_image: np.ndarray) -> Optional[Tuple[Point, Point, Point]]:
+        """
+        Omuzları yeni karede bul
+        Başarılıysa (sol omuz, sağ omuz, göğüs), kaybedildiyse None döndür
+        """
+        if not self.active:
+            return None
+
+        h, w = depth_image.shape[:2]
+        r, s = self.patch_radius, self.search_radius
+        tolerance = self.depth_tolerance_mm / self._depth_scale_mm
+        max_sad = self.max_sad_mm / self._depth_scale_mm
+
+        new_points = self._points.copy()
+        for i in range(2):
+            x, y = int(self._points[i, 0]), int(self._points[i, 1])
+            if x - r - s < 0 or y - r - s < 0 or x + r + s >= w or y + r + s >= h:
+                return self._lose()
+
+            region = self._region
+            np.copyto(region, depth_image[y - r - s:y + r + s + 1, x - r - s:x + r + s + 1],
+                      casting="unsafe")
+
+            # Derinlik segmentasyonu: referansa yakın geçerli pikseller
+            fg = self._fg
+            np.subtract(region, self._ref_depth[i], out=self._region_tmp)
+            np.abs(self._region_tmp, out=self._region_tmp)
+            np.less(self._region_tmp, tolerance, out=fg)
+            np.greater(region, 0, out=self._fg_tmp)
+            fg &= self._fg_tmp
+            np.copyto(self._fg_weights, fg)
+
+            # Her aday konum için (2s+1, 2s+1, 2r+1, 2r+1) görünüm (kopyasız)
+            windows = self._windows
+            fg_windows = self._fg_windows
+
+            template_fg = self._tiled_template_fg[i]
+            template_count = max(int(np.count_nonzero(self._template_fg[i])), 1)
+            mask = self._mask
+            np.copyto(mask, fg_windows)
+            mask *= template_fg
+            counts = np.sum(mask, axis=(2, 3), out=self._counts)
+
+            # Ön plan maskesi uyuşmayan pikseller tolerans kadar ceza alır (a xor b = a + b - 2ab)
+            mismatch_mask = self._mismatch_mask
+            np.copyto(mismatch_mask, fg_windows)
+            mismatch_mask += template_fg
+            mismatch_mask -= mask
+            mismatch_mask -= mask
+            mismatch = np.sum(mismatch_mask, axis=(2, 3), out=self._mismatch)
+
+            # Göreli derinlik şablonuna ortalama mutlak fark (SAD)
+            # Aday pencere şablonla aynı şekilde göreli hale getirilir: şablon
+            # yamanın medyanına göredir, pencerenin taban derinliği de maskeli
+            # (delik olmayan, ön plan) piksellerden kestirilir. Merkez pikseli
+            # delik olsa bile eşleşme bozulmaz.
+            relative = self._relative
+            np.copyto(relative, windows)
+            relative -= self._tiled_templates[i]
+            relative *= mask
+            offsets = np.sum(relative, axis=(2, 3), out=self._offsets)
+            np.maximum(counts, 1, out=self._counts_safe)
+            offsets /= self._counts_safe
+            np.copyto(offsets, self._ref_depth[i], where=np.equal(counts, 0, out=self._grid_flag))
+            np.copyto(self._tiled_offsets, offsets[:, :, None, None])
+            relative -= self._tiled_offsets
+            np.abs(relative, out=relative)
+            relative *= mask
+            sad = np.sum(relative, axis=(2, 3), out=self._sad)
+            mismatch *= tolerance
+            sad += mismatch
+            sad /= template_count
+            np.copyto(sad, np.inf,
+                      where=np.less(counts, self.min_fill * template_count, out=self._grid_flag))
+
+            best = np.unravel_index(np.argmin(sad), sad.shape)
+            if not np.isfinite(sad[best]) or sad[best] > max_sad:
+                return self._lose()
+
+            new_points[i, 0] = x + int(best[1]) - s
+            new_points[i, 1] = y + int(best[0]) - s
+
+            # Referans derinliği yeni konumdaki gövde derinliğine kaydır
+            by, bx = int(best[0]), int(best[1])
+            patch_fg = fg[by:by + 2 * r + 1, bx:bx + 2 * r + 1]
+            if patch_fg.any():
+                self._ref_depth[i] = self._masked_median(
+                    region[by:by + 2 * r + 1, bx:bx + 2 * r + 1], patch_fg)
+
+        # Omuz genişliği ani değiştiyse takip güvenilmez
+        width = math.hypot(int(new_points[0, 0] - new_points[1, 0]),
+                           int(new_points[0, 1] - new_points[1, 1]))
+        if abs(width - self._anchor_width) / self._anchor_width > self.max_width_change:
+            return self._lose()
+
+        self._points = new_points
+        self.frames_tracked += 1
+
+        left = (int(new_points[0, 0]), int(new_points[0, 1]))
+        right = (int(new_points[1, 0]), int(new_points[1, 1]))
+        # Omuz ortası (float ortalamanın tamsayıya kesilmesi) + göğüs ofseti
+        chest_x = int((left[0] + right[0]) / 2) + int(self._chest_offset[0])
+        chest_y = int((left[1] + right[1]) / 2) + int(self._chest_offset[1])
+        return left, right, (min(max(chest_x, 0), w - 1), min(max(chest_y, 0), h - 1))
+
+    def _masked_median(self, patch: np.ndarray, valid: np.ndarray) -> float:
+        """
+        Yamanın geçerli piksellerinin medyanı (np.median(patch[valid]) ile aynı)
+        Maske indekslemesi yerine tampon yerinde sıralanır, geçersizler sona atılır
+        """
+        values = self._patch_values
+        np.copyto(values, patch)
+        np.copyto(values, np.inf, where=np.logical_not(valid, out=self._patch_invalid))
+        flat = values.reshape(-1)
+        flat.sort()
+        count = int(np.count_nonzero(valid))
+        return (float(flat[(count - 1) // 2]) + float(flat[count // 2])) / 2
+
+    def _lose(self) -> None:
+        self.active = False
+        self.losses += 1
+        return None
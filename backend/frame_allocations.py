@@ -0,0 +1,256 @@
+"""
+Kare Başına Bellek Ayırma Ölçümü
+get_frame() sıcak yolunun kararlı durumda kare başına ne kadar bellek ayırdığını
+tracemalloc ile ölçer
+
+- Kamera yerine sabit sentetik renk + derinlik kareleri veren bir kaynak kullanılır
+- MediaPipe yerine sabit landmark döndüren poz nesnesi kullanılır; böylece sadece
+  analizörün kendi Python/NumPy ayırmaları ölçülür (MediaPipe'ın C++ belleği
+  tracemalloc'a zaten görünmez)
+- Her kare için iki değer çıkar:
+    peak      kare içinde anlık olarak ayrılan en yüksek bellek (geçici tamponlar)
+    retained  ölçüm boyunca kalıcı olarak büyüyen bellek (sızıntı)
+
+Kullanım: python backend/frame_allocations.py
+Sınır kontrolü: python -m pytest backend/tests/test_frame_allocations.py
+"""
+
+import tracemalloc
+from types import SimpleNamespace
+from typing import Dict, Any, Optional
+
+import numpy as np
+
+
+# Sentetik sahne: arka plan 3 m, kişi ~1 m, omuzlar göğüsten biraz geride.
+# Sahne 640x480 referans pikselleriyle tanımlanır; diğer çözünürlüklerde aynı
+# fiziksel sahne görüntü yüksekliği oranında ölçeklenip ortalanır
+_REFERENCE = (640, 480)
+_BACKGROUND_MM = 3000
+_BODY_MM = 1000
+_SHOULDERS = ((250, 200), (390, 200))  # Referans piksel
+
+
+def _to_reference(width: int, height: int):
+    """Piksel -> referans piksel dönüşümü: (ölçek, x kayması, y kayması)"""
+    scale = height / _REFERENCE[1]
+    return scale, width / 2 - _REFERENCE[0] / 2 * scale, height / 2 - _REFERENCE[1] / 2 * scale
+
+
+def shoulder_points(width: int = 640, height: int = 480):
+    """Sentetik omuzların verilen çözünürlükteki piksel konumları"""
+    scale, dx, dy = _to_reference(width, height)
+    return tuple((x * scale + dx, y * scale + dy) for x, y in _SHOULDERS)
+
+
+class _SyntheticFrame:
+    """rs.frame yerine geçen kare: veri tamponu tekrar kullanılır"""
+
+    def __init__(self, data: np.ndarray, domain):
+        self._data = data
+        self._domain = domain
+        self.frame_number = 0
+        self.timestamp = 0.0
+
+    def __bool__(self):
+        return True
+
+    def get_data(self):
+        return self._data
+
+    def get_frame_number(self) -> int:
+        return self.frame_number
+
+    def get_timestamp(self) -> float:
+        return self.timestamp
+
+    def get_frame_timestamp_domain(self):
+        return self._domain
+
+
+class _SyntheticFrameset:
+    def __init__(self, color: _SyntheticFrame, depth: _SyntheticFrame):
+        self._color = color
+        self._depth = depth
+
+    def get_color_frame(self):
+        return self._color
+
+    def get_depth_frame(self):
+        return self._depth
+
+
+class SyntheticFrameSource:
+    """
+    rs.pipeline yerine geçen kaynak: her çağrıda aynı sahneyi yeni kare numarasıyla verir
+    Kişi hafifçe sağa sola kayar ki derinlik takipçisi gerçek bir arama yapsın
+    """
+
+    def __init__(self, width: int = 640, height: int = 480, depth_scale: float = 0.001):
+        import pyrealsense2 as rs
+
+        self.width = width
+        self.height = height
+        self.depth_scale = depth_scale
+
+        yy, xx = np.mgrid[0:height, 0:width]
+        self._scale, dx, dy = _to_reference(width, height)
+        u = (xx - dx) / self._scale  # Referans piksel koordinatları
+        v = (yy - dy) / self._scale
+        self._base_depth = np.full((height, width), _BACKGROUND_MM, dtype=np.uint16)
+        body = (v > 180) & (u > 240) & (u < 400)
+        torso = (_BODY_MM + 0.01 * (u - 320) ** 2 + 0.3 * (v - 180)).astype(np.uint16)
+        self._base_depth[body] = torso[body]
+        # Kaydırılmış sahneler bir kez hazırlanır; kaynak kendi ayırmasıyla ölçümü bozmasın
+        self._shifted_depths = [np.roll(self._base_depth, shift, axis=1) for shift in (-1, 0, 1)]
+        self._depth = np.empty_like(self._base_depth)
+
+        color = np.empty((height, width, 3), dtype=np.uint8)
+        color[..., 0] = (xx * 255 // width).astype(np.uint8)
+        color[..., 1] = (yy * 255 // height).astype(np.uint8)
+        color[..., 2] = 128
+        color[body] = (180, 140, 120)
+
+        domain = rs.timestamp_domain.system_time
+        self._color_frame = _SyntheticFrame(color, domain)
+        self._depth_frame = _SyntheticFrame(self._depth, domain)
+        self._frames = _SyntheticFrameset(self._color_frame, self._depth_frame)
+        self._profile = self._create_profile()
+        self._count = 0
+
+    def _create_profile(self):
+        focal = 600.0 * self._scale
+        intrinsics = SimpleNamespace(width=self.width, height=self.height, fx=focal, fy=focal,
+                                     ppx=self.width / 2, ppy=self.height / 2, model="none",
+                                     coeffs=[0.0] * 5)
+        stream = SimpleNamespace(
+            as_video_stream_profile=lambda: SimpleNamespace(get_intrinsics=lambda: intrinsics))
+        sensor = SimpleNamespace(get_depth_scale=lambda: self.depth_scale)
+        device = SimpleNamespace(first_depth_sensor=lambda: sensor, hardware_reset=lambda: None)
+        return SimpleNamespace(get_device=lambda: device, get_stream=lambda _: stream)
+
+    def start(self, *args):
+        return self._profile
+
+    def stop(self):
+        pass
+
+    def poll_for_frames(self):
+        return None
+
+    def wait_for_frames(self, timeout_ms: int = 5000):
+        self._count += 1
+        # Her 10 karede bir -1, 0, +1 piksel kayma
+        np.copyto(self._depth, self._shifted_depths[(self._count // 10) % 3])
+        for frame in (self._color_frame, self._depth_frame):
+            frame.frame_number = self._count
+            frame.timestamp = self._count * 1000 / 30
+        return self._frames
+
+
+class _PassThroughAlign:
+    """Sentetik derinlik zaten renge hizalı"""
+
+    def process(self, frames):
+        return frames
+
+
+class FixedPose:
+    """MediaPipe Pose yerine her karede aynı landmark'ları döndürür"""
+
+    def __init__(self, width: int = 640, height: int = 480):
+        # NormalizedLandmarkList ile aynı alanlar (x, y, z, visibility)
+        landmarks = [SimpleNamespace(x=0.5, y=0.6, z=0.0, visibility=0.9) for _ in range(33)]
+        # Omuzlar (11, 12) sentetik gövdenin üst kenarında
+        for index, (x, y) in zip((11, 12), shoulder_points(width, height)):
+            landmarks[index].x = x / width
+            landmarks[index].y = y / height
+        self._results = SimpleNamespace(pose_landmarks=SimpleNamespace(landmark=landmarks))
+
+    def process(self, image):
+        return self._results
+
+    def close(self):
+        pass
+
+
+def start_synthetic_analyzer(width: int = 640, height: int = 480, frame_format: str = "base64"):
+    """
+    Sentetik kaynak ve sabit pozla çalışan bir PostureAnalyzer başlat
+    Çağıran taraf işi bitince stop() çağırmalıdır
+    """
+    from posture_analyzer import PostureAnalyzer
+
+    source = SyntheticFrameSource(width, height)
+    analyzer = PostureAnalyzer(pipeline=source)
+    analyzer.frame_format = frame_format
+    analyzer._pose_calibrated = True  # Kalibrasyon gerçek model ister; ölçüme dahil değil
+    analyzer.pose.close()
+    analyzer.pose = FixedPose(width, height)
+    analyzer.autotuner.cooldown_seconds = float("inf")  # Sabit poz nesnesi değiştirilmesin
+    if not analyzer.start():
+        raise RuntimeError("Analizör sentetik kaynakla başlatılamadı")
+    analyzer.align = _PassThroughAlign()
+    return analyzer
+
+
+def measure_frame_allocations(frames: int = 300, warmup: int = 60,
+                              frame_format: str = "base64",
+                              width: int = 640, height: int = 480) -> Dict[str, Any]:
+    """
+    Sentetik kaynakla get_frame() çalıştır ve kare başına ayırmaları ölç
+    frame_format: "base64" (API süreci) veya "jpeg" (ayrı analiz süreci)
+    """
+    analyzer = start_synthetic_analyzer(width, height, frame_format)
+
+    try:
+        # Isınma: tamponlar, takipçi ve önbellekler ilk karelerde oluşur
+        result: Optional[Dict[str, Any]] = None
+        for _ in range(warmup):
+            result = analyzer.get_frame()
+        if result is None or result.get("status") is None:
+            raise RuntimeError("Sentetik sahnede postür ölçülemedi")
+
+        peaks = np.zeros(frames, dtype=np.int64)  # İzlemeden önce ayrılır; ölçüme karışmasın
+        sources = {"mediapipe": 0, "depth": 0}
+        tracemalloc.start()
+        # Başlangıç ölçümü de izlenen canlı bir sonuç (kodlanmış kare) içersin ki
+        # sonda tutulan son kare kalıcı büyüme sayılmasın
+        result = analyzer.get_frame()
+        start_current, _ = tracemalloc.get_traced_memory()
+        for i in range(frames):
+            tracemalloc.reset_peak()
+            before, _ = tracemalloc.get_traced_memory()
+            result = analyzer.get_frame()
+            _, peak = tracemalloc.get_traced_memory()
+            peaks[i] = peak - before
+            if result is not None and result.get("tracking_source") in sources:
+                sources[result["tracking_source"]] += 1
+        end_current, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    finally:
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+        analyzer.stop()
+
+    if frame_format == "jpeg":
+        encoded_bytes = len(result.get("frame_jpeg", b""))
+    else:
+        encoded_bytes = len(result.get("frame_base64") or "")
+    return {
+        "frame_format": frame_format,
+        "frames": frames,
+        "tracking_sources": sources,
+        "peak_kb_median": round(float(np.median(peaks)) / 1024, 1),
+        "peak_kb_max": round(int(peaks.max()) / 1024, 1),
+        "retained_bytes_per_frame": round((end_current - start_current) / frames, 1),
+        "encoded_frame_kb": round(encoded_bytes / 1024, 1)
+    }
+
+
+if __name__ == "__main__":
+    for fmt in ("base64", "jpeg"):
+        row = measure_frame_allocations(frame_format=fmt)
+        print(f"📊 {row['frame_format']:>6}: kare başına anlık {row['peak_kb_median']} KB "
+              f"(en fazla {row['peak_kb_max']} KB), kalıcı {row['retained_bytes_per_frame']} B/kare, "
+              f"kodlanmış kare {row['encoded_frame_kb']} KB, kaynak {row['tracking_sources']}")
@@ -0,0 +1,222 @@
+"""
+Kare Akışı Bekçisi (Watchdog) Modülü
+Kareler arası boşluğu izler, takılmalarda kademeli kurtarma önerir
+
+Kademeler:
+1. retry          - kare bekleme tekrar denenir
+2. restart        - RealSense pipeline durdurulup yeniden başlatılır
+3. hardware_reset - cihaz donanımsal olarak sıfırlanır ve pipeline yeniden açılır
+
+Bekçi kameraya dokunmaz; sadece ne yapılması gerektiğini söyler. Böylece
+sahte kare kaynağı veya FaultInjectingPipeline ile test edilebilir.
+"""
+
+import time
+from typing import Optional, Dict, Any, List, Callable, Tuple
+
+
+ACTION_RETRY = "retry"
+ACTION_RESTART = "restart"
+ACTION_HARDWARE_RESET = "hardware_reset"
+
+
+class FrameWatchdog:
+    """Kare boşluklarını SLO'ya göre izler ve takılmalarda kurtarma kademesini belirler"""
+
+    def __init__(self, slo_ms: float = 150.0, retries_before_restart: int = 3,
+                 restarts_before_reset: int = 2, clock: Callable[[], float] = time.monotonic):
+        self.slo_ms = slo_ms
+        self.retries_before_restart = retries_before_restart
+        self.restarts_before_reset = restarts_before_reset
+        self.clock = clock
+
+        self.frames = 0
+        self.slo_violations = 0
+        self.last_gap_ms: Optional[float] = None
+        self.max_gap_ms = 0.0
+
+        self.stalls = 0
+        self.recoveries = 0
+        self.restarts = 0
+        self.hardware_resets = 0
+        self.last_recovery_seconds: Optional[float] = None
+        self.max_recovery_seconds = 0.0
+        self.total_stalled_seconds = 0.0
+        self.last_action: Optional[str] = None
+
+        self._last_frame_at: Optional[float] = None
+        self._stall_started_at: Optional[float] = None
+        self._failures = 0           # Son kurtarma adımından beri ardışık hata
+        self._restarts_in_stall = 0  # Bu takılmada yapılan pipeline yeniden başlatma sayısı
+
+    @property
+    def is_stalled(self) -> bool:
+        return self._stall_started_at is not None
+
+    def reset(self):
+        """Kamera bilinçli olarak durdurulduğunda boşluk ölçümünü sıfırla"""
+        self._last_frame_at = None
+        self._stall_started_at = None
+        self._failures = 0
+        self._restarts_in_stall = 0
+
+    def record_frame(self) -> Optional[float]:
+        """
+        Başarılı kareyi kaydet
+        Bir takılma bittiyse kurtarma süresini (saniye) döndürür
+        """
+        now = self.clock()
+        if self._last_frame_at is not None:
+            gap_ms = (now - self._last_frame_at) * 1000
+            self.last_gap_ms = gap_ms
+            self.max_gap_ms = max(self.max_gap_ms, gap_ms)
+            if gap_ms > self.slo_ms:
+                self.slo_violations += 1
+        self._last_frame_at = now
+        self.frames += 1
+
+        if self._stall_started_at is None:
+            return None
+
+        duration = now - self._stall_started_at
+        self._stall_started_at = None
+        self._failures = 0
+        self._restarts_in_stall = 0
+        self.recoveries += 1
+        self.last_recovery_seconds = duration
+        self.max_recovery_seconds = max(self.max_recovery_seconds, duration)
+        self.total_stalled_seconds += duration
+        return duration
+
+    def record_failure(self) -> str:
+        """Kare alınamadı; yapılması gereken kurtarma adımını döndür"""
+        now = self.clock()
+        if self._stall_started_at is None:
+            # Takılma son başarılı karede başlamış sayılır
+            self._stall_started_at = self._last_frame_at if self._last_frame_at is not None else now
+            self.stalls += 1
+
+        self._failures += 1
+        if self._failures <= self.retries_before_restart:
+            action = ACTION_RETRY
+        elif self._restarts_in_stall < self.restarts_before_reset:
+            self._restarts_in_stall += 1
+            self._failures = 0
+            self.restarts += 1
+            action = ACTION_RESTART
+        else:
+            self._restarts_in_stall = 0
+            self._failures = 0
+            self.hardware_resets += 1
+            action = ACTION_HARDWARE_RESET
+
+        self.last_action = action
+        return action
+
+    def stalled_for(self) -> float:
+        """Süren takılmanın uzunluğu (saniye), takılma yoksa 0"""
+        if self._stall_started_at is None:
+            return 0.0
+        return self.clock() - self._stall_started_at
+
+    def to_dict(self) -> Dict[str, Any]:
+        def r(value, digits=1):
+            return round(value, digits) if value is not None else None
+        return {
+            "stalled": self.is_stalled,
+            "stalled_for": r(self.stalled_for(), 2),
+            "slo_ms": self.slo_ms,
+            "frames": self.frames,
+            "slo_violations": self.slo_violations,
+            "last_gap_ms": r(self.last_gap_ms),
+            "max_gap_ms": r(self.max_gap_ms),
+            "stalls": self.stalls,
+            "recoveries": self.recoveries,
+            "restarts": self.restarts,
+            "hardware_resets": self.hardware_resets,
+            "last_action": self.last_action,
+            "last_recovery_seconds": r(self.last_recovery_seconds, 2),
+            "max_recovery_seconds": r(self.max_recovery_seconds, 2),
+            "total_stalled_seconds": r(self.total_stalled_seconds, 2)
+        }
+
+
+class FaultInjectingPipeline:
+    """
+    Pipeline sarmalayıcı: belirli karelerde zaman aşımı hatası üretir
+    Gerçek rs.pipeline, ham kayıt oynatıcı veya sahte kaynakla kullanılabilir
+
+    faults: (kaçıncı karede başlasın, kaç deneme sürsün) listesi
+    restart_clears: True ise pipeline yeniden başlatılınca süren arıza biter
+    """
+
+    def __init__(self, pipeline, faults: List[Tuple[int, int]], restart_clears: bool = False,
+                 sleep: bool = False):
+        self.pipeline = pipeline
+        self.faults = sorted(faults)
+        self.restart_clears = restart_clears
+        self.sleep = sleep
+        self.frames_delivered = 0
+        self.injected = 0
+        self._remaining = 0
+
+    def start(self, *args, **kwargs):
+        if self.restart_clears:
+            self._remaining = 0
+        return self.pipeline.start(*args, **kwargs)
+
+    def stop(self):
+        return self.pipeline.stop()
+
+    def wait_for_frames(self, timeout_ms: int = 5000):
+        if self._remaining == 0 and self.faults and self.faults[0][0] <= self.frames_delivered:
+            _, count = self.faults.pop(0)
+            self._remaining = count
+
+        if self._remaining > 0:
+            self._remaining -= 1
+            self.injected += 1
+            if self.sleep:
+                time.sleep(timeout_ms / 1000)
+            raise RuntimeError(f"Frame didn't arrive within {timeout_ms}")
+
+        frames = self.pipeline.wait_for_frames(timeout_ms)
+        self.frames_delivered += 1
+        return frames
+
+    def __getattr__(self, name):
+        return getattr(self.pipeline, name)
+
+
+if __name__ == "__main__":
+    # Sahte kaynakla kademeli kurtarmayı göster
+    class _FakePipeline:
+        def start(self, *args):
+            return None
+
+        def stop(self):
+            pass
+
+        def wait_for_frames(self, timeout_ms):
+            return object()
+
+    fake_time = [0.0]
+    watchdog = FrameWatchdog(clock=lambda: fake_time[0])
+    pipeline = FaultInjectingPipeline(_FakePipeline(), faults=[(30, 4), (60, 12)])
+
+    for _ in range(120):
+        fake_time[0] += 1 / 30
+        try:
+            pipeline.wait_for_frames(500)
+        except RuntimeError:
+            fake_time[0] += 0.5
+            action = watchdog.record_failure()
+            print(f"⚠️ t={fake_time[0]:.2f}s kare yok -> {action}")
+            if action != ACTION_RETRY:
+                pipeline.start()
+            continue
+        recovered = watchdog.record_frame()
+        if recovered is not None:
+            print(f"✅ t={fake_time[0]:.2f}s kurtarıldı ({recovered:.2f}s)")
+
+    print(watchdog.to_dict())
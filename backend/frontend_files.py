@@ -0,0 +1,140 @@
+"""
+Frontend Sunucu Modülü
+Vite production build'ini (frontend/dist) API ile aynı süreçten sunar
+
+- Dosya tablosu açılışta bir kez çıkarılır; istek başına dosya sistemi taraması yok
+- Build sırasında üretilen .br/.gz kopyaları Accept-Encoding'e göre olduğu gibi
+  gönderilir (istek başına sıkıştırma yapılmaz)
+- /assets/ altındaki içerik-hash'li dosyalar bir yıl "immutable" önbelleğe alınır;
+  index.html ve diğer kök dosyalar her seferinde ETag ile doğrulanır
+- API/WebSocket dışındaki bilinmeyen yollar SPA için index.html'e düşer
+"""
+
+import mimetypes
+import os
+from dataclasses import dataclass, field
+from typing import Optional, Dict
+
+from fastapi import Request
+from fastapi.responses import FileResponse, Response
+
+
+IMMUTABLE_PREFIX = "assets/"
+IMMUTABLE_CACHE = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE = "no-cache"
+
+# Sunucu tercih sırası: brotli daha küçük, gzip her yerde desteklenir
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+_CONTENT_TYPES = {
+    ".js": "text/javascript; charset=utf-8",
+    ".mjs": "text/javascript; charset=utf-8",
+    ".css": "text/css; charset=utf-8",
+    ".html": "text/html; charset=utf-8",
+    ".json": "application/json",
+    ".svg": "image/svg+xml",
+    ".wasm": "application/wasm",
+    ".woff2": "font/woff2",
+    ".map": "application/json",
+}
+
+
+@dataclass
+class StaticFile:
+    """Sunulabilir bir dosya ve önceden sıkıştırılmış kopyaları"""
+    path: str
+    content_type: str
+    cache_control: str
+    etag: str
+    variants: Dict[str, str] = field(default_factory=dict)  # kodlama -> dosya yolu
+
+
+def _accepted_encodings(request: Request) -> set:
+    """Accept-Encoding başlığındaki kabul edilen kodlamalar (q=0 olanlar hariç)"""
+    accepted = set()
+    for part in request.headers.get("accept-encoding", "").split(","):
+        name, _, params = part.strip().partition(";")
+        if not name:
+            continue
+        params = params.replace(" ", "")
+        if params.startswith("q="):
+            try:
+                if float(params[2:]) <= 0:
+                    continue
+            except ValueError:
+                continue
+        accepted.add(name.strip().lower())
+    return accepted
+
+
+class FrontendFiles:
+    """frontend/dist dizinini önceden sıkıştırılmış ve önbelleklenebilir şekilde sunar"""
+
+    def __init__(self, dist_dir: str, index: str = "index.html"):
+        self.dist_dir = os.path.abspath(dist_dir)
+        self.index = index
+        self.files: Dict[str, StaticFile] = {}
+        self._scan()
+
+        if self.index not in self.files:
+            raise FileNotFoundError(
+                f"{os.path.join(self.dist_dir, self.index)} bulunamadı; önce 'npm run build' çalıştırın")
+        compressed = sum(1 for f in self.files.values() if f.variants)
+        print(f"🌐 Frontend sunuluyor: {self.dist_dir} "
+              f"({len(self.files)} dosya, {compressed} önceden sıkıştırılmış)")
+
+    def _scan(self):
+        for root, _, names in os.walk(self.dist_dir):
+            for name in names:
+                full = os.path.join(root, name)
+                url = os.path.relpath(full, self.dist_dir).replace(os.sep, "/")
+                base, ext = os.path.splitext(url)
+                # .br/.gz kopyaları asıl dosyanın varyantıdır, ayrı yol olarak sunulmaz
+                if ext in (".br", ".gz") and os.path.exists(os.path.join(self.dist_dir, base)):
+                    continue
+
+                stat = os.stat(full)
+                content_type = _CONTENT_TYPES.get(ext) or \
+                    mimetypes.guess_type(name)[0] or "application/octet-stream"
+                immutable = url.startswith(IMMUTABLE_PREFIX)
+                static = StaticFile(
+                    path=full,
+                    content_type=content_type,
+                    cache_control=IMMUTABLE_CACHE if immutable else REVALIDATE_CACHE,
+                    etag=f'"{int(stat.st_mtime):x}-{stat.st_size:x}"'
+                )
+                for encoding, suffix in ENCODINGS:
+                    if os.path.exists(full + suffix):
+                        static.variants[encoding] = full + suffix
+                self.files[url] = static
+
+    def response(self, request: Request, url: str) -> Response:
+        """Dosyayı uygun kodlamayla döndür; bilinmeyen yollar index.html'e düşer"""
+        url = url.lstrip("/")
+        static = self.files.get(url)
+        if static is None:
+            # Eksik hash'li dosya eski bir build'e aittir; index.html ile cevaplanmaz
+            if url.startswith(IMMUTABLE_PREFIX):
+                return Response(status_code=404)
+            static = self.files[self.index]
+
+        accepted = _accepted_encodings(request)
+        encoding: Optional[str] = None
+        for name, _ in ENCODINGS:
+            if name in static.variants and name in accepted:
+                encoding = name
+                break
+
+        etag = static.etag if encoding is None else f'{static.etag[:-1]}-{encoding}"'
+        headers = {"Cache-Control": static.cache_control, "ETag": etag}
+        if static.variants:
+            headers["Vary"] = "Accept-Encoding"
+
+        if etag in [tag.strip() for tag in request.headers.get("if-none-match", "").split(",")]:
+            return Response(status_code=304, headers=headers)
+
+        if encoding is not None:
+            headers["Content-Encoding"] = encoding
+            return FileResponse(static.variants[encoding], media_type=static.content_type,
+                                headers=headers)
+        return FileResponse(static.path, media_type=static.content_type, headers=headers)
@@ -0,0 +1,93 @@
+"""
+Geçmiş Dışa Aktarma Modülü
+Oturum geçmişini NDJSON / CSV olarak parça parça üretir (sabit bellek)
+"""
+
+import csv
+import io
+import json
+import datetime
+import zlib
+from typing import Optional, Dict, Any, Iterable, Iterator
+
+from rollups import parse_completed_at
+
+
+EXPORT_FORMATS = ("ndjson", "csv")
+EXPORT_KINDS = ("sessions", "timeline")
+
+# CSV sütunları
+SESSION_COLUMNS = (
+    "session_id", "completed_at", "total_duration", "good_posture_time",
+    "bad_posture_time", "good_percentage", "bad_percentage",
+    "warning_count", "posture_score"
+)
+TIMELINE_COLUMNS = ("session_id", "completed_at", "time", "status")
+
+
+def filter_sessions(history: Iterable[Dict[str, Any]],
+                    start: Optional[datetime.date] = None,
+                    end: Optional[datetime.date] = None,
+                    min_score: Optional[float] = None) -> Iterator[Dict[str, Any]]:
+    """Tarih aralığı ve minimum skora göre oturumları süz"""
+    for result in history:
+        if start is not None or end is not None:
+            day = parse_completed_at(result)
+            if day is None:
+                continue
+            if start is not None and day < start:
+                continue
+            if end is not None and day > end:
+                continue
+        if min_score is not None and result.get("posture_score", 0) < min_score:
+            continue
+        yield result
+
+
+def _timeline_rows(sessions: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+    """Her oturumun zaman çizelgesi noktalarını tek tek üret"""
+    for result in sessions:
+        for point in result.get("timeline", []):
+            yield {
+                "session_id": result.get("session_id"),
+                "completed_at": result.get("completed_at"),
+                "time": point.get("time"),
+                "status": point.get("status")
+            }
+
+
+def iter_ndjson(sessions: Iterable[Dict[str, Any]], kind: str = "sessions") -> Iterator[bytes]:
+    """Her satırı ayrı bir JSON nesnesi olarak üret"""
+    rows = sessions if kind == "sessions" else _timeline_rows(sessions)
+    for row in rows:
+        yield (json.dumps(row, ensure_ascii=False) + "\n").encode("utf-8")
+
+
+def iter_csv(sessions: Iterable[Dict[str, Any]], kind: str = "sessions") -> Iterator[bytes]:
+    """CSV satırlarını tek bir yeniden kullanılan tampon üzerinden üret"""
+    if kind == "sessions":
+        columns, rows = SESSION_COLUMNS, sessions
+    else:
+        columns, rows = TIMELINE_COLUMNS, _timeline_rows(sessions)
+
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=columns, extrasaction="ignore")
+
+    writer.writeheader()
+    yield buffer.getvalue().encode("utf-8")
+
+    for row in rows:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerow(row)
+        yield buffer.getvalue().encode("utf-8")
+
+
+def gzip_stream(chunks: Iterable[bytes], level: int = 6) -> Iterator[bytes]:
+    """Parçaları anlık olarak gzip ile sıkıştır"""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)  # 31 = gzip başlığı
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
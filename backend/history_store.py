@@ -0,0 +1,145 @@
+"""
+Oturum Geçmişi Saklama Modülü
+Bellekteki oturum geçmişini sınırlı tutar
+
+- Son oturumlar tam ayrıntılı kalır
+- Eski oturumlar sıkıştırılır: özet alanlar korunur, zaman çizelgesi seyreltilir,
+  durum bölütleri atılır
+- Yaş veya sayı sınırını aşan oturumlar diskteki NDJSON arşive taşınır
+- Sıkıştırma arka plan thread'inde çalışır, kare döngüsünü bloklamaz
+"""
+
+import datetime
+import json
+import os
+import threading
+from dataclasses import dataclass
+from typing import Optional, Dict, Any, List, Iterator, Callable
+
+
+@dataclass
+class RetentionPolicy:
+    """Geçmiş saklama kuralları"""
+    full_detail_sessions: int = 20     # Son N oturum her zaman tam ayrıntılı
+    full_detail_days: float = 7.0      # Bundan yeni oturumlar da tam ayrıntılı
+    compact_timeline_points: int = 60  # Sıkıştırılmış oturumda kalan zaman çizelgesi noktası
+    max_memory_sessions: int = 500     # Bellekte tutulan en fazla oturum
+    max_memory_days: float = 90.0      # Bundan eski oturumlar arşive taşınır
+    interval_seconds: float = 300.0    # Periyodik sıkıştırma aralığı
+
+
+def result_age_days(result: Dict[str, Any], now: datetime.datetime) -> float:
+    """Oturumun tamamlanmasından bu yana geçen gün (tarih okunamazsa 0)"""
+    completed_at = result.get("completed_at")
+    if not completed_at:
+        return 0.0
+    try:
+        completed = datetime.datetime.strptime(completed_at, "%Y-%m-%d %H:%M:%S")
+    except ValueError:
+        return 0.0
+    return (now - completed).total_seconds() / 86400
+
+
+def downsample_timeline(timeline: List[Dict[str, Any]], points: int) -> List[Dict[str, Any]]:
+    """Zaman çizelgesinden eşit aralıklı en fazla `points` nokta seç (ilk ve son korunur)"""
+    if len(timeline) <= points or points < 2:
+        return list(timeline)
+    last = len(timeline) - 1
+    step = last / (points - 1)
+    return [timeline[round(i * step)] for i in range(points)]
+
+
+def compact_result(result: Dict[str, Any], policy: RetentionPolicy) -> Dict[str, Any]:
+    """Oturum sonucunun sıkıştırılmış kopyasını döndür"""
+    compacted = dict(result)
+    compacted["timeline"] = downsample_timeline(result.get("timeline", []),
+                                                policy.compact_timeline_points)
+    compacted.pop("segments", None)  # Ayrıntılı bölütler atılır, seyreltilmiş görünüm kalır
+    compacted["compacted"] = True
+    return compacted
+
+
+class HistoryArchive:
+    """
+    Diskteki satır başına bir oturum (NDJSON) arşivi
+    Sadece sona ekleme yapılır; okuma dosyayı baştan akışla dolaşır
+    """
+
+    def __init__(self, directory: str, filename: str = "history_archive.ndjson"):
+        self.directory = directory
+        self.path = os.path.join(directory, filename)
+        os.makedirs(directory, exist_ok=True)
+        self.count = self._count_lines()
+
+    def _count_lines(self) -> int:
+        if not os.path.exists(self.path):
+            return 0
+        with open(self.path, "rb") as f:
+            return sum(1 for line in f if line.strip())
+
+    def append(self, results: List[Dict[str, Any]]):
+        """Oturumları arşive yaz (count çağıran tarafından güncellenir)"""
+        with open(self.path, "a", encoding="utf-8") as f:
+            for result in results:
+                f.write(json.dumps(result, ensure_ascii=False))
+                f.write("\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def iter_results(self, limit: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+        """Arşivdeki oturumları sırayla dolaş (en fazla `limit` kayıt)"""
+        if not os.path.exists(self.path):
+            return
+        seen = 0
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                if limit is not None and seen >= limit:
+                    return
+                line = line.strip()
+                if not line:
+                    continue
+                seen += 1
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    print(f"⚠️ Bozuk arşiv satırı atlandı: {self.path}")
+
+
+class HistoryCompactor:
+    """Sıkıştırma fonksiyonunu periyodik olarak veya uyandırıldığında çalıştıran thread"""
+
+    def __init__(self, compact: Callable[[], Any], interval_seconds: float = 300.0):
+        self.compact = compact
+        self.interval_seconds = interval_seconds
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="history-compactor", daemon=True)
+        self._thread.start()
+
+    def wake(self):
+        """Bir sonraki turu beklemeden sıkıştırmayı tetikle"""
+        self._wake.set()
+
+    def stop(self, timeout: float = 5.0):
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=timeout)
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.interval_seconds)
+            self._wake.clear()
+            if self._stop.is_set():
+                break
+            try:
+                self.compact()
+            except Exception as e:
+                print(f"⚠️ Geçmiş sıkıştırma hatası: {e}")
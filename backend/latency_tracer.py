@@ -0,0 +1,184 @@
+"""
+Gecikme İzleme Modülü
+Kamera yakalamasından tarayıcıda çizilene kadar (glass-to-glass) geçen süreyi ölçer
+
+- get_frame sonucu her aşamanın zaman damgasını (epoch ms) taşır:
+  capture, received, aligned, inferred, encoded
+  (ayrı analiz sürecinde delivered: paylaşılan bellekten okunduğu an)
+- WebSocket döngüsü enqueued ve sent damgalarını ekler
+- İstemci her N karede bir ack gönderir: kare numarası ve mesajı alıp
+  çizene kadar geçen süre (client_hold_ms). Saatler senkron olmadığından
+  ağ gecikmesi gidiş-dönüş süresinin yarısı olarak tahmin edilir:
+  glass_to_glass = (sent - capture) + (rtt - hold) / 2 + hold
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Dict, Any
+
+from posture_sketch import DDSketch
+
+
+# Aşama sırası: her aşamanın süresi bir öncekinden farkıdır
+STAGES = ("capture", "received", "aligned", "inferred", "encoded", "delivered", "enqueued", "sent")
+
+# Histogram kova üst sınırları (ms)
+HISTOGRAM_BOUNDS = (1, 2, 5, 10, 20, 35, 50, 75, 100, 150, 250, 500, 1000)
+
+
+class LatencyHistogram:
+    """Sabit kovalı gecikme histogramı + yüzdelikler için DDSketch"""
+
+    def __init__(self):
+        self.counts = [0] * (len(HISTOGRAM_BOUNDS) + 1)
+        self.sketch = DDSketch(relative_accuracy=0.01, min_value=0.01)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, value_ms: float):
+        if value_ms < 0:
+            value_ms = 0.0
+        index = len(HISTOGRAM_BOUNDS)
+        for i, bound in enumerate(HISTOGRAM_BOUNDS):
+            if value_ms <= bound:
+                index = i
+                break
+        self.counts[index] += 1
+        self.sketch.add(value_ms)
+        self.count += 1
+        self.total += value_ms
+        if value_ms > self.max:
+            self.max = value_ms
+
+    def to_dict(self) -> Dict[str, Any]:
+        def r(value):
+            return round(value, 1) if value is not None else None
+        return {
+            "count": self.count,
+            "mean": r(self.total / self.count) if self.count else None,
+            "p50": r(self.sketch.quantile(0.5)),
+            "p90": r(self.sketch.quantile(0.9)),
+            "p99": r(self.sketch.quantile(0.99)),
+            "max": r(self.max) if self.count else None,
+            "buckets": [
+                {"le": bound, "count": count}
+                for bound, count in zip(list(HISTOGRAM_BOUNDS) + ["inf"], self.counts)
+            ]
+        }
+
+
+class _ClientLatency:
+    """Tek bir WebSocket istemcisinin ack bekleyen kareleri ve gecikmeleri"""
+
+    def __init__(self, max_pending: int = 256):
+        self.max_pending = max_pending
+        self.pending: "OrderedDict[int, tuple]" = OrderedDict()  # kare no -> (capture, sent)
+        self.glass_to_glass = LatencyHistogram()
+        self.rtt = LatencyHistogram()
+        self.client_hold = LatencyHistogram()
+        self.acks = 0
+        self.unmatched_acks = 0
+        self.connected_at = time.time()
+
+
+class LatencyTracer:
+    """Aşama ve istemci bazında gecikme histogramları"""
+
+    def __init__(self):
+        self.stages: Dict[str, LatencyHistogram] = {}
+        self.server_total = LatencyHistogram()  # capture -> sent
+        self.clients: Dict[str, _ClientLatency] = {}
+        self._lock = threading.Lock()
+
+    def record_frame(self, trace: Dict[str, Optional[float]]):
+        """Bir karenin aşama damgalarından aşama sürelerini kaydet"""
+        with self._lock:
+            previous_name, previous = None, None
+            for stage in STAGES:
+                value = trace.get(stage)
+                if value is None:
+                    continue
+                if previous is not None:
+                    name = f"{previous_name}->{stage}"
+                    histogram = self.stages.get(name)
+                    if histogram is None:
+                        histogram = self.stages[name] = LatencyHistogram()
+                    histogram.add(value - previous)
+                previous_name, previous = stage, value
+
+            start = trace.get("capture") or trace.get("received")
+            if start is not None and trace.get("sent") is not None:
+                self.server_total.add(trace["sent"] - start)
+
+    def add_client(self, client_id: str):
+        with self._lock:
+            self.clients[client_id] = _ClientLatency()
+
+    def remove_client(self, client_id: str):
+        with self._lock:
+            self.clients.pop(client_id, None)
+
+    def record_send(self, client_id: str, frame_number: Optional[int], trace: Dict[str, Optional[float]]):
+        """Gönderilen kareyi ack eşleştirmesi için hatırla"""
+        if frame_number is None:
+            return
+        with self._lock:
+            client = self.clients.get(client_id)
+            if client is None:
+                return
+            start = trace.get("capture") or trace.get("received")
+            client.pending[frame_number] = (start, trace.get("sent"))
+            while len(client.pending) > client.max_pending:
+                client.pending.popitem(last=False)
+
+    def record_ack(self, client_id: str, frame_number: Optional[int], client_hold_ms: Optional[float],
+                   received_at: Optional[float] = None):
+        """İstemci ack'ini işle ve yakalamadan ekrana kadar geçen süreyi hesapla"""
+        received_at = received_at or time.time() * 1000
+        with self._lock:
+            client = self.clients.get(client_id)
+            if client is None:
+                return
+            sent = client.pending.pop(frame_number, None)
+            if sent is None:
+                client.unmatched_acks += 1
+                return
+            capture, sent_at = sent
+            if sent_at is None:
+                return
+
+            hold = max(float(client_hold_ms or 0.0), 0.0)
+            rtt = received_at - sent_at
+            client.acks += 1
+            client.rtt.add(rtt)
+            client.client_hold.add(hold)
+            if capture is not None:
+                one_way = max(rtt - hold, 0.0) / 2
+                client.glass_to_glass.add((sent_at - capture) + one_way + hold)
+
+    def reset(self):
+        with self._lock:
+            self.stages = {}
+            self.server_total = LatencyHistogram()
+            for client_id in list(self.clients):
+                self.clients[client_id] = _ClientLatency()
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "stages": {name: histogram.to_dict() for name, histogram in self.stages.items()},
+                "server_total": self.server_total.to_dict(),
+                "clients": {
+                    client_id: {
+                        "connected_at": client.connected_at,
+                        "acks": client.acks,
+                        "unmatched_acks": client.unmatched_acks,
+                        "glass_to_glass": client.glass_to_glass.to_dict(),
+                        "rtt": client.rtt.to_dict(),
+                        "client_hold": client.client_hold.to_dict()
+                    }
+                    for client_id, client in self.clients.items()
+                }
+            }
@@ -3,15 +3,30 @@ Postür Analiz Antrenörü - Backend API
 FastAPI + WebSocket
 """
 
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect, HTTPException
+from fastapi import FastAPI, WebSocket, WebSocketDisconnect, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse, Response
 from pydantic import BaseModel
-from typing import Optional
+from typing import Optional, Callable, Any, List
 import asyncio
+import datetime
 import json
+import os
+import threading
+import time
 
 from posture_analyzer import PostureAnalyzer
+from analyzer_process import AnalyzerProcessClient
 from session_manager import SessionManager
+from session_recorder import load_recording_index, is_valid_session_id
+from camera_profiles import DEFAULT_PROFILE, get_profile, describe_profiles
+from latency_tracer import LatencyTracer
+from frontend_files import FrontendFiles
+from camera_job import CameraStartJob, CameraJobRegistry, JOB_READY, JOB_FAILED, JOB_CANCELLED
+from sampling_profiler import SamplingProfiler
+from history_export import (
+    EXPORT_FORMATS, EXPORT_KINDS, filter_sessions, iter_ndjson, iter_csv, gzip_stream
+)
 
 # FastAPI app
 app = FastAPI(
@@ -30,19 +45,65 @@ app.add_middleware(
 )
 
 # Global instances
-posture_analyzer: Optional[PostureAnalyzer] = None
-session_manager = SessionManager()
+posture_analyzer: Optional[PostureAnalyzer] = None  # veya AnalyzerProcessClient
+RECORDINGS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "recordings")
+HISTORY_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "history")
+
+# Eski oturumlar arka planda sıkıştırılır, sınırı aşanlar HISTORY_DIR arşivine taşınır
+session_manager = SessionManager(history_dir=HISTORY_DIR)
+
+# Koşullu GET / long-poll durumu
+_BOOT_ID = format(int(time.time()), "x")   # Yeniden başlatmalar arası ETag çakışmasını önler
+_json_cache: dict = {}                      # anahtar -> (sürüm, serileştirilmiş gövde)
+_change_event: Optional[asyncio.Event] = None
+_event_loop: Optional[asyncio.AbstractEventLoop] = None
+MAX_LONG_POLL_SECONDS = 30.0
+
+# Yakalamadan tarayıcıda çizilene kadar gecikme (bkz. latency_tracer.py)
+latency_tracer = LatencyTracer()
+_ws_client_counter = 0
+
+# Kullanıcı duraklatmasında WebSocket'e durum mesajı gönderilmeye devam edilsin mi
+_pause_streaming = True
+
+# Kamera önünde kimse yokken oturum otomatik duraklatılsın mı (oturum başına seçilir)
+_auto_pause_absent = False
+
+# İstek üzerine çalışan örneklemeli profil (kapalıyken maliyeti yok)
+api_profiler = SamplingProfiler()
+
+# Kamera başlatma/durdurma işleri bu kilitle sıraya girer; bloklayan kısımlar executor'da
+_camera_lock = asyncio.Lock()
+camera_jobs = CameraJobRegistry()
+_camera_tasks: set = set()  # Çalışan işlerin görevleri (çöp toplayıcı erken silmesin)
+
+# POSTUR_ANALYZER_PROCESS=1 ise kamera/analiz ayrı bir süreçte çalışır
+USE_ANALYZER_PROCESS = os.environ.get("POSTUR_ANALYZER_PROCESS", "0") == "1"
+
+# POSTUR_SERVE_FRONTEND=1 ise frontend build'i (npm run build) de bu süreçten sunulur
+SERVE_FRONTEND = os.environ.get("POSTUR_SERVE_FRONTEND", "0") == "1"
+FRONTEND_DIST = os.environ.get(
+    "POSTUR_FRONTEND_DIST",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "frontend", "dist"))
+frontend_files: Optional[FrontendFiles] = FrontendFiles(FRONTEND_DIST) if SERVE_FRONTEND else None
 
 
 # Pydantic models
 class SessionStartRequest(BaseModel):
     duration_minutes: int = 25
     warning_threshold: float = 7.0
+    record_video: bool = False
+    record_raw: bool = False
+    camera_profile: str = DEFAULT_PROFILE
+    depth_filters: Optional[List[str]] = None  # Verilirse profilin filtrelerinin yerine geçer
+    auto_pause_absent: bool = False  # Kimse yokken süre ve istatistikler durur
 
 
 class SessionStartResponse(BaseModel):
     success: bool
     session_id: Optional[str] = None
+    job_id: Optional[str] = None  # Kamera başlatma işi (bkz. /api/camera/jobs/{job_id})
+    state: Optional[str] = None
     message: str
 
 
@@ -50,9 +111,144 @@ class ThresholdRequest(BaseModel):
     threshold: float = 40.0
 
 
+class LatencyBudgetRequest(BaseModel):
+    budget_ms: float = 25.0
+
+
+class MetricThresholdRequest(BaseModel):
+    name: str
+    warn_below: Optional[float] = None
+    warn_above: Optional[float] = None
+
+
+class PauseRequest(BaseModel):
+    stream: bool = True  # False ise duraklama boyunca WebSocket'e tek bir "paused" mesajı gider
+
+
+class ProfileRequest(BaseModel):
+    seconds: float = 5.0
+    interval_ms: float = 5.0
+    threads: Optional[List[str]] = None  # Thread adı parçaları (ör. "MainThread")
+
+
+def _create_analyzer():
+    """Yapılandırmaya göre süreç içi veya ayrı süreçli analizör oluştur"""
+    if USE_ANALYZER_PROCESS:
+        return AnalyzerProcessClient()
+    return PostureAnalyzer()
+
+
+async def _analyzer_call(method: Callable[..., Any], *args) -> Any:
+    """
+    Analizör kontrol çağrısını executor'da çalıştır
+    Ayrı süreç modunda her çağrı IPC kilidini alıp cevap bekler (başlatma sürerken
+    saniyeler); olay döngüsünde çağrılırsa tüm API ve WebSocket'ler donar
+    """
+    return await asyncio.get_running_loop().run_in_executor(None, method, *args)
+
+
+_preview_lock = threading.Lock()
+
+
+def _change_preview_subscribers(analyzer, delta: int):
+    """Derinlik önizleme abone sayısını değiştir (bloklar; executor'da çalıştırılır)"""
+    with _preview_lock:
+        analyzer.depth_preview_subscribers += delta
+
+
+def _stop_recordings():
+    """Açık video ve ham kayıtları kapat"""
+    if posture_analyzer is not None:
+        posture_analyzer.stop_video_recording()
+        posture_analyzer.stop_raw_recording()
+
+
+def _sync_camera_pause():
+    """Kamera takıldıysa oturumu duraklat, kare akışı geri gelince devam ettir"""
+    if posture_analyzer is None:
+        return
+    session_manager.sync_camera_pause(posture_analyzer.is_stalled)
+
+
+def _sync_presence_pause(presence: Optional[str]):
+    """Kimse yokken oturumu duraklat (seçildiyse), kişi dönünce devam ettir"""
+    if presence == "absent":
+        if _auto_pause_absent and session_manager.is_session_active() \
+                and not session_manager.is_session_paused():
+            session_manager.pause_session("absent")
+    elif presence == "present" and session_manager.get_pause_reason() == "absent":
+        session_manager.resume_session()
+
+
+def _wake_waiters():
+    """Long-poll bekleyenlerini uyandır (event loop içinde çalışır)"""
+    global _change_event
+    event = _change_event
+    _change_event = asyncio.Event()
+    if event is not None:
+        event.set()
+
+
+def _on_session_change():
+    """SessionManager dinleyicisi; başka thread'den de çağrılabilir"""
+    if _event_loop is not None:
+        _event_loop.call_soon_threadsafe(_wake_waiters)
+
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    return etag in [tag.strip() for tag in header.split(",")] or header.strip() == "*"
+
+
+async def _versioned_json(request: Request, key: str, get_version: Callable[[], int],
+                          build: Callable[[], Any], wait: float = 0.0) -> Response:
+    """
+    Sürümlü JSON cevabı
+    - Değişmeyen veri için 304 döner
+    - Her sürüm bir kez serileştirilir, tüm istemciler aynı gövdeyi paylaşır
+    - wait > 0 ise istemcinin sürümü güncelken değişiklik veya zaman aşımına kadar bekler
+    """
+    version = get_version()
+    etag = f'W/"{key}-{_BOOT_ID}-{version}"'
+    
+    if wait > 0 and _etag_matches(request, etag):
+        deadline = time.monotonic() + min(wait, MAX_LONG_POLL_SECONDS)
+        while get_version() == version:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or _change_event is None:
+                break
+            try:
+                await asyncio.wait_for(_change_event.wait(), remaining)
+            except asyncio.TimeoutError:
+                break
+        version = get_version()
+        etag = f'W/"{key}-{_BOOT_ID}-{version}"'
+    
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if _etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+    
+    cached = _json_cache.get(key)
+    if cached is None or cached[0] != version:
+        body = json.dumps(build(), ensure_ascii=False).encode("utf-8")
+        cached = (version, body)
+        _json_cache[key] = cached
+    return Response(content=cached[1], media_type="application/json", headers=headers)
+
+
 # REST Endpoints
 @app.get("/")
-async def root():
+async def root(request: Request):
+    """API durumu (frontend sunuluyorsa uygulama sayfası)"""
+    if frontend_files is not None:
+        return frontend_files.response(request, frontend_files.index)
+    return await api_status()
+
+
+@app.get("/api/status")
+async def api_status():
     """API durumu"""
     return {
         "status": "ok",
@@ -61,82 +257,309 @@ async def root():
     }
 
 
-@app.post("/api/session/start", response_model=SessionStartResponse)
-async def start_session(request: SessionStartRequest):
-    """Yeni oturum başlat"""
+def _stop_camera_sync():
+    """Kayıtları kapat ve kamerayı durdur (bloklar; executor'da çalıştırılır)"""
+    _stop_recordings()
+    if posture_analyzer and posture_analyzer.is_running:
+        posture_analyzer.stop()
+
+
+def _prepare_camera(profile) -> bool:
+    """
+    Analizörü oluştur (MediaPipe grafiği burada yüklenir), profili uygula ve kamerayı aç
+    Bloklar; executor'da çalıştırılır
+    """
     global posture_analyzer
     
-    # Aktif oturum varsa önce onu sonlandır
-    if session_manager.is_session_active():
-        session_manager.stop_session()
-        if posture_analyzer and posture_analyzer.is_running:
+    if posture_analyzer is None:
+        posture_analyzer = _create_analyzer()
+    
+    # Profil değiştiyse kamera yeni akış ayarıyla yeniden açılır
+    if posture_analyzer.profile != profile:
+        if posture_analyzer.is_running:
             posture_analyzer.stop()
+        posture_analyzer.set_camera_profile(profile.name, list(profile.filters))
     
-    # Kamerayı başlat
-    try:
-        if posture_analyzer is None:
-            posture_analyzer = PostureAnalyzer()
+    if not posture_analyzer.is_running:
+        return posture_analyzer.start()
+    return True
+
+
+async def _stop_camera_after_session():
+    """Süresi dolan oturumdan sonra kamerayı kapat (bu arada yeni oturum açılmadıysa)"""
+    async with _camera_lock:
+        if not session_manager.is_session_active():
+            await asyncio.get_running_loop().run_in_executor(None, _stop_camera_sync)
+
+
+async def _run_camera_job(job: CameraStartJob, request: SessionStartRequest, profile):
+    """Kamerayı arka planda aç; hazır olunca oturumu başlat"""
+    global _auto_pause_absent
+    
+    loop = asyncio.get_running_loop()
+    async with _camera_lock:
+        if job.cancel_requested:
+            job.finish(JOB_CANCELLED, "Kamera başlatma iptal edildi")
+            return
         
-        if not posture_analyzer.is_running:
-            success = posture_analyzer.start()
-            if not success:
-                return SessionStartResponse(
-                    success=False,
-                    message="RealSense kamera başlatılamadı. Kameranın bağlı olduğundan emin olun."
-                )
-    except Exception as e:
-        return SessionStartResponse(
-            success=False,
-            message=f"Kamera hatası: {str(e)}"
+        # Aktif oturum varsa önce onu sonlandır
+        if session_manager.is_session_active():
+            session_manager.stop_session()
+            await loop.run_in_executor(None, _stop_camera_sync)
+        
+        try:
+            success = await loop.run_in_executor(None, _prepare_camera, profile)
+        except Exception as e:
+            job.finish(JOB_FAILED, f"Kamera hatası: {str(e)}")
+            print(f"❌ {job.message}")
+            return
+        if not success:
+            job.finish(JOB_FAILED,
+                       "RealSense kamera başlatılamadı. Kameranın bağlı olduğundan emin olun.")
+            return
+        
+        # Açılış sürerken durdurma istendiyse kamerayı kapat
+        if job.cancel_requested:
+            await loop.run_in_executor(None, _stop_camera_sync)
+            job.finish(JOB_CANCELLED, "Kamera başlatma iptal edildi")
+            return
+        
+        # Oturumu başlat
+        _auto_pause_absent = request.auto_pause_absent
+        session = session_manager.start_session(
+            duration_minutes=request.duration_minutes,
+            warning_threshold=request.warning_threshold
         )
+        
+        # Opsiyonel video kaydı
+        if request.record_video:
+            await _analyzer_call(posture_analyzer.start_video_recording, RECORDINGS_DIR, session.id)
+        
+        # Opsiyonel ham renk+derinlik kaydı (analizörü sonradan ayarlamak için)
+        if request.record_raw:
+            raw_path = os.path.join(RECORDINGS_DIR, session.id, "raw.pkraw")
+            await _analyzer_call(posture_analyzer.start_raw_recording, raw_path)
+        
+        job.finish(JOB_READY, f"{request.duration_minutes} dakikalık oturum başlatıldı!",
+                   session_id=session.id)
+        print(f"✅ Kamera hazır ({job.id}, {job.to_dict()['elapsed']}s)")
+
+
+@app.post("/api/session/start", response_model=SessionStartResponse)
+async def start_session(request: SessionStartRequest):
+    """
+    Yeni oturum başlat
+    Kamera ve model açılışı arka planda çalışır; cevap hemen iş kimliğiyle döner.
+    Hazır olunca WebSocket'e {"type": "camera", "state": "ready", "session_id": ...} gider.
+    """
+    try:
+        profile = get_profile(request.camera_profile, request.depth_filters)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     
-    # Oturumu başlat
-    session = session_manager.start_session(
-        duration_minutes=request.duration_minutes,
-        warning_threshold=request.warning_threshold
-    )
+    # Önceki başlatma hâlâ sürüyorsa iptal edilir; yeni iş kilidi sırayla alır
+    previous = camera_jobs.latest
+    if previous is not None and not previous.done:
+        previous.cancel_requested = True
+    
+    job = CameraStartJob.create(profile.name)
+    camera_jobs.add(job)
+    task = asyncio.create_task(_run_camera_job(job, request, profile))
+    _camera_tasks.add(task)
+    task.add_done_callback(_camera_tasks.discard)
     
     return SessionStartResponse(
         success=True,
-        session_id=session.id,
-        message=f"{request.duration_minutes} dakikalık oturum başlatıldı!"
+        job_id=job.id,
+        state=job.state,
+        message=job.message
     )
 
 
 @app.post("/api/session/stop")
 async def stop_session():
-    """Oturumu sonlandır"""
-    global posture_analyzer
+    """Oturumu sonlandır (kamera başlatılıyorsa başlatmayı iptal et)"""
+    job = camera_jobs.latest
+    cancelled = job is not None and not job.done
+    if cancelled:
+        job.cancel_requested = True
+    
+    async with _camera_lock:
+        if not session_manager.is_session_active():
+            if cancelled:
+                return {"success": True, "message": "Kamera başlatma iptal edildi", "result": None}
+            return {"success": False, "message": "Aktif oturum bulunamadı", "result": None}
+        
+        result = session_manager.stop_session()
+        
+        # Kamerayı durdur
+        await asyncio.get_running_loop().run_in_executor(None, _stop_camera_sync)
+    
+    return {
+        "success": True,
+        "message": "Oturum sonlandırıldı",
+        "result": result
+    }
+
+
+@app.post("/api/session/pause")
+async def pause_session(request: PauseRequest = PauseRequest()):
+    """
+    Oturumu duraklat: süre ve postür sayacı durur, analizör boşta bekler
+    (kare alınmaz, çıkarım ve kodlama yapılmaz; kamera pipeline'ı açık kalır)
+    """
+    global _pause_streaming
     
     if not session_manager.is_session_active():
-        return {"success": False, "message": "Aktif oturum bulunamadı", "result": None}
+        return {"success": False, "message": "Aktif oturum bulunamadı"}
     
-    result = session_manager.stop_session()
+    # Sistem duraklatması (kamera takılması, kimse yok) kendiliğinden biter; nedeni
+    # "user" ile değiştirilirse otomatik devam tetiklenmez
+    reason = session_manager.get_pause_reason()
+    if reason is not None and reason != "user":
+        return {"success": False, "message": f"Oturum otomatik duraklatıldı ({reason}), kendiliğinden devam edecek"}
     
-    # Kamerayı durdur
-    if posture_analyzer and posture_analyzer.is_running:
-        posture_analyzer.stop()
+    # Önce analizör boşa alınır: oturum duraklatıldıktan sonra yeni kare analiz edilmesin
+    if posture_analyzer is not None and posture_analyzer.is_running:
+        await _analyzer_call(posture_analyzer.set_idle, True)
+    session_manager.pause_session("user")
+    _pause_streaming = request.stream
     
     return {
         "success": True,
-        "message": "Oturum sonlandırıldı",
-        "result": result
+        "message": "Oturum duraklatıldı",
+        "stats": session_manager.get_current_stats()
+    }
+
+
+@app.post("/api/session/resume")
+async def resume_session():
+    """Duraklatılmış oturumu devam ettir (pipeline yeniden başlatılmaz)"""
+    global _pause_streaming
+    
+    if not session_manager.is_session_paused():
+        return {"success": False, "message": "Duraklatılmış oturum bulunamadı"}
+    
+    if posture_analyzer is not None:
+        await _analyzer_call(posture_analyzer.set_idle, False)
+    session_manager.resume_session()
+    _pause_streaming = True
+    
+    return {
+        "success": True,
+        "message": "Oturum devam ediyor",
+        "stats": session_manager.get_current_stats()
     }
 
 
 @app.get("/api/session/stats")
-async def get_stats():
-    """Anlık istatistikleri al"""
-    stats = session_manager.get_current_stats()
-    if stats is None:
-        return {"active": False, "message": "Aktif oturum yok"}
-    return {"active": True, "stats": stats}
+async def get_stats(request: Request, wait: float = 0.0):
+    """
+    Anlık istatistikleri al
+    ETag/If-None-Match destekler; wait > 0 ise değişiklik olana kadar bekler (long-poll)
+    """
+    def build():
+        stats = session_manager.get_current_stats()
+        if stats is None:
+            return {"active": False, "message": "Aktif oturum yok"}
+        return {"active": True, "stats": stats}
+    
+    return await _versioned_json(
+        request, "stats", lambda: session_manager.state_version, build, wait)
 
 
 @app.get("/api/session/history")
-async def get_history():
-    """Oturum geçmişini al"""
-    return {"history": session_manager.get_history()}
+async def get_history(request: Request, wait: float = 0.0):
+    """
+    Oturum geçmişini al
+    ETag/If-None-Match destekler; wait > 0 ise yeni oturum eklenene kadar bekler (long-poll)
+    """
+    return await _versioned_json(
+        request, "history", lambda: session_manager.history_version,
+        lambda: {"history": session_manager.get_history()}, wait)
+
+
+@app.get("/api/session/timeline")
+async def get_session_timeline(session_id: Optional[str] = None, points: int = 120):
+    """
+    Oturumun kesintisiz durum bölütleri ve `points` noktalık grafik görünümü
+    session_id verilmezse canlı oturum döner
+    """
+    if not 1 <= points <= 2000:
+        raise HTTPException(status_code=400, detail="points 1-2000 arasında olmalı")
+    
+    timeline = session_manager.get_timeline(session_id, points)
+    if timeline is None:
+        raise HTTPException(status_code=404, detail="Oturum bulunamadı")
+    return {"success": True, **timeline}
+
+
+@app.get("/api/session/export")
+async def export_history(format: str = "ndjson", kind: str = "sessions",
+                         start: Optional[str] = None, end: Optional[str] = None,
+                         min_score: Optional[float] = None, gzip: bool = False):
+    """Oturum geçmişini NDJSON/CSV olarak akış halinde dışa aktar"""
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Geçersiz format: {format}")
+    if kind not in EXPORT_KINDS:
+        raise HTTPException(status_code=400, detail=f"Geçersiz tür: {kind}")
+    
+    sessions = filter_sessions(
+        session_manager.iter_history(),
+        start=_parse_date(start, "start"),
+        end=_parse_date(end, "end"),
+        min_score=min_score
+    )
+    
+    if format == "ndjson":
+        chunks = iter_ndjson(sessions, kind)
+        media_type = "application/x-ndjson"
+    else:
+        chunks = iter_csv(sessions, kind)
+        media_type = "text/csv; charset=utf-8"
+    
+    filename = f"postur_{kind}.{format}"
+    if gzip:
+        chunks = gzip_stream(chunks)
+        filename += ".gz"
+        media_type = "application/gzip"
+    
+    return StreamingResponse(
+        chunks,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+
+def _parse_date(value: Optional[str], name: str) -> Optional[datetime.date]:
+    """YYYY-MM-DD formatındaki sorgu parametresini tarihe çevir"""
+    if value is None:
+        return None
+    try:
+        return datetime.date.fromisoformat(value)
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Geçersiz tarih ({name}): {value}")
+
+
+@app.get("/api/stats/rollups")
+async def get_rollups(period: str = "day", start: Optional[str] = None, end: Optional[str] = None):
+    """Gün/hafta/ay bazında önceden toplanmış postür özetleri"""
+    try:
+        rows = session_manager.rollups.query(
+            period,
+            start=_parse_date(start, "start"),
+            end=_parse_date(end, "end")
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"period": period, "rollups": rows}
+
+
+@app.post("/api/stats/rollups/rebuild")
+async def rebuild_rollups():
+    """Özetleri ham oturum geçmişinden yeniden oluştur (arşiv diskten okunur; executor'da)"""
+    await asyncio.get_running_loop().run_in_executor(None, session_manager.rebuild_rollups)
+    return {"success": True, "message": "Özetler yeniden oluşturuldu"}
 
 
 @app.post("/api/settings/threshold")
@@ -145,40 +568,217 @@ async def set_threshold(request: ThresholdRequest):
     global posture_analyzer
     
     if posture_analyzer:
-        posture_analyzer.set_threshold(request.threshold)
+        await _analyzer_call(posture_analyzer.set_threshold, request.threshold)
         return {"success": True, "threshold": request.threshold}
     return {"success": False, "message": "Kamera henüz başlatılmadı"}
 
 
+@app.get("/api/settings/pose")
+async def get_pose_config():
+    """Otomatik seçilen poz modeli ayarını ve ölçülen gecikmeleri döndür"""
+    if posture_analyzer is None:
+        return {"success": False, "message": "Kamera henüz başlatılmadı"}
+    return {"success": True, "pose": await _analyzer_call(posture_analyzer.get_pose_config)}
+
+
+@app.get("/api/settings/metrics")
+async def get_metric_config():
+    """Ek postür metriklerinin tanımlarını ve eşiklerini döndür"""
+    if posture_analyzer is None:
+        return {"success": False, "message": "Kamera henüz başlatılmadı"}
+    return {"success": True, "metrics": await _analyzer_call(posture_analyzer.get_metric_config)}
+
+
+@app.post("/api/settings/metrics/thresholds")
+async def set_metric_thresholds(request: MetricThresholdRequest):
+    """Bir metriğin alt/üst uyarı eşiklerini ayarla"""
+    if posture_analyzer is None:
+        return {"success": False, "message": "Kamera henüz başlatılmadı"}
+    try:
+        await _analyzer_call(posture_analyzer.set_metric_thresholds,
+                             request.name, request.warn_below, request.warn_above)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"success": True, "message": f"{request.name} eşikleri güncellendi"}
+
+
+@app.post("/api/settings/latency-budget")
+async def set_latency_budget(request: LatencyBudgetRequest):
+    """Kare başına çıkarım gecikme bütçesini ayarla"""
+    if posture_analyzer:
+        await _analyzer_call(posture_analyzer.set_latency_budget, request.budget_ms)
+        return {"success": True, "budget_ms": request.budget_ms}
+    return {"success": False, "message": "Kamera henüz başlatılmadı"}
+
+
 @app.get("/api/camera/status")
 async def camera_status():
     """Kamera durumunu kontrol et"""
     global posture_analyzer
     
+    job = camera_jobs.latest
+    job_info = job.to_dict() if job is not None else None
+    
     if posture_analyzer is None:
-        return {"connected": False, "running": False, "message": "Kamera başlatılmadı"}
+        return {"connected": False, "running": False, "message": "Kamera başlatılmadı",
+                "job": job_info}
     
-    return {
+    status = {
         "connected": True,
         "running": posture_analyzer.is_running,
-        "message": "Kamera hazır" if posture_analyzer.is_running else "Kamera bağlı ama çalışmıyor"
+        "profile": posture_analyzer.profile.name,
+        "message": "Kamera hazır" if posture_analyzer.is_running else "Kamera bağlı ama çalışmıyor",
+        "job": job_info
+    }
+    if isinstance(posture_analyzer, AnalyzerProcessClient):
+        status["process"] = posture_analyzer.get_process_status()
+    return status
+
+
+@app.get("/api/camera/jobs/{job_id}")
+async def get_camera_job(job_id: str):
+    """Kamera başlatma işinin durumu: starting, ready, failed veya cancelled"""
+    job = camera_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="İş bulunamadı")
+    return {"success": True, "job": job.to_dict()}
+
+
+@app.get("/api/camera/health")
+async def camera_health():
+    """Kare akışı bekçisi: takılma sayıları, kurtarma adımları ve süreleri"""
+    if posture_analyzer is None:
+        return {"success": False, "message": "Kamera henüz başlatılmadı"}
+    return {
+        "success": True,
+        "health": await _analyzer_call(posture_analyzer.get_camera_health),
+        "session_paused": session_manager.is_session_paused(),
+        "pause_reason": session_manager.get_pause_reason()
     }
 
 
+@app.get("/api/debug/latency")
+async def get_latency_debug(reset: bool = False):
+    """
+    Aşama bazında ve istemci bazında gecikme histogramları
+    glass_to_glass: sensör yakalamasından tarayıcıda çizilene kadar (ack ile ölçülür)
+    """
+    data = latency_tracer.to_dict()
+    if reset:
+        latency_tracer.reset()
+    return {"success": True, **data}
+
+
+@app.post("/api/debug/profile")
+async def run_profile(request: ProfileRequest):
+    """
+    Örneklemeli profili `seconds` süre çalıştır ve sonucu döndür
+    API süreci (WebSocket döngüsü, in-process analizde get_frame) her zaman,
+    ayrı analiz süreci kullanılıyorsa o süreç de aynı anda profillenir.
+    collapsed alanı flamegraph.pl / speedscope ile görselleştirilebilir.
+    """
+    try:
+        started = api_profiler.start(request.seconds, request.interval_ms, request.threads)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if not started:
+        raise HTTPException(status_code=409, detail="Zaten çalışan bir profil var")
+    
+    analyzer = posture_analyzer
+    profile_process = isinstance(analyzer, AnalyzerProcessClient)
+    if profile_process:
+        profile_process = await _analyzer_call(analyzer.start_profile, request.seconds,
+                                               request.interval_ms, request.threads)
+    
+    # Profil kendi thread'inde örnekler; burada beklerken olay döngüsü serbest kalır
+    await asyncio.sleep(request.seconds)
+    profiles = {"api": await asyncio.get_running_loop().run_in_executor(
+        None, api_profiler.wait, 5.0)}
+    
+    if profile_process:
+        deadline = time.time() + 5.0
+        result = await _analyzer_call(analyzer.get_profile_result)
+        while result is None and time.time() < deadline:
+            await asyncio.sleep(0.1)
+            result = await _analyzer_call(analyzer.get_profile_result)
+        profiles["analyzer_process"] = result
+    
+    return {"success": True, "profiles": profiles}
+
+
+@app.get("/api/camera/profiles")
+async def get_camera_profiles():
+    """Kamera profillerini ve profil başına ölçülen CPU/gecikme maliyetini döndür"""
+    if posture_analyzer is None:
+        return {"success": True, **describe_profiles({})}
+    return {"success": True, **(await _analyzer_call(posture_analyzer.get_camera_profiles))}
+
+
+@app.get("/api/recordings/{session_id}")
+async def get_recording(session_id: str):
+    """Oturumun video parça indeksini döndür"""
+    if not is_valid_session_id(session_id):
+        raise HTTPException(status_code=404, detail="Kayıt bulunamadı")
+    
+    if posture_analyzer is not None:
+        video = (await _analyzer_call(posture_analyzer.get_recording_status)).get("video")
+        if video and video["session_id"] == session_id and video["recording"]:
+            return {"success": True, "recording": video}
+    
+    index = load_recording_index(RECORDINGS_DIR, session_id)
+    if index is None:
+        raise HTTPException(status_code=404, detail="Kayıt bulunamadı")
+    return {"success": True, "recording": index}
+
+
 # WebSocket endpoint
+async def _receive_acks(websocket: WebSocket, client_id: str):
+    """İstemciden gelen çizim onaylarını (ack) gecikme izleyicisine aktar"""
+    try:
+        while True:
+            data = await websocket.receive_json()
+            if isinstance(data, dict) and data.get("type") == "ack":
+                latency_tracer.record_ack(client_id, data.get("frame_number"),
+                                          data.get("client_hold_ms"))
+    except (WebSocketDisconnect, RuntimeError, ValueError):
+        pass
+
+
 @app.websocket("/ws/posture")
 async def websocket_posture(websocket: WebSocket):
-    """Gerçek zamanlı postür verisi stream'i"""
-    global posture_analyzer
+    """
+    Gerçek zamanlı postür verisi stream'i
+    ?debug=1 ile frame mesajları aşama zaman damgalarını (trace) da taşır
+    """
+    global posture_analyzer, _ws_client_counter
     
     await websocket.accept()
     print("📡 WebSocket bağlantısı kuruldu")
     
+    _ws_client_counter += 1
+    client_id = f"ws-{_ws_client_counter}"
+    debug = websocket.query_params.get("debug") == "1"
+    latency_tracer.add_client(client_id)
+    ack_task = asyncio.create_task(_receive_acks(websocket, client_id))
+    pause_notified = False
+    last_pause_message = 0.0
+    announced_job = None
+    
     try:
         while True:
+            # Kamera başlatma işinin durum değişikliklerini duyur
+            job = camera_jobs.latest
+            if job is not None and (job.id, job.state) != announced_job:
+                announced_job = (job.id, job.state)
+                try:
+                    await websocket.send_json({"type": "camera", **job.to_dict()})
+                except:
+                    break
+            
             # Aktif oturum yoksa bekle
             if not session_manager.is_session_active():
-                await asyncio.sleep(0.5)
+                # Kamera açılırken hazır duyurusu gecikmesin diye daha sık bakılır
+                await asyncio.sleep(0.1 if job is not None and not job.done else 0.5)
                 try:
                     await websocket.send_json({
                         "type": "waiting",
@@ -188,6 +788,11 @@ async def websocket_posture(websocket: WebSocket):
                     break
                 continue
             
+            # Kamera açılıp kapanırken analizöre dokunma
+            if _camera_lock.locked():
+                await asyncio.sleep(0.1)
+                continue
+            
             # Kamera çalışmıyorsa hata gönder
             if posture_analyzer is None or not posture_analyzer.is_running:
                 try:
@@ -202,12 +807,42 @@ async def websocket_posture(websocket: WebSocket):
             
             # Frame al
             frame_data = posture_analyzer.get_frame()
+            enqueued_at = time.time() * 1000
+            
+            # Kamera takılmasında oturum duraklatılır (kayıp süre istatistiklere sayılmaz)
+            _sync_camera_pause()
+            if frame_data:
+                _sync_presence_pause(frame_data.get("presence"))
+            if session_manager.is_session_paused():
+                reason = session_manager.get_pause_reason()
+                now = time.monotonic()
+                # Akış kapalı kullanıcı duraklamasında sadece ilk mesaj gönderilir
+                if (not pause_notified or _pause_streaming or reason != "user") \
+                        and now - last_pause_message >= 0.2:
+                    stats = session_manager.get_current_stats() or {}
+                    try:
+                        await websocket.send_json({
+                            "type": "paused",
+                            "reason": stats.get("pause_reason"),
+                            "elapsed_time": stats.get("elapsed_time", 0),
+                            "remaining_time": stats.get("remaining_time", 0)
+                        })
+                    except:
+                        break
+                    pause_notified = True
+                    last_pause_message = now
+                # Kişi yokken yoklama kareleri tam hızda işlenir, kişi gelince hemen devam edilir
+                await asyncio.sleep(1/30 if reason == "absent" else 0.2)
+                continue
+            pause_notified = False
             
             if frame_data:
                 # Oturum istatistiklerini güncelle
                 session_update = session_manager.update_posture(
                     status=frame_data.get("status"),
-                    frame_time=1/30  # ~30 FPS
+                    frame_time=1/30,  # ~30 FPS
+                    depth_diff=frame_data.get("depth_diff"),
+                    metrics=frame_data.get("metrics")
                 )
                 
                 # Oturum tamamlandıysa sonucu gönder
@@ -220,9 +855,8 @@ async def websocket_posture(websocket: WebSocket):
                     except:
                         pass
                     
-                    # Kamerayı durdur
-                    if posture_analyzer and posture_analyzer.is_running:
-                        posture_analyzer.stop()
+                    # Kayıtları ve kamerayı durdur
+                    await _stop_camera_after_session()
                     continue
                 
                 # Normal frame verisi gönder
@@ -233,18 +867,31 @@ async def websocket_posture(websocket: WebSocket):
                     "left_shoulder_depth": frame_data.get("left_shoulder_depth"),
                     "right_shoulder_depth": frame_data.get("right_shoulder_depth"),
                     "chest_depth": frame_data.get("chest_depth"),
+                    "metrics": frame_data.get("metrics"),
+                    "presence": frame_data.get("presence"),
                     "frame_base64": frame_data.get("frame_base64"),
                     "warning_active": session_update.get("warning_active", False),
                     "bad_posture_seconds": session_update.get("bad_posture_seconds", 0),
                     "elapsed_time": session_update.get("elapsed_time", 0),
                     "remaining_time": session_update.get("remaining_time", 0),
-                    "stats": session_update.get("stats", {})
+                    "stats": session_update.get("stats", {}),
+                    "frame_number": frame_data.get("frame_number")
                 }
                 
+                # Analizörün sonucu bir sonraki kareye kadar geçerli; izi kopyala
+                trace = dict(frame_data.get("trace") or {})
+                trace["enqueued"] = enqueued_at
+                if debug:
+                    message["trace"] = trace
+                
                 try:
                     await websocket.send_json(message)
                 except:
                     break
+                
+                trace["sent"] = time.time() * 1000
+                latency_tracer.record_frame(trace)
+                latency_tracer.record_send(client_id, message["frame_number"], trace)
             
             # ~30 FPS için bekle
             await asyncio.sleep(1/30)
@@ -253,14 +900,68 @@ async def websocket_posture(websocket: WebSocket):
         print("📡 WebSocket bağlantısı kesildi")
     except Exception as e:
         print(f"❌ WebSocket hatası: {e}")
+    finally:
+        # Cleanup - websocket.close() çağırmıyoruz çünkü zaten kapanmış olabilir
+        ack_task.cancel()
+        latency_tracer.remove_client(client_id)
+
+
+@app.websocket("/ws/depth")
+async def websocket_depth(websocket: WebSocket):
+    """
+    Opsiyonel derinlik önizleme stream'i (ikili paket, bkz. depth_preview.py)
+    Bağlı istemci yokken analizör derinlik önizlemesi üretmez
+    """
+    await websocket.accept()
+    print("📡 Derinlik önizleme bağlantısı kuruldu")
+    
+    subscribed = None  # Abone olunan analizör örneği
+    last_seq = -1
     
-    # Cleanup - websocket.close() çağırmıyoruz çünkü zaten kapanmış olabilir
+    try:
+        while True:
+            analyzer = posture_analyzer
+            
+            # Analizör değiştiyse aboneliği yeni örneğe taşı
+            if analyzer is not subscribed:
+                if subscribed is not None:
+                    await _analyzer_call(_change_preview_subscribers, subscribed, -1)
+                if analyzer is not None:
+                    await _analyzer_call(_change_preview_subscribers, analyzer, 1)
+                subscribed = analyzer
+                last_seq = -1
+            
+            if analyzer is not None and analyzer.depth_preview_seq != last_seq \
+                    and analyzer.depth_preview is not None:
+                last_seq = analyzer.depth_preview_seq
+                await websocket.send_bytes(analyzer.depth_preview)
+            
+            await asyncio.sleep(analyzer.depth_preview_interval if analyzer else 0.5)
+            
+    except WebSocketDisconnect:
+        print("📡 Derinlik önizleme bağlantısı kesildi")
+    except Exception as e:
+        print(f"❌ Derinlik önizleme hatası: {e}")
+    finally:
+        if subscribed is not None:
+            await _analyzer_call(_change_preview_subscribers, subscribed, -1)
 
 
 # Startup ve shutdown events
 @app.on_event("startup")
 async def startup_event():
     """Uygulama başlangıcı"""
+    global _event_loop, _change_event
+    
+    _event_loop = asyncio.get_running_loop()
+    _change_event = asyncio.Event()
+    session_manager.add_listener(_on_session_change)
+    
+    # Arşivdeki oturumları özetlere kat, sonra sıkıştırma thread'ini başlat
+    if session_manager.archive is not None and session_manager.archive.count:
+        await _event_loop.run_in_executor(None, session_manager.rebuild_rollups)
+    session_manager.start_compactor()
+    
     print("🚀 Postür Analiz Antrenörü API başlatıldı!")
     print("📍 API: http://localhost:8000")
     print("📍 Docs: http://localhost:8000/docs")
@@ -271,12 +972,25 @@ async def shutdown_event():
     """Uygulama kapatılıyor"""
     global posture_analyzer
     
+    _stop_recordings()
     if posture_analyzer and posture_analyzer.is_running:
         posture_analyzer.stop()
+    if isinstance(posture_analyzer, AnalyzerProcessClient):
+        posture_analyzer.close()
+    session_manager.stop_compactor()
     
     print("👋 Postür Analiz Antrenörü API kapatıldı")
 
 
+# Frontend: tüm API ve WebSocket yollarından sonra kaydedilir (SPA yakalayıcı)
+if frontend_files is not None:
+    @app.api_route("/{path:path}", methods=["GET", "HEAD"], include_in_schema=False)
+    async def frontend(request: Request, path: str):
+        if path.startswith(("api/", "ws/")):
+            raise HTTPException(status_code=404, detail="Bulunamadı")
+        return frontend_files.response(request, path)
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
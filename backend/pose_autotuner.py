@@ -0,0 +1,172 @@
+"""
+Poz Modeli Otomatik Ayar Modülü
+Ölçülen çıkarım süresine göre MediaPipe model karmaşıklığını ve giriş boyutunu seçer
+"""
+
+import time
+from dataclasses import dataclass, asdict
+from typing import Optional, Dict, Any, List, Callable
+
+
+@dataclass(frozen=True)
+class PoseLevel:
+    """Tek bir model ayarı (ağırdan hafife sıralanır)"""
+    model_complexity: int
+    input_width: int  # MediaPipe'a verilen görüntü genişliği (piksel)
+
+
+# Ağırdan hafife
+DEFAULT_LEVELS = [
+    PoseLevel(model_complexity=2, input_width=640),
+    PoseLevel(model_complexity=1, input_width=640),
+    PoseLevel(model_complexity=1, input_width=480),
+    PoseLevel(model_complexity=0, input_width=480),
+    PoseLevel(model_complexity=0, input_width=320),
+]
+
+
+class PoseAutoTuner:
+    """
+    Gecikme bütçesine sığan en ağır model ayarını seçer
+
+    - Başlangıçta her seviye ölçülür, bütçeye sığan en ağır seviye seçilir
+    - Oturum sırasında gecikmenin hareketli ortalaması izlenir:
+      bütçe aşılırsa bir seviye hafifletilir, uzun süre rahat kalınırsa
+      bir üst seviye tekrar denenir
+    """
+
+    def __init__(self, budget_ms: float = 25.0, levels: Optional[List[PoseLevel]] = None,
+                 start_index: int = 1, smoothing: float = 0.1, min_samples: int = 30,
+                 step_up_ratio: float = 0.6, cooldown_seconds: float = 10.0,
+                 retry_after_seconds: float = 120.0):
+        self.budget_ms = budget_ms
+        self.levels = levels or DEFAULT_LEVELS
+        self.index = min(start_index, len(self.levels) - 1)
+        self.smoothing = smoothing
+        self.min_samples = min_samples
+        self.step_up_ratio = step_up_ratio
+        self.cooldown_seconds = cooldown_seconds
+        self.retry_after_seconds = retry_after_seconds
+
+        self.avg_latency_ms: Optional[float] = None
+        self.samples = 0
+        self.last_change = time.time()
+        self.step_downs = 0
+        self.step_ups = 0
+        # Seviye -> (son ölçülen gecikme, ölçüm zamanı)
+        self.measured: Dict[int, tuple] = {}
+        # Seviye -> modelin yüklenemediği son zaman (retry_after_seconds boyunca denenmez)
+        self.failed: Dict[int, float] = {}
+
+    @property
+    def current(self) -> PoseLevel:
+        return self.levels[self.index]
+
+    def select(self, level: PoseLevel):
+        """Seviyeyi doğrudan ayarla (ör. kalibrasyon başarısız olduğunda çalışan seviye)"""
+        self.index = self.levels.index(level)
+        self._reset_window()
+
+    def reject(self, failed: PoseLevel, current: PoseLevel):
+        """Modeli yüklenemeyen seviyeyi işaretle ve çalışan seviyeye geri dön"""
+        self.failed[self.levels.index(failed)] = time.time()
+        self.select(current)
+        print(f"⚠️ Poz modeli seviyesi kullanılamıyor: karmaşıklık={failed.model_complexity}, "
+              f"genişlik={failed.input_width}; önceki seviyede kalındı")
+
+    def _usable(self, index: int, now: float) -> bool:
+        return now - self.failed.get(index, 0.0) > self.retry_after_seconds
+
+    def set_budget(self, budget_ms: float):
+        self.budget_ms = budget_ms
+        self._reset_window()
+
+    def calibrate(self, measure: Callable[[PoseLevel], float]) -> PoseLevel:
+        """
+        Seviyeleri ağırdan hafife ölç, bütçeye sığan ilk seviyeyi seç
+        measure: verilen seviye için ortalama gecikmeyi (ms) döndürür
+        """
+        chosen = len(self.levels) - 1
+        for i, level in enumerate(self.levels):
+            try:
+                latency = measure(level)
+            except Exception as e:
+                print(f"⚠️ Model seviyesi ölçülemedi ({level}): {e}")
+                continue
+            self.measured[i] = (latency, time.time())
+            if latency <= self.budget_ms:
+                chosen = i
+                break
+
+        self.index = chosen
+        self._reset_window()
+        print(f"⚙️ Poz modeli seçildi: karmaşıklık={self.current.model_complexity}, "
+              f"genişlik={self.current.input_width} (bütçe {self.budget_ms}ms)")
+        return self.current
+
+    def record(self, latency_ms: float) -> Optional[PoseLevel]:
+        """
+        Bir kare gecikmesini kaydet
+        Seviye değişirse yeni seviyeyi, değişmezse None döndür
+        """
+        if self.avg_latency_ms is None:
+            self.avg_latency_ms = latency_ms
+        else:
+            self.avg_latency_ms += self.smoothing * (latency_ms - self.avg_latency_ms)
+        self.samples += 1
+
+        if self.samples < self.min_samples:
+            return None
+        now = time.time()
+        if now - self.last_change < self.cooldown_seconds:
+            return None
+
+        # Aşırı yük: bir seviye hafiflet
+        if self.avg_latency_ms > self.budget_ms and self.index < len(self.levels) - 1 \
+                and self._usable(self.index + 1, now):
+            self.measured[self.index] = (self.avg_latency_ms, now)
+            self.index += 1
+            self.step_downs += 1
+            return self._changed("hafifletildi")
+
+        # Uzun süre rahat: daha ağır seviyeyi yeniden dene
+        if self.avg_latency_ms < self.budget_ms * self.step_up_ratio and self.index > 0 \
+                and self.samples >= self.min_samples * 3 and self._usable(self.index - 1, now):
+            heavier = self.measured.get(self.index - 1)
+            if heavier is None or heavier[0] <= self.budget_ms \
+                    or now - heavier[1] > self.retry_after_seconds:
+                self.measured[self.index] = (self.avg_latency_ms, now)
+                self.index -= 1
+                self.step_ups += 1
+                return self._changed("ağırlaştırıldı")
+
+        return None
+
+    def _changed(self, action: str) -> PoseLevel:
+        print(f"⚙️ Poz modeli {action}: karmaşıklık={self.current.model_complexity}, "
+              f"genişlik={self.current.input_width} (ort. {self.avg_latency_ms:.1f}ms)")
+        self._reset_window()
+        return self.current
+
+    def _reset_window(self):
+        self.avg_latency_ms = None
+        self.samples = 0
+        self.last_change = time.time()
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "budget_ms": self.budget_ms,
+            "level": asdict(self.current),
+            "level_index": self.index,
+            "avg_latency_ms": round(self.avg_latency_ms, 2) if self.avg_latency_ms is not None else None,
+            "step_downs": self.step_downs,
+            "step_ups": self.step_ups,
+            "levels": [
+                {
+                    **asdict(level),
+                    "measured_ms": round(self.measured[i][0], 2) if i in self.measured else None,
+                    "failed": i in self.failed
+                }
+                for i, level in enumerate(self.levels)
+            ]
+        }
@@ -11,32 +11,82 @@ import cv2
 import numpy as np
 from collections import deque
 import base64
+import os
+import threading
 import time
-from typing import Optional, Tuple, Dict, Any
+from typing import Optional, Tuple, Dict, Any, List
+
+from raw_recorder import RawFrameRecorder
+from session_recorder import SessionVideoRecorder
+from depth_preview import torso_roi, encode_depth_preview
+from pose_autotuner import PoseAutoTuner, PoseLevel
+from depth_tracker import DepthTorsoTracker
+from posture_metrics import MetricEngine, landmarks_to_array, LEFT_SHOULDER, RIGHT_SHOULDER
+from frame_watchdog import FrameWatchdog, ACTION_RETRY, ACTION_HARDWARE_RESET
+from presence_detector import PresenceDetector, PRESENT, ABSENT
+from camera_profiles import (
+    CameraProfile, ProfileStats, RoiDepthFilter, DEFAULT_PROFILE, get_profile, describe_profiles
+)
+
+
+# Piksel cinsinden sabitler 640x480 için ayarlandı. Diğer profillerde görüntü
+# yüksekliğiyle ölçeklenir (RealSense renk akışında dikey görüş açısı
+# 424x240, 640x480 ve 848x480 için aynıdır)
+REFERENCE_HEIGHT = 480
+CHEST_OFFSET_PX = 50      # Göğüs noktası: omuz ortasının bu kadar altı
+DEPTH_WINDOW_PX = 3       # Nokta derinliği medyan penceresi
+TORSO_ROI_MARGIN_PX = 80  # Gövde bölgesi kenar payı
+TRACKER_SEARCH_PX = 12    # Derinlik takibi arama yarıçapı
+TRACKER_PATCH_PX = 6      # Derinlik takibi şablon yarıçapı
+
+# Kare döngüsündeki bekleme kaç kare süresi sürer; dolarsa uzun bekleme
+# (frame_timeout_ms) ve kurtarma kademeleri kurtarma thread'ine devredilir
+FRAME_WAIT_PERIODS = 3
+
+
+def scaled_pixels(value: int, scale: float, minimum: int = 1) -> int:
+    """Referans çözünürlükteki piksel değerini verilen ölçeğe çevir"""
+    return max(minimum, int(round(value * scale)))
+
+
+def scaled_window(size: int, scale: float) -> int:
+    """Medyan penceresini ölçekle; tek sayı ve en az 3x3 (tek pikselde medyan anlamsız)"""
+    return max(3, scaled_pixels(size, scale) | 1)
 
 
 class PostureAnalyzer:
     """Intel RealSense D435i ve MediaPipe kullanarak postür analizi yapar"""
     
-    def __init__(self):
-        # RealSense pipeline
-        self.pipeline = rs.pipeline()
-        self.config = rs.config()
+    def __init__(self, latency_budget_ms: float = 25.0, profile: Optional[CameraProfile] = None,
+                 pipeline=None):
+        # RealSense pipeline (test için FaultInjectingPipeline gibi bir sarmalayıcı verilebilir)
+        self.pipeline = pipeline or rs.pipeline()
+        self._pipeline_profile = None
+        
+        # Kare akışı bekçisi: takılmada tekrar dene -> pipeline'ı yeniden başlat -> donanım sıfırla
+        self.watchdog = FrameWatchdog()
+        self.frame_timeout_ms = 500  # Kurtarma thread'inde tek kare bekleme süresi
+        self.hardware_reset_wait = 5.0  # Sıfırlanan cihazın yeniden tanınması için bekleme (saniye)
+        self._recovery_thread: Optional[threading.Thread] = None
         
-        # 640x480 @ 30fps - renk ve derinlik
-        self.config.enable_stream(rs.stream.depth, 640, 480, rs.format.z16, 30)
-        self.config.enable_stream(rs.stream.color, 640, 480, rs.format.bgr8, 30)
+        # Kamera profili (çözünürlük/FPS + gövde bölgesi derinlik filtreleri)
+        self.profile = profile or get_profile(DEFAULT_PROFILE)
+        self.config = self._create_config(self.profile)
+        self.depth_filter = RoiDepthFilter(self.profile.filters)
+        self.profile_stats: Dict[str, ProfileStats] = {}
         
-        # MediaPipe Pose
+        # MediaPipe Pose - model ayarı gecikme bütçesine göre otomatik seçilir
         self.mp_pose = mp.solutions.pose
-        self.pose = self.mp_pose.Pose(
-            static_image_mode=False,
-            model_complexity=1,
-            smooth_landmarks=True,
-            min_detection_confidence=0.7,
-            min_tracking_confidence=0.5
-        )
+        self.autotuner = PoseAutoTuner(budget_ms=latency_budget_ms)
+        self.pose_level = self.autotuner.current
+        self.pose = self._create_pose(self.pose_level.model_complexity)
+        self._pose_calibrated = False
+        self._pose_loader: Optional[threading.Thread] = None
+        self._loaded_pose = None  # Arka planda yüklenen (seviye, Pose veya None)
         self.mp_draw = mp.solutions.drawing_utils
+        self._landmark_spec = self.mp_draw.DrawingSpec(
+            color=(200, 200, 200), thickness=1, circle_radius=2)
+        self._connection_spec = self.mp_draw.DrawingSpec(color=(200, 200, 200), thickness=1)
         
         # Align object - derinlik görüntüsünü renk görüntüsüne hizala
         self.align = None
@@ -44,90 +94,509 @@ class PostureAnalyzer:
         
         # Kamera durumu
         self.is_running = False
+        self.is_idle = False  # Oturum duraklatıldı: pipeline açık, analiz yok
+        self._resume_pending = False  # Devam edildi; durum sıfırlaması sıradaki karede yapılacak
         
-        # Smoothing için deque
+        # Smoothing için deque (ortalama her karede yeniden hesaplanmaz, toplam tutulur)
         self.depth_history = deque(maxlen=10)
+        self._depth_sum = 0.0
         
         # Eşik değeri (mm cinsinden)
         self.good_posture_threshold = 40  # 40mm
         
+        # Opsiyonel video kaydedici
+        self.video_recorder: Optional[SessionVideoRecorder] = None
+        
+        # Opsiyonel ham renk+derinlik kaydedici (RawFrameRecorder)
+        self.raw_recorder: Optional[RawFrameRecorder] = None
+        self.intrinsics: Dict[str, Any] = {}
+        
+        # Kare çıktısı: "base64" (WebSocket için) veya "jpeg" (ham baytlar, ayrı süreç modu)
+        self.frame_format = "base64"
+        
+        # Opsiyonel derinlik önizleme kanalı (abone yoksa hiç hesaplanmaz)
+        self.depth_preview_subscribers = 0
+        self.depth_preview_interval = 0.2  # ~5 FPS
+        self.depth_preview: Optional[bytes] = None
+        self.depth_preview_seq = 0
+        self._last_depth_preview = 0.0
+        self._torso_roi: Optional[Tuple[int, int, int, int]] = None
+        
+        # Çözünürlüğe bağlı piksel ölçüleri (_allocate_buffers profile göre günceller)
+        self._chest_offset_px = CHEST_OFFSET_PX
+        self._sample_window = DEPTH_WINDOW_PX
+        self._roi_margin_px = TORSO_ROI_MARGIN_PX
+        
+        # MediaPipe kareleri arasında derinlik tabanlı omuz takibi
+        self.depth_tracker = DepthTorsoTracker(search_radius=TRACKER_SEARCH_PX,
+                                               patch_radius=TRACKER_PATCH_PX)
+        self.mediapipe_interval = 5  # En az her 5 karede bir MediaPipe ile yeniden sabitle
+        self._frames_since_mediapipe = 0
+        
+        # Kimse yokken tam analiz yerine ucuz derinlik kontrolü ve seyrek yoklama
+        self.presence = PresenceDetector()
+        
+        # Tüm landmark'lardan tek geçişte hesaplanan ek postür metrikleri
+        self.metric_engine = MetricEngine()
+        self._landmarks = np.zeros((33, 4), dtype=np.float32)        # Son MediaPipe landmark'ları
+        self._tracked_landmarks = np.zeros((33, 4), dtype=np.float32)  # Derinlik takibiyle kaydırılmış kopya
+        self._landmarks_valid = False
+        
+        # Sıcak döngüde tekrar kullanılan tamponlar (her karede yeni dizi oluşturulmaz)
+        self._bgr_image: Optional[np.ndarray] = None   # Çizim ve JPEG kodlama için BGR kopya
+        self._pose_input: Optional[np.ndarray] = None  # Küçültülmüş MediaPipe girişi
+        self._depth_window: Optional[np.ndarray] = None  # Nokta derinliği medyanı için
+        
     def start(self) -> bool:
         """Kamerayı başlat"""
         try:
-            profile = self.pipeline.start(self.config)
-            
-            # Align objesi oluştur
-            align_to = rs.stream.color
-            self.align = rs.align(align_to)
-            
-            # Derinlik skalası al
-            depth_sensor = profile.get_device().first_depth_sensor()
-            self.depth_scale = depth_sensor.get_depth_scale()
+            self._start_pipeline()
+            self.watchdog.reset()
             
+            self.is_idle = False
+            self._resume_pending = False
+            self.presence.reset()
             self.is_running = True
             print(f"✅ RealSense kamera başlatıldı (Derinlik skalası: {self.depth_scale})")
+            
+            # İlk başlatmada bu makineye uygun model ayarını ölç
+            if not self._pose_calibrated:
+                self._calibrate_pose()
             return True
         except Exception as e:
             print(f"❌ Kamera başlatma hatası: {e}")
             self.is_running = False
             return False
+    
+    def _start_pipeline(self):
+        """Pipeline'ı aç; hizalama, derinlik skalası ve iç parametreleri yeniden al"""
+        profile = self.pipeline.start(self.config)
+        self._pipeline_profile = profile
+        
+        # Align objesi oluştur
+        align_to = rs.stream.color
+        self.align = rs.align(align_to)
         
+        # Derinlik skalası al
+        depth_sensor = profile.get_device().first_depth_sensor()
+        self.depth_scale = depth_sensor.get_depth_scale()
+        
+        # Renk kamerası iç parametreleri (derinlik renge hizalandığı için ikisi için de geçerli)
+        color_profile = profile.get_stream(rs.stream.color).as_video_stream_profile()
+        intr = color_profile.get_intrinsics()
+        self.intrinsics = {
+            "width": intr.width,
+            "height": intr.height,
+            "fx": intr.fx,
+            "fy": intr.fy,
+            "ppx": intr.ppx,
+            "ppy": intr.ppy,
+            "model": str(intr.model),
+            "coeffs": list(intr.coeffs)
+        }
+        self._allocate_buffers(intr.width, intr.height)
+    
     def stop(self):
         """Kamerayı durdur"""
+        self.stop_raw_recording()
+        self.stop_video_recording()
         if self.is_running:
+            self.is_running = False
+            if self._recovery_thread is not None:
+                self._recovery_thread.join(timeout=self.hardware_reset_wait + 5.0)
             try:
                 self.pipeline.stop()
-                self.is_running = False
-                self.depth_history.clear()
                 print("✅ RealSense kamera durduruldu")
             except Exception as e:
                 print(f"❌ Kamera durdurma hatası: {e}")
+            
+            self.watchdog.reset()
+            self.depth_history.clear()
+            self._depth_sum = 0.0
+            self._torso_roi = None
+            self.depth_preview = None
+            self.depth_tracker.reset()
+            self.depth_filter.reset()
+            self._landmarks_valid = False
+            self._get_profile_stats().pause()
+        self.is_idle = False
+    
+    def set_idle(self, idle: bool):
+        """
+        Boşta modu: pipeline açık kalır ama kare beklenmez; çıkarım ve kodlama yapılmaz
+        Devam ederken pipeline yeniden başlatılmaz, sadece birikmiş eski kareler atılır
+
+        Sadece bayrak ayarlanır; API thread'inden çağrılabilir. Takipçi/varlık durumunun
+        sıfırlanması ve pipeline'dan kare atılması kare yolunda (get_frame) yapılır,
+        böylece get_frame ile aynı anda pipeline'a dokunulmaz
+        """
+        if idle == self.is_idle:
+            return
+        if idle:
+            self.is_idle = True
+            print("💤 Analizör boşta (oturum duraklatıldı)")
+            return
+        # Bayrak is_idle kalkmadan önce konur: sıradaki kare önce sıfırlamayı yapar
+        self._resume_pending = True
+        self.is_idle = False
+        print("▶️ Analizör devam ediyor")
+    
+    def _resume_from_idle(self):
+        """Boşta geçen süre kare boşluğu sayılmasın; kişi bu arada yer değiştirmiş olabilir"""
+        self._resume_pending = False
+        self.watchdog.reset()
+        self.depth_history.clear()
+        self._depth_sum = 0.0
+        self._torso_roi = None
+        self.depth_tracker.reset()
+        self.depth_filter.reset()
+        self.presence.reset()
+        self._landmarks_valid = False
+        self._get_profile_stats().pause()
+        self._drain_frames()
+    
+    def _drain_frames(self, limit: int = 4):
+        """Pipeline kuyruğunda bekleyen eski kareleri bloklamadan at"""
+        for _ in range(limit):
+            try:
+                frames = self.pipeline.poll_for_frames()
+            except RuntimeError:
+                return
+            if not frames:
+                return
+    
+    @property
+    def is_stalled(self) -> bool:
+        """Kare akışı takıldı mı (kurtarma sürüyor olabilir)"""
+        return self.is_running and self.watchdog.is_stalled
+    
+    @property
+    def is_recovering(self) -> bool:
+        return self._recovery_thread is not None and self._recovery_thread.is_alive()
+    
+    @property
+    def frame_wait_ms(self) -> int:
+        """Kare döngüsünde bir kare için en uzun bekleme (takılmada döngü en fazla bu kadar bloklanır)"""
+        return min(self.frame_timeout_ms, round(FRAME_WAIT_PERIODS * 1000 / self.profile.fps))
+    
+    def get_camera_health(self) -> Dict[str, Any]:
+        """Takılma sayıları ve kurtarma süreleri"""
+        return {
+            **self.watchdog.to_dict(),
+            "running": self.is_running,
+            "recovering": self.is_recovering,
+            "presence": self.presence.to_dict(),
+            "frame_timeout_ms": self.frame_timeout_ms,
+            "frame_wait_ms": self.frame_wait_ms
+        }
+    
+    def _handle_frame_failure(self, error: Exception):
+        """Kare eksik geldi: bekçinin önerdiği kurtarma adımını uygula"""
+        action = self.watchdog.record_failure()
+        if action == ACTION_RETRY:
+            print(f"⚠️ Kare alınamadı ({error}), tekrar deneniyor")
+            return
+        self._start_recovery(action)
+    
+    def _start_recovery(self, action: Optional[str] = None):
+        """
+        Kare bekleme ve kurtarma ayrı thread'de: frame_timeout_ms beklemeleri ve
+        yeniden başlatma/sıfırlama saniyeler sürebilir, kare döngüsü bloklanmaz
+        """
+        self._recovery_thread = threading.Thread(
+            target=self._recovery_loop, args=(action,), name="camera-recovery", daemon=True)
+        self._recovery_thread.start()
+    
+    def _recovery_loop(self, action: Optional[str]):
+        """
+        Kare gelene kadar frame_timeout_ms ile bekle; her zaman aşımında bekçinin
+        kademesini uygula. Gelen kare atılır; akış get_frame'de sıradaki kareyle
+        devam eder ve bekçi kurtarmayı orada kaydeder
+        """
+        while self.is_running and not self.is_idle:
+            if action is not None and action != ACTION_RETRY:
+                self._recover(action)
+            try:
+                self.pipeline.wait_for_frames(self.frame_timeout_ms)
+                return
+            except RuntimeError as e:
+                action = self.watchdog.record_failure()
+                print(f"⚠️ Kare alınamadı ({e}) -> {action}")
+    
+    def _recover(self, action: str):
+        """Pipeline'ı yeniden başlat veya cihazı donanımsal sıfırla"""
+        print(f"🔄 Kamera kurtarma: {action}")
+        try:
+            device = self._pipeline_profile.get_device() if self._pipeline_profile else None
+            try:
+                self.pipeline.stop()
+            except Exception:
+                pass  # Pipeline zaten durmuş olabilir
+            
+            if action == ACTION_HARDWARE_RESET and device is not None:
+                device.hardware_reset()
+                time.sleep(self.hardware_reset_wait)
+            
+            if self.is_running:
+                self._start_pipeline()
+                self.depth_tracker.reset()
+                print(f"✅ Kamera kurtarma tamamlandı: {action}")
+        except Exception as e:
+            # Sonraki kare hatası bir üst kademeye geçer
+            print(f"❌ Kamera kurtarma hatası ({action}): {e}")
+    
+    def _create_config(self, profile: CameraProfile):
+        """Profile göre renk ve derinlik akışlarını ayarla"""
+        config = rs.config()
+        # Renk doğrudan RGB alınır: MediaPipe dönüşümsüz kullanır, BGR kopya sadece çizim/kodlama için
+        config.enable_stream(rs.stream.depth, profile.width, profile.height, rs.format.z16, profile.fps)
+        config.enable_stream(rs.stream.color, profile.width, profile.height, rs.format.rgb8, profile.fps)
+        return config
+    
+    def set_camera_profile(self, name: str, filters: Optional[List[str]] = None):
+        """
+        Kamera profilini değiştir (kamera durdurulmuş olmalı)
+        filters verilirse profilin varsayılan derinlik filtrelerinin yerine geçer
+        """
+        if self.is_running:
+            raise RuntimeError("Kamera çalışırken profil değiştirilemez")
+        self.profile = get_profile(name, filters)
+        self.config = self._create_config(self.profile)
+        self.depth_filter = RoiDepthFilter(self.profile.filters)
+        print(f"✅ Kamera profili: {self.profile.name} "
+              f"({self.profile.width}x{self.profile.height}@{self.profile.fps}, "
+              f"filtreler: {', '.join(self.profile.filters) or 'yok'})")
+    
+    def _get_profile_stats(self) -> ProfileStats:
+        stats = self.profile_stats.get(self.profile.name)
+        if stats is None:
+            stats = self.profile_stats[self.profile.name] = ProfileStats()
+        return stats
+    
+    def get_camera_profiles(self) -> Dict[str, Any]:
+        """Profiller, aktif profil ve profil başına ölçülen maliyet"""
+        return describe_profiles(self.profile_stats, self.profile)
+    
+    def _allocate_buffers(self, width: int, height: int):
+        """Kare tamponlarını çözünürlüğe göre bir kez ayır"""
+        if self._bgr_image is None or self._bgr_image.shape[:2] != (height, width):
+            self._bgr_image = np.empty((height, width, 3), dtype=np.uint8)
+        self._pose_input = None  # Giriş boyutu seviyeye bağlı, ilk kullanımda ayrılır
+        
+        # Piksel sabitleri çözünürlükle ölçeklenir: aynı duruş her profilde gövdenin
+        # aynı bölgesinden ölçülür, depth_diff ve eşikler profiller arasında karşılaştırılabilir
+        scale = height / REFERENCE_HEIGHT
+        self._chest_offset_px = scaled_pixels(CHEST_OFFSET_PX, scale)
+        self._sample_window = scaled_window(DEPTH_WINDOW_PX, scale)
+        self._roi_margin_px = scaled_pixels(TORSO_ROI_MARGIN_PX, scale)
+        self.metric_engine.depth_window = self._sample_window
+        search = scaled_pixels(TRACKER_SEARCH_PX, scale, minimum=2)
+        patch = scaled_pixels(TRACKER_PATCH_PX, scale, minimum=2)
+        if (self.depth_tracker.search_radius, self.depth_tracker.patch_radius) != (search, patch):
+            self.depth_tracker = DepthTorsoTracker(search_radius=search, patch_radius=patch)
+    
+    def _create_pose(self, model_complexity: int):
+        """Verilen karmaşıklıkta MediaPipe Pose nesnesi oluştur"""
+        return self.mp_pose.Pose(
+            static_image_mode=False,
+            model_complexity=model_complexity,
+            smooth_landmarks=True,
+            min_detection_confidence=0.7,
+            min_tracking_confidence=0.5
+        )
+    
+    def _apply_pose_level(self, level: PoseLevel, pose=None):
+        """
+        Model ayarını değiştir (karmaşıklık değiştiyse model yeniden yüklenir)
+        Yeni model eskisi kapatılmadan önce oluşturulur; oluşturulamazsa hata
+        fırlatılır ve önceki model ile seviye kullanılmaya devam eder
+        """
+        if level.model_complexity != self.pose_level.model_complexity:
+            if pose is None:
+                pose = self._create_pose(level.model_complexity)
+            old_pose, self.pose = self.pose, pose
+            old_pose.close()
+        self.pose_level = level
+    
+    def _load_pose_async(self, level: PoseLevel):
+        """Yeni karmaşıklıktaki modeli arka planda yükle; kareler bu sırada eski modelle işlenir"""
+        def load():
+            try:
+                pose = self._create_pose(level.model_complexity)
+            except Exception as e:
+                print(f"⚠️ Poz modeli yüklenemedi ({level}): {e}")
+                pose = None
+            self._loaded_pose = (level, pose)
+        
+        self._pose_loader = threading.Thread(target=load, name="pose-loader", daemon=True)
+        self._pose_loader.start()
+    
+    def _prepare_pose_input(self, rgb_image: np.ndarray, level: PoseLevel) -> np.ndarray:
+        """Görüntüyü seviyenin giriş genişliğine küçült (landmark'lar normalize olduğu için koordinat etkilenmez)"""
+        h, w = rgb_image.shape[:2]
+        if level.input_width >= w:
+            return rgb_image
+        new_h = int(h * level.input_width / w)
+        if self._pose_input is None or self._pose_input.shape[:2] != (new_h, level.input_width):
+            self._pose_input = np.empty((new_h, level.input_width, 3), dtype=np.uint8)
+        return cv2.resize(rgb_image, (level.input_width, new_h), dst=self._pose_input,
+                          interpolation=cv2.INTER_AREA)
+    
+    def _calibrate_pose(self, frames_per_level: int = 8, warmup: int = 2):
+        """Her model seviyesinin gerçek kare gecikmesini ölç ve bütçeye uyanı seç"""
+        def measure(level: PoseLevel) -> float:
+            self._apply_pose_level(level)
+            latencies = []
+            for i in range(frames_per_level + warmup):
+                frames = self.pipeline.wait_for_frames(1000)
+                color_frame = frames.get_color_frame()
+                if not color_frame:
+                    continue
+                rgb_image = np.asanyarray(color_frame.get_data())
+                
+                t0 = time.perf_counter()
+                self.pose.process(self._prepare_pose_input(rgb_image, level))
+                if i >= warmup:
+                    latencies.append((time.perf_counter() - t0) * 1000)
+            return float(np.median(latencies)) if latencies else float("inf")
+        
+        try:
+            self._apply_pose_level(self.autotuner.calibrate(measure))
+            self._pose_calibrated = True
+        except Exception as e:
+            # Seçilen seviyenin modeli yüklenemediyse son çalışan seviyede kalınır
+            print(f"⚠️ Model kalibrasyonu yapılamadı: {e}")
+            self.autotuner.select(self.pose_level)
+    
+    def set_latency_budget(self, budget_ms: float):
+        """Kare başına çıkarım gecikme bütçesini ayarla"""
+        self.autotuner.set_budget(budget_ms)
+        print(f"✅ Gecikme bütçesi: {budget_ms}ms olarak ayarlandı")
+    
+    def get_pose_config(self) -> Dict[str, Any]:
+        """Seçili model ayarını ve ölçümleri döndür"""
+        config = self.autotuner.to_dict()
+        config["calibrated"] = self._pose_calibrated
+        config["loading"] = self._pose_loader is not None
+        return config
+    
+    def start_video_recording(self, output_dir: str, session_id: str):
+        """İşlenmiş önizlemenin video kaydını başlat"""
+        if self.video_recorder is None or self.video_recorder.output_dir != output_dir:
+            self.stop_video_recording()
+            self.video_recorder = SessionVideoRecorder(output_dir=output_dir)
+        self.video_recorder.start(session_id)
+    
+    def stop_video_recording(self):
+        """Video kaydını durdur"""
+        if self.video_recorder is not None and self.video_recorder.is_recording:
+            self.video_recorder.stop()
+    
+    def get_recording_status(self) -> Dict[str, Any]:
+        """Açık kayıtların durumunu döndür"""
+        return {
+            "video": self.video_recorder.get_status() if self.video_recorder else None,
+            "raw": self.raw_recorder.get_status() if self.raw_recorder else None
+        }
+    
+    def start_raw_recording(self, path: str) -> bool:
+        """Ham renk + derinlik kaydını başlat (kamera çalışıyor olmalı)"""
+        if not self.is_running:
+            return False
+        self.stop_raw_recording()
         
-    def get_depth_at_point(self, depth_frame, x: int, y: int, window_size: int = 3) -> float:
+        recorder = RawFrameRecorder(
+            path,
+            width=self.intrinsics.get("width", 640),
+            height=self.intrinsics.get("height", 480),
+            intrinsics=self.intrinsics,
+            depth_scale=self.depth_scale,
+            # Kayıtlar <kök>/<oturum>/raw.pkraw düzenindedir; bütçe tüm oturumlara uygulanır
+            retention_dir=os.path.dirname(os.path.dirname(os.path.abspath(path)))
+        )
+        recorder.start()
+        self.raw_recorder = recorder
+        return True
+    
+    def stop_raw_recording(self):
+        """Ham kaydı durdur ve dosyayı kapat"""
+        recorder = self.raw_recorder
+        self.raw_recorder = None
+        if recorder is not None:
+            recorder.stop()
+    
+    def get_depth_at_point(self, depth_image: np.ndarray, x: int, y: int,
+                           window_size: Optional[int] = None) -> float:
         """
         Belirli bir noktadaki derinlik değerini al
-        3x3 alanda medyan alarak gürültüyü azalt
+        Küçük bir alanda medyan alarak gürültüyü azalt (640x480'de 3x3, çözünürlükle ölçeklenir)
         """
-        width = depth_frame.get_width()
-        height = depth_frame.get_height()
+        if window_size is None:
+            window_size = self._sample_window
+        height, width = depth_image.shape[:2]
         
         # Sınırları kontrol et
-        x = int(np.clip(x, window_size, width - window_size - 1))
-        y = int(np.clip(y, window_size, height - window_size - 1))
+        x = min(max(int(x), window_size), width - window_size - 1)
+        y = min(max(int(y), window_size), height - window_size - 1)
         
-        # Pencere içindeki değerleri al
-        depths = []
+        # Pencere tampona kopyalanıp yerinde sıralanır: geçersiz (0) değerler başa
+        # toplanır, medyan kalan geçerli değerlerin ortasından okunur (ham derinlik birimi)
         half = window_size // 2
-        for dy in range(-half, half + 1):
-            for dx in range(-half, half + 1):
-                d = depth_frame.get_distance(x + dx, y + dy)
-                if d > 0:  # Geçerli derinlik değerleri
-                    depths.append(d)
-        
-        if len(depths) > 0:
-            return np.median(depths) * 1000  # mm'ye çevir
+        window = depth_image[y - half:y + half + 1, x - half:x + half + 1]
+        values = self._depth_window
+        if values is None or values.shape != window.shape or values.dtype != window.dtype:
+            values = self._depth_window = np.empty_like(window)
+        np.copyto(values, window)
+        flat = values.reshape(-1)
+        flat.sort()
+        count = int(np.count_nonzero(flat))
+        
+        if count > 0:
+            first = flat.size - count
+            median = (float(flat[first + (count - 1) // 2]) + float(flat[first + count // 2])) / 2
+            return median * self.depth_scale * 1000  # mm'ye çevir
         return 0
     
-    def calculate_chest_point(self, landmarks, width: int, height: int) -> Tuple[Tuple[int, int], ...]:
+    def calculate_chest_point(self, landmarks: np.ndarray) -> Tuple[Tuple[int, int], ...]:
         """
         Göğüs noktasını hesapla
-        İki omuzun ortasının 50 piksel altı
+        İki omuzun ortasının 50 piksel altı (640x480'de; çözünürlükle ölçeklenir)
+        landmarks: (33, 4) piksel koordinatlı landmark dizisi
         """
-        left_shoulder = landmarks[self.mp_pose.PoseLandmark.LEFT_SHOULDER]
-        right_shoulder = landmarks[self.mp_pose.PoseLandmark.RIGHT_SHOULDER]
-        
         # Omuz koordinatları
-        left_x = int(left_shoulder.x * width)
-        left_y = int(left_shoulder.y * height)
-        right_x = int(right_shoulder.x * width)
-        right_y = int(right_shoulder.y * height)
+        left_x, left_y = int(landmarks[LEFT_SHOULDER, 0]), int(landmarks[LEFT_SHOULDER, 1])
+        right_x, right_y = int(landmarks[RIGHT_SHOULDER, 0]), int(landmarks[RIGHT_SHOULDER, 1])
         
         # Göğüs = omuzların ortası, biraz aşağıda
         chest_x = (left_x + right_x) // 2
-        chest_y = (left_y + right_y) // 2 + 50  # 50 piksel aşağı
+        chest_y = (left_y + right_y) // 2 + self._chest_offset_px
         
         return (left_x, left_y), (right_x, right_y), (chest_x, chest_y)
     
+    def get_metric_config(self) -> List[Dict[str, Any]]:
+        """Ek postür metriklerinin tanımı ve eşikleri"""
+        return self.metric_engine.get_config()
+    
+    def set_metric_thresholds(self, name: str, warn_below: Optional[float], warn_above: Optional[float]):
+        """Bir metriğin eşiklerini ayarla (bilinmeyen metrikte ValueError)"""
+        self.metric_engine.set_thresholds(name, warn_below, warn_above)
+        print(f"✅ {name} eşikleri: alt={warn_below}, üst={warn_above}")
+    
+    def _current_landmarks(self, points) -> Optional[np.ndarray]:
+        """
+        Bu karenin landmark dizisi
+        Derinlik takibiyle bulunan karelerde son MediaPipe landmark'ları omuz ortasının kayması kadar ötelenir
+        """
+        if not self._landmarks_valid or points is None:
+            return None
+        left, right = points[0], points[1]
+        anchor_mid = (self._landmarks[LEFT_SHOULDER, :2] + self._landmarks[RIGHT_SHOULDER, :2]) / 2
+        landmarks = self._tracked_landmarks
+        np.copyto(landmarks, self._landmarks)
+        landmarks[:, 0] += (left[0] + right[0]) / 2 - anchor_mid[0]
+        landmarks[:, 1] += (left[1] + right[1]) / 2 - anchor_mid[1]
+        return landmarks
+    
     def analyze_posture(self, left_shoulder_depth: float, right_shoulder_depth: float, 
                         chest_depth: float) -> Tuple[Optional[str], float]:
         """
@@ -145,9 +614,12 @@ class PostureAnalyzer:
         # Fark hesapla (pozitif = omuzlar geride)
         depth_diff = avg_shoulder_depth - chest_depth
         
-        # Smoothing için geçmişe ekle
+        # Smoothing için geçmişe ekle (deque doluysa en eskisi toplamdan düşülür)
+        if len(self.depth_history) == self.depth_history.maxlen:
+            self._depth_sum -= self.depth_history[0]
         self.depth_history.append(depth_diff)
-        smoothed_diff = np.mean(self.depth_history)
+        self._depth_sum += depth_diff
+        smoothed_diff = self._depth_sum / len(self.depth_history)
         
         # Postür değerlendirmesi
         if smoothed_diff > self.good_posture_threshold:
@@ -192,32 +664,143 @@ class PostureAnalyzer:
         
         return frame
     
+    def _run_pose(self, rgb_image: np.ndarray):
+        """MediaPipe poz çıkarımı; süresi otomatik ayarlayıcıya bildirilir"""
+        # Arka planda yüklenen model hazırsa iki kare arasında değiştirilir
+        loaded = self._loaded_pose
+        if loaded is not None:
+            self._loaded_pose = None
+            self._pose_loader = None
+            level, pose = loaded
+            if pose is None:
+                self.autotuner.reject(level, self.pose_level)
+            else:
+                self._apply_pose_level(level, pose)
+        
+        t0 = time.perf_counter()
+        results = self.pose.process(self._prepare_pose_input(rgb_image, self.pose_level))
+        latency_ms = (time.perf_counter() - t0) * 1000
+        
+        # Yükleme sürerken ölçümler eski modele ait; ayarlayıcıya bildirilmez
+        if self._pose_loader is None:
+            new_level = self.autotuner.record(latency_ms)
+            if new_level is not None:
+                if new_level.model_complexity == self.pose_level.model_complexity:
+                    self._apply_pose_level(new_level)  # Sadece giriş boyutu değişir
+                else:
+                    self._load_pose_async(new_level)
+        return results.pose_landmarks
+    
     def get_frame(self) -> Optional[Dict[str, Any]]:
         """
         Tek bir frame al ve analiz et
         WebSocket üzerinden gönderilecek veriyi döndür
         """
-        if not self.is_running:
+        if not self.is_running or self.is_idle:
             return None
         
         try:
-            # Frame al (timeout 1000ms)
-            frames = self.pipeline.wait_for_frames(1000)
+            # Kurtarma sürerken pipeline'a dokunma
+            if self.is_recovering:
+                return None
+            
+            if self._resume_pending:
+                self._resume_from_idle()
+            
+            # Frame al; birkaç kare süresinde gelmezse bekleme kurtarma thread'inde sürer
+            try:
+                frames = self.pipeline.wait_for_frames(self.frame_wait_ms)
+            except RuntimeError:
+                self._start_recovery()
+                return None
+            # Maliyet ölçümü kare geldikten sonra başlar (bekleme süresi sayılmaz).
+            # process_time MediaPipe'ın kendi thread'lerini de kapsar.
+            t_start = time.perf_counter()
+            cpu_start = time.process_time()
+            t_received = time.time() * 1000
+            
+            # Kimse yoksa: hizalama/çıkarım/kodlama yok, sadece derinlikte değişiklik aranır
+            if self.presence.is_absent:
+                probe_depth = frames.get_depth_frame()
+                if not probe_depth:
+                    self._handle_frame_failure(RuntimeError("eksik derinlik karesi"))
+                    return None
+                if not self.presence.should_probe(np.asanyarray(probe_depth.get_data()),
+                                                  self.depth_scale):
+                    recovered = self.watchdog.record_frame()
+                    if recovered is not None:
+                        print(f"✅ Kare akışı {recovered:.1f}s sonra geri geldi")
+                    return self._absent_result(probe_depth.get_frame_number(), t_received)
             
             # Hizala
             aligned_frames = self.align.process(frames)
             depth_frame = aligned_frames.get_depth_frame()
             color_frame = aligned_frames.get_color_frame()
+            t_aligned = time.time() * 1000
             
             if not depth_frame or not color_frame:
+                self._handle_frame_failure(RuntimeError("eksik renk/derinlik karesi"))
                 return None
             
-            # Numpy array'e çevir
-            color_image = np.asanyarray(color_frame.get_data())
+            recovered = self.watchdog.record_frame()
+            if recovered is not None:
+                print(f"✅ Kare akışı {recovered:.1f}s sonra geri geldi")
+            
+            # Numpy array'e çevir (kopyasız)
+            rgb_image = np.asanyarray(color_frame.get_data())
+            raw_depth = np.asanyarray(depth_frame.get_data())
+            h, w = rgb_image.shape[:2]
+            
+            # Çizim ve kodlama için BGR kopya, önceden ayrılmış tampona yazılır
+            if self._bgr_image is None or self._bgr_image.shape[:2] != (h, w):
+                self._allocate_buffers(w, h)
+            color_image = cv2.cvtColor(rgb_image, cv2.COLOR_RGB2BGR, dst=self._bgr_image)
+            
+            # Ham kayıt açıksa, üzerine çizim yapılmadan önce kuyruğa bırak
+            if self.raw_recorder is not None:
+                self.raw_recorder.submit(color_image, raw_depth,
+                                         frame_number=color_frame.get_frame_number())
             
-            # MediaPipe için RGB'ye çevir
-            rgb_image = cv2.cvtColor(color_image, cv2.COLOR_BGR2RGB)
-            results = self.pose.process(rgb_image)
+            # Profilin derinlik filtreleri sadece bir önceki karenin gövde bölgesine uygulanır
+            depth_image = self.depth_filter.apply(raw_depth, self._torso_roi, self.depth_scale)
+            
+            # MediaPipe her karede değil; takip yoksa, kaybedildiyse veya periyot dolduysa çalışır
+            self._frames_since_mediapipe += 1
+            run_mediapipe = (not self.depth_tracker.active
+                             or self._frames_since_mediapipe >= self.mediapipe_interval)
+            
+            pose_landmarks = None
+            points = None
+            tracking_source = None
+            
+            if not run_mediapipe:
+                points = self.depth_tracker.track(depth_image)
+                if points is not None:
+                    tracking_source = "depth"
+                else:
+                    run_mediapipe = True  # Takip kaybedildi, aynı karede MediaPipe'a düş
+            
+            if run_mediapipe:
+                pose_landmarks = self._run_pose(rgb_image)
+                self._frames_since_mediapipe = 0
+                
+                if pose_landmarks:
+                    # Omuz ve göğüs noktalarını hesapla, takipçiyi yeniden sabitle
+                    landmarks_to_array(pose_landmarks.landmark, w, h, out=self._landmarks)
+                    self._landmarks_valid = True
+                    points = self.calculate_chest_point(self._landmarks)
+                    self.depth_tracker.anchor(depth_image, self.depth_scale, *points)
+                    tracking_source = "mediapipe"
+                elif self.depth_tracker.active:
+                    # MediaPipe kişiyi kaçırdı ama gövde derinlikte hâlâ takip ediliyor
+                    points = self.depth_tracker.track(depth_image)
+                    if points is not None:
+                        tracking_source = "depth"
+            
+            transition = self.presence.update(points is not None)
+            if transition is not None:
+                print("👤 Kişi algılandı, tam hıza dönülüyor" if transition == PRESENT
+                      else "💤 Kimse yok, yoklama moduna geçiliyor")
             
             # Varsayılan değerler
             posture_status = None
@@ -225,60 +808,130 @@ class PostureAnalyzer:
             left_depth = 0.0
             right_depth = 0.0
             chest_depth = 0.0
+            metrics = None
             
-            if results.pose_landmarks:
-                landmarks = results.pose_landmarks.landmark
-                h, w = color_image.shape[:2]
+            if points is not None:
+                left_shoulder, right_shoulder, chest = points
                 
-                # Omuz ve göğüs noktalarını hesapla
-                left_shoulder, right_shoulder, chest = self.calculate_chest_point(
-                    landmarks, w, h)
+                # Derinlik önizlemesi için gövde bölgesini hatırla
+                self._torso_roi = torso_roi(points, w, h, self._roi_margin_px)
                 
                 # Derinlik değerlerini al
-                left_depth = self.get_depth_at_point(depth_frame, 
+                left_depth = self.get_depth_at_point(depth_image, 
                                                       left_shoulder[0], left_shoulder[1])
-                right_depth = self.get_depth_at_point(depth_frame, 
+                right_depth = self.get_depth_at_point(depth_image, 
                                                        right_shoulder[0], right_shoulder[1])
-                chest_depth = self.get_depth_at_point(depth_frame, 
+                chest_depth = self.get_depth_at_point(depth_image, 
                                                        chest[0], chest[1])
                 
                 # Postür analizi
                 posture_status, depth_diff = self.analyze_posture(
                     left_depth, right_depth, chest_depth)
                 
+                # Ek metrikler (tüm landmark'lar, tek vektörel geçiş)
+                landmarks = self._current_landmarks(points)
+                if landmarks is not None:
+                    metrics = self.metric_engine.to_columns(
+                        *self.metric_engine.compute(landmarks, depth_image, self.depth_scale))
+                
                 # İşaretleri çiz
-                points = (left_shoulder, right_shoulder, chest)
                 depths = (left_depth, right_depth, chest_depth)
-                color_image = self.draw_overlay(color_image, points, depths, posture_status)
-                
+                self.draw_overlay(color_image, points, depths, posture_status)
+            
+            t_inferred = time.time() * 1000
+            
+            if pose_landmarks:
                 # İskelet çiz (hafif)
                 self.mp_draw.draw_landmarks(
                     color_image,
-                    results.pose_landmarks,
+                    pose_landmarks,
                     self.mp_pose.POSE_CONNECTIONS,
-                    landmark_drawing_spec=self.mp_draw.DrawingSpec(
-                        color=(200, 200, 200), thickness=1, circle_radius=2),
-                    connection_drawing_spec=self.mp_draw.DrawingSpec(
-                        color=(200, 200, 200), thickness=1))
+                    landmark_drawing_spec=self._landmark_spec,
+                    connection_drawing_spec=self._connection_spec)
+            
+            # Derinlik önizlemesi (sadece abone varsa ve daha düşük hızda)
+            if self.depth_preview_subscribers > 0:
+                now = time.time()
+                if now - self._last_depth_preview >= self.depth_preview_interval:
+                    self._last_depth_preview = now
+                    self.depth_preview = encode_depth_preview(
+                        depth_image, self.depth_scale, self._torso_roi)
+                    self.depth_preview_seq += 1
+            
+            # Kayıt açıksa işlenmiş kareyi kuyruğa bırak (bloklamaz)
+            if self.video_recorder is not None and self.video_recorder.is_recording:
+                self.video_recorder.submit(color_image)
             
             # Frame'i base64'e çevir
             _, buffer = cv2.imencode('.jpg', color_image, [cv2.IMWRITE_JPEG_QUALITY, 80])
-            frame_base64 = base64.b64encode(buffer).decode('utf-8')
             
-            return {
-                "status": posture_status,
-                "depth_diff": round(depth_diff, 1),
-                "left_shoulder_depth": round(left_depth, 0),
-                "right_shoulder_depth": round(right_depth, 0),
-                "chest_depth": round(chest_depth, 0),
-                "frame_base64": frame_base64,
-                "timestamp": time.time()
+            # Sonuç sözlüğü her karede yenidir: çağıranlar (oturum, kayıt) onu ve
+            # içindeki metrikleri saklayabilir, sonraki kare üzerine yazmaz
+            result: Dict[str, Any] = {}
+            result["status"] = posture_status
+            result["depth_diff"] = round(depth_diff, 1)
+            result["left_shoulder_depth"] = round(left_depth, 0)
+            result["right_shoulder_depth"] = round(right_depth, 0)
+            result["chest_depth"] = round(chest_depth, 0)
+            result["tracking_source"] = tracking_source
+            result["metrics"] = metrics
+            result["presence"] = self.presence.state
+            result["timestamp"] = time.time()
+            if self.frame_format == "jpeg":
+                # Kopyasız: halka tampon doğrudan numpy tamponundan yazar (bytes yerine uint8 dizi)
+                result["frame_jpeg"] = buffer.reshape(-1)
+            else:
+                result["frame_base64"] = base64.b64encode(buffer).decode('utf-8')
+            t_encoded = time.time() * 1000
+            
+            # Aşama zaman damgaları (epoch ms). Sensör saati sistem saatine bağlı
+            # değilse capture bilinmez; gecikme izleyici received'dan başlar.
+            capture_ms = None
+            if color_frame.get_frame_timestamp_domain() in (rs.timestamp_domain.global_time,
+                                                            rs.timestamp_domain.system_time):
+                capture_ms = color_frame.get_timestamp()
+            result["frame_number"] = color_frame.get_frame_number()
+            result["trace"] = {
+                "capture": capture_ms,
+                "received": t_received,
+                "aligned": t_aligned,
+                "inferred": t_inferred,
+                "encoded": t_encoded
             }
             
+            # Profil maliyeti: CPU, işleme süresi ve (saat senkronsa) yakalamadan itibaren gecikme
+            latency_ms = t_encoded - capture_ms if capture_ms is not None else None
+            self._get_profile_stats().record(
+                cpu_ms=(time.process_time() - cpu_start) * 1000,
+                processing_ms=(time.perf_counter() - t_start) * 1000,
+                latency_ms=latency_ms
+            )
+            return result
+            
         except Exception as e:
             print(f"❌ Frame alma hatası: {e}")
             return None
     
+    def _absent_result(self, frame_number: int, t_received: float) -> Dict[str, Any]:
+        """Kimse yokken dönen sonuç: görüntü yeniden kodlanmaz, son kare ekranda kalır"""
+        result: Dict[str, Any] = {}
+        result["status"] = None
+        result["depth_diff"] = 0.0
+        result["left_shoulder_depth"] = 0.0
+        result["right_shoulder_depth"] = 0.0
+        result["chest_depth"] = 0.0
+        result["tracking_source"] = None
+        result["metrics"] = None
+        result["presence"] = ABSENT
+        result["timestamp"] = time.time()
+        if self.frame_format == "jpeg":
+            result["frame_jpeg"] = b""
+        else:
+            result["frame_base64"] = None
+        result["frame_number"] = frame_number
+        result["trace"] = {"received": t_received}
+        return result
+    
     def set_threshold(self, threshold: float):
         """Postür eşik değerini ayarla"""
         self.good_posture_threshold = threshold
@@ -0,0 +1,308 @@
+"""
+Çoklu Postür Metriği Modülü
+MediaPipe'ın 33 landmark'ından birden fazla postür metriğini tek vektörel geçişte hesaplar
+
+Mantık:
+- Landmark'lar karede bir kez (33, 4) diziye çevrilir: x, y (piksel), z, görünürlük
+- Her metrik, landmark'ların ağırlıklı toplamıdır (ağırlık matrisi satırı);
+  tüm metrikler tek matris çarpımıyla (M, 33) @ (33, 3) hesaplanır
+- Metrik türü sonucun nasıl yorumlanacağını belirler: derinlik farkı (mm),
+  yataya göre açı (derece) veya dikeye göre açı (derece)
+- Eşikler ve oturum muhasebesi de dizi işlemleriyle yapılır;
+  metrik eklemek kare başına Python döngüsü eklemez
+"""
+
+import time
+from dataclasses import dataclass, asdict
+from typing import Optional, Dict, Any, List, Tuple
+
+import numpy as np
+
+
+# MediaPipe Pose landmark indeksleri
+NOSE = 0
+LEFT_EAR = 7
+RIGHT_EAR = 8
+LEFT_SHOULDER = 11
+RIGHT_SHOULDER = 12
+LEFT_HIP = 23
+RIGHT_HIP = 24
+LANDMARK_COUNT = 33
+
+# Metrik türleri
+KIND_DEPTH = "depth"        # Ağırlıklı derinlik toplamı (mm)
+KIND_TILT = "tilt"          # Ağırlıklı (x, y) vektörünün yataya göre açısı (derece)
+KIND_LEAN = "lean"          # Ağırlıklı (x, y) vektörünün dikeye göre açısı (derece)
+METRIC_KINDS = (KIND_DEPTH, KIND_TILT, KIND_LEAN)
+
+
+@dataclass
+class MetricSpec:
+    """Tek bir metriğin tanımı"""
+    name: str
+    kind: str
+    weights: Dict[int, float]              # landmark indeksi -> ağırlık
+    unit: str = "mm"
+    warn_below: Optional[float] = None     # Bu değerin altı kötü sayılır
+    warn_above: Optional[float] = None     # Bu değerin üstü kötü sayılır
+    description: str = ""
+
+
+DEFAULT_METRICS = [
+    MetricSpec(
+        "forward_head", KIND_DEPTH,
+        {LEFT_SHOULDER: 0.5, RIGHT_SHOULDER: 0.5, LEFT_EAR: -0.5, RIGHT_EAR: -0.5},
+        unit="mm", warn_above=60.0,
+        description="Kulakların omuzlardan kameraya ne kadar yakın olduğu (pozitif = baş önde)"
+    ),
+    MetricSpec(
+        "shoulder_tilt", KIND_TILT,
+        {RIGHT_SHOULDER: 1.0, LEFT_SHOULDER: -1.0},
+        unit="deg", warn_below=-6.0, warn_above=6.0,
+        description="Omuz hattının yataya göre açısı"
+    ),
+    MetricSpec(
+        "torso_lean", KIND_LEAN,
+        {LEFT_SHOULDER: 0.5, RIGHT_SHOULDER: 0.5, LEFT_HIP: -0.5, RIGHT_HIP: -0.5},
+        unit="deg", warn_below=-10.0, warn_above=10.0,
+        description="Kalça ortasından omuz ortasına gövde ekseninin dikeye göre açısı"
+    ),
+    MetricSpec(
+        "screen_distance", KIND_DEPTH,
+        {LEFT_SHOULDER: 0.5, RIGHT_SHOULDER: 0.5},
+        unit="mm", warn_below=450.0,
+        description="Omuzların kameraya uzaklığı"
+    ),
+]
+
+
+def landmarks_to_array(landmarks, width: int, height: int,
+                       out: Optional[np.ndarray] = None) -> np.ndarray:
+    """MediaPipe landmark listesini (33, 4) diziye çevir: x, y piksel; z; görünürlük"""
+    if out is None:
+        out = np.empty((LANDMARK_COUNT, 4), dtype=np.float32)
+    flat = np.fromiter(
+        (v for lm in landmarks for v in (lm.x, lm.y, lm.z, lm.visibility)),
+        dtype=np.float32, count=LANDMARK_COUNT * 4
+    )
+    out[...] = flat.reshape(LANDMARK_COUNT, 4)
+    out[:, 0] *= width
+    out[:, 1] *= height
+    return out
+
+
+def sample_depth(depth_image: np.ndarray, points: np.ndarray, depth_scale: float,
+                 window_size: int = 3) -> np.ndarray:
+    """
+    Noktalardaki derinliği (mm) tek seferde oku
+    Her noktada window_size x window_size penceredeki geçerli değerlerin medyanı; geçersizse NaN
+    """
+    h, w = depth_image.shape[:2]
+    half = window_size // 2
+    xs = np.clip(points[:, 0].astype(np.intp), half, w - half - 1)
+    ys = np.clip(points[:, 1].astype(np.intp), half, h - half - 1)
+
+    offsets = np.arange(-half, half + 1)
+    rows = (ys[:, None] + offsets)[:, :, None]
+    cols = (xs[:, None] + offsets)[:, None, :]
+    windows = depth_image[rows, cols].reshape(len(points), -1)
+
+    # Sıralı pencerede sıfırlar (geçersiz) başa gelir; geçerlilerin ortası seçilir
+    ordered = np.sort(windows, axis=1)
+    size = ordered.shape[1]
+    valid = np.count_nonzero(ordered, axis=1)
+    index = np.minimum(size - valid + valid // 2, size - 1)
+    medians = np.take_along_axis(ordered, index[:, None], axis=1)[:, 0].astype(np.float32)
+    medians *= depth_scale * 1000.0
+    medians[valid == 0] = np.nan
+    return medians
+
+
+class MetricEngine:
+    """Tanımlı metrikleri tek geçişte hesaplar"""
+
+    def __init__(self, specs: Optional[List[MetricSpec]] = None, min_visibility: float = 0.5):
+        self.specs = [MetricSpec(**asdict(spec)) for spec in (specs or DEFAULT_METRICS)]
+        self.min_visibility = min_visibility
+        self.depth_window = 3  # Derinlik örnekleme penceresi (çözünürlüğe göre analizör ayarlar)
+        self.names = [spec.name for spec in self.specs]
+
+        for spec in self.specs:
+            if spec.kind not in METRIC_KINDS:
+                raise ValueError(f"Bilinmeyen metrik türü: {spec.kind}")
+
+        m = len(self.specs)
+        self.weights = np.zeros((m, LANDMARK_COUNT), dtype=np.float32)
+        for row, spec in enumerate(self.specs):
+            for index, weight in spec.weights.items():
+                self.weights[row, index] = weight
+
+        kinds = np.array([spec.kind for spec in self.specs])
+        self._is_depth = kinds == KIND_DEPTH
+        self._is_tilt = kinds == KIND_TILT
+        used = (self.weights != 0).astype(np.float32)
+        self._uses_landmark = used
+        self._uses_depth = used * self._is_depth[:, None]
+
+        # Derinliği okunması gereken landmark'lar (sadece derinlik metriklerinin kullandıkları)
+        self.depth_landmarks = np.flatnonzero(self._uses_depth.any(axis=0))
+
+        self.low = np.full(m, -np.inf, dtype=np.float32)
+        self.high = np.full(m, np.inf, dtype=np.float32)
+        for row, spec in enumerate(self.specs):
+            self._set_bounds(row, spec)
+
+        # Tekrar kullanılan tamponlar
+        self._features = np.zeros((LANDMARK_COUNT, 3), dtype=np.float32)
+        self._depth = np.full(LANDMARK_COUNT, np.nan, dtype=np.float32)
+
+    def _set_bounds(self, row: int, spec: MetricSpec):
+        self.low[row] = spec.warn_below if spec.warn_below is not None else -np.inf
+        self.high[row] = spec.warn_above if spec.warn_above is not None else np.inf
+
+    def set_thresholds(self, name: str, warn_below: Optional[float], warn_above: Optional[float]):
+        """Bir metriğin eşiklerini değiştir"""
+        if name not in self.names:
+            raise ValueError(f"Bilinmeyen metrik: {name}")
+        row = self.names.index(name)
+        spec = self.specs[row]
+        spec.warn_below = warn_below
+        spec.warn_above = warn_above
+        self._set_bounds(row, spec)
+
+    def compute(self, landmarks: np.ndarray, depth_image: Optional[np.ndarray] = None,
+                depth_scale: float = 0.001) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Tüm metrikleri hesapla
+        landmarks: (33, 4) dizi (landmarks_to_array)
+        Döndürür: (değerler, geçerli maskesi, kötü maskesi), her biri (M,)
+        """
+        features = self._features
+        features[:, :2] = landmarks[:, :2]
+
+        depth = self._depth
+        depth.fill(np.nan)
+        if depth_image is not None and len(self.depth_landmarks):
+            depth[self.depth_landmarks] = sample_depth(
+                depth_image, landmarks[self.depth_landmarks], depth_scale, self.depth_window)
+
+        hidden = (landmarks[:, 3] < self.min_visibility).astype(np.float32)
+        no_depth = np.isnan(depth)
+        features[:, 2] = np.where(no_depth, 0.0, depth)
+
+        # Tüm metrikler tek matris çarpımında: (M, 33) @ (33, 3) -> (M, 3)
+        combined = self.weights @ features
+        dx, dy, dz = combined[:, 0], combined[:, 1], combined[:, 2]
+
+        # Açılar: eğim için yataya göre atan2(dy, |dx|), yatma için dikeye göre atan2(dx, -dy)
+        numerator = np.where(self._is_tilt, dy, dx)
+        denominator = np.where(self._is_tilt, np.abs(dx), -dy)
+        angles = np.degrees(np.arctan2(numerator, denominator))
+        values = np.where(self._is_depth, dz, angles)
+
+        invalid = (self._uses_landmark @ hidden) + (self._uses_depth @ no_depth.astype(np.float32))
+        valid = invalid == 0
+        bad = valid & ((values < self.low) | (values > self.high))
+        return values, valid, bad
+
+    def to_columns(self, values: np.ndarray, valid: np.ndarray, bad: np.ndarray) -> Dict[str, list]:
+        """JSON için sütun biçimi: geçersiz değerler None"""
+        rounded = np.round(values.astype(np.float64), 1).astype(object)
+        rounded[~valid] = None
+        return {"names": self.names, "values": rounded.tolist(), "bad": bad.tolist()}
+
+    def get_config(self) -> List[Dict[str, Any]]:
+        return [
+            {
+                "name": spec.name,
+                "kind": spec.kind,
+                "unit": spec.unit,
+                "warn_below": spec.warn_below,
+                "warn_above": spec.warn_above,
+                "description": spec.description,
+                "landmarks": sorted(spec.weights)
+            }
+            for spec in self.specs
+        ]
+
+
+class MetricAccumulator:
+    """Bir oturum boyunca metrik başına süre ve değer istatistikleri"""
+
+    def __init__(self, names: List[str]):
+        self.names = list(names)
+        m = len(self.names)
+        self.valid_time = np.zeros(m)
+        self.bad_time = np.zeros(m)
+        self.total = np.zeros(m)
+        self.count = np.zeros(m, dtype=np.int64)
+        self.min = np.full(m, np.inf)
+        self.max = np.full(m, -np.inf)
+
+    def update(self, values, bad, frame_time: float):
+        """Bir karenin metriklerini ekle (geçersiz değerler None/NaN)"""
+        values = np.asarray(values, dtype=np.float64)
+        bad = np.asarray(bad, dtype=bool)
+        valid = ~np.isnan(values)
+        filled = np.where(valid, values, 0.0)
+
+        self.valid_time += valid * frame_time
+        self.bad_time += (bad & valid) * frame_time
+        self.total += filled
+        self.count += valid
+        np.minimum(self.min, np.where(valid, values, np.inf), out=self.min)
+        np.maximum(self.max, np.where(valid, values, -np.inf), out=self.max)
+
+    def to_dict(self) -> Dict[str, Dict[str, Any]]:
+        def r(value, digits=1):
+            return round(float(value), digits) if np.isfinite(value) else None
+
+        result = {}
+        for i, name in enumerate(self.names):
+            count = int(self.count[i])
+            valid_time = float(self.valid_time[i])
+            result[name] = {
+                "mean": r(self.total[i] / count) if count else None,
+                "min": r(self.min[i]),
+                "max": r(self.max[i]),
+                "valid_time": round(valid_time, 1),
+                "bad_time": round(float(self.bad_time[i]), 1),
+                "bad_percentage": round(float(self.bad_time[i]) / valid_time * 100, 1) if valid_time else 0.0
+            }
+        return result
+
+
+def benchmark(metric_counts=(1, 4, 16, 64), frames: int = 2000) -> List[Dict[str, float]]:
+    """Metrik sayısına göre kare başına hesaplama süresini ölç"""
+    rng = np.random.default_rng(0)
+    depth_image = rng.integers(400, 1200, size=(480, 640), dtype=np.uint16)
+    landmarks = np.empty((LANDMARK_COUNT, 4), dtype=np.float32)
+    landmarks[:, 0] = rng.uniform(100, 540, LANDMARK_COUNT)
+    landmarks[:, 1] = rng.uniform(50, 430, LANDMARK_COUNT)
+    landmarks[:, 2] = 0.0
+    landmarks[:, 3] = 1.0
+
+    rows = []
+    for count in metric_counts:
+        specs = [MetricSpec(**{**asdict(DEFAULT_METRICS[i % len(DEFAULT_METRICS)]),
+                               "name": f"metric_{i}"})
+                 for i in range(count)]
+        engine = MetricEngine(specs)
+        engine.compute(landmarks, depth_image)  # ısınma
+
+        t0 = time.perf_counter()
+        for _ in range(frames):
+            engine.compute(landmarks, depth_image)
+        per_frame_us = (time.perf_counter() - t0) / frames * 1e6
+        rows.append({
+            "metrics": count,
+            "per_frame_us": round(per_frame_us, 1),
+            "per_metric_us": round(per_frame_us / count, 2)
+        })
+    return rows
+
+
+if __name__ == "__main__":
+    for row in benchmark():
+        print(f"📊 {row['metrics']:>3} metrik: {row['per_frame_us']:>7} µs/kare, "
+              f"{row['per_metric_us']:>6} µs/metrik")
@@ -0,0 +1,236 @@
+"""
+Postür Dağılım Özeti Modülü
+depth_diff değerlerinin dağılımını tüm örnekleri saklamadan tutar
+
+- DDSketch: göreli hata garantili, birleştirilebilir yüzdelik özeti
+  (kare başına O(1) güncelleme, sınırlı kova sayısı)
+- Sabit aralıklı histogram: grafik için, oturumlar arası doğrudan toplanabilir
+- Her ikisi de JSON'a çevrilip oturum sonucunda saklanır; özetler (rollup)
+  ham örnek olmadan bu yapılar birleştirilerek hesaplanır
+"""
+
+import math
+from typing import Optional, Dict, Any, List
+
+
+class DDSketch:
+    """
+    Göreli doğruluklu yüzdelik özeti (DDSketch)
+    Her değer log_gamma(|x|) kovasına sayılır; negatif değerler ayrı tutulur
+    """
+
+    def __init__(self, relative_accuracy: float = 0.02, max_bins: int = 512,
+                 min_value: float = 0.1):
+        self.relative_accuracy = relative_accuracy
+        self.max_bins = max_bins
+        self.min_value = min_value  # Bundan küçük mutlak değerler sıfır kovasına düşer
+
+        self._gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self._gamma)
+        self.positive: Dict[int, int] = {}
+        self.negative: Dict[int, int] = {}
+        self.zero_count = 0
+        self.count = 0
+
+    def _key(self, magnitude: float) -> int:
+        return math.ceil(math.log(magnitude) / self._log_gamma)
+
+    def _value(self, key: int) -> float:
+        return 2 * self._gamma ** key / (self._gamma + 1)
+
+    def add(self, value: float, weight: int = 1):
+        if value > self.min_value:
+            store = self.positive
+            key = self._key(value)
+        elif value < -self.min_value:
+            store = self.negative
+            key = self._key(-value)
+        else:
+            self.zero_count += weight
+            self.count += weight
+            return
+
+        store[key] = store.get(key, 0) + weight
+        self.count += weight
+        if len(store) > self.max_bins:
+            self._collapse(store)
+
+    def _collapse(self, store: Dict[int, int]):
+        """Kova sınırı aşılınca en küçük iki kovayı birleştir (büyük değerlerin doğruluğu korunur)"""
+        keys = sorted(store)
+        lowest, next_key = keys[0], keys[1]
+        store[next_key] += store.pop(lowest)
+
+    def merge(self, other: "DDSketch"):
+        """Aynı doğrulukla oluşturulmuş başka bir özeti bu özete ekle"""
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError("Farklı doğruluktaki özetler birleştirilemez")
+        for source, target in ((other.positive, self.positive), (other.negative, self.negative)):
+            for key, count in source.items():
+                target[key] = target.get(key, 0) + count
+            while len(target) > self.max_bins:
+                self._collapse(target)
+        self.zero_count += other.zero_count
+        self.count += other.count
+
+    def quantile(self, q: float) -> Optional[float]:
+        """q (0-1) yüzdeliğindeki yaklaşık değeri döndür"""
+        if self.count == 0:
+            return None
+        rank = q * (self.count - 1)
+
+        seen = 0
+        # En negatiften (büyük anahtar) sıfıra doğru
+        for key in sorted(self.negative, reverse=True):
+            seen += self.negative[key]
+            if seen > rank:
+                return -self._value(key)
+        seen += self.zero_count
+        if seen > rank:
+            return 0.0
+        for key in sorted(self.positive):
+            seen += self.positive[key]
+            if seen > rank:
+                return self._value(key)
+        return self._value(max(self.positive)) if self.positive else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "relative_accuracy": self.relative_accuracy,
+            "max_bins": self.max_bins,
+            "min_value": self.min_value,
+            "zero_count": self.zero_count,
+            "positive": sorted(self.positive.items()),
+            "negative": sorted(self.negative.items())
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "DDSketch":
+        sketch = cls(
+            relative_accuracy=data.get("relative_accuracy", 0.02),
+            max_bins=data.get("max_bins", 512),
+            min_value=data.get("min_value", 0.1)
+        )
+        sketch.positive = {int(k): int(c) for k, c in data.get("positive", [])}
+        sketch.negative = {int(k): int(c) for k, c in data.get("negative", [])}
+        sketch.zero_count = int(data.get("zero_count", 0))
+        sketch.count = sketch.zero_count + sum(sketch.positive.values()) + sum(sketch.negative.values())
+        return sketch
+
+
+class FixedHistogram:
+    """Sabit aralıklı histogram; aralık dışı değerler alt/üst taşma kovalarına sayılır"""
+
+    def __init__(self, low: float = -100.0, high: float = 150.0, bin_width: float = 10.0):
+        self.low = low
+        self.high = high
+        self.bin_width = bin_width
+        self.counts: List[int] = [0] * int(math.ceil((high - low) / bin_width))
+        self.underflow = 0
+        self.overflow = 0
+
+    def add(self, value: float, weight: int = 1):
+        if value < self.low:
+            self.underflow += weight
+        elif value >= self.high:
+            self.overflow += weight
+        else:
+            self.counts[int((value - self.low) // self.bin_width)] += weight
+
+    def merge(self, other: "FixedHistogram"):
+        if (other.low, other.high, other.bin_width) != (self.low, self.high, self.bin_width):
+            raise ValueError("Farklı aralıklı histogramlar birleştirilemez")
+        for i, count in enumerate(other.counts):
+            self.counts[i] += count
+        self.underflow += other.underflow
+        self.overflow += other.overflow
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "low": self.low,
+            "high": self.high,
+            "bin_width": self.bin_width,
+            "counts": list(self.counts),
+            "underflow": self.underflow,
+            "overflow": self.overflow
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "FixedHistogram":
+        histogram = cls(data.get("low", -100.0), data.get("high", 150.0), data.get("bin_width", 10.0))
+        counts = data.get("counts", [])
+        if len(counts) == len(histogram.counts):
+            histogram.counts = [int(c) for c in counts]
+        histogram.underflow = int(data.get("underflow", 0))
+        histogram.overflow = int(data.get("overflow", 0))
+        return histogram
+
+
+class DepthDiffDistribution:
+    """Bir oturumun (veya birleştirilmiş oturumların) depth_diff dağılımı"""
+
+    SUMMARY_QUANTILES = (0.1, 0.5, 0.9)
+
+    def __init__(self):
+        self.sketch = DDSketch()
+        self.histogram = FixedHistogram()
+        self.count = 0
+        self.total = 0.0
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+
+    def add(self, value: float):
+        self.sketch.add(value)
+        self.histogram.add(value)
+        self.count += 1
+        self.total += value
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+
+    def merge(self, other: "DepthDiffDistribution"):
+        if other.count == 0:
+            return
+        self.sketch.merge(other.sketch)
+        self.histogram.merge(other.histogram)
+        self.count += other.count
+        self.total += other.total
+        self.min = other.min if self.min is None else min(self.min, other.min)
+        self.max = other.max if self.max is None else max(self.max, other.max)
+
+    def summary(self) -> Dict[str, Any]:
+        """Sayısal özet: ortalama, min/max ve yüzdelikler (mm)"""
+        def r(value):
+            return round(value, 1) if value is not None else None
+        summary = {
+            "count": self.count,
+            "mean": r(self.total / self.count) if self.count else None,
+            "min": r(self.min),
+            "max": r(self.max)
+        }
+        for q in self.SUMMARY_QUANTILES:
+            summary[f"p{int(q * 100)}"] = r(self.sketch.quantile(q))
+        return summary
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Özet + histogram + birleştirme için özet yapısı (oturum sonucunda saklanır)"""
+        return {
+            **self.summary(),
+            "total": self.total,
+            "histogram": self.histogram.to_dict(),
+            "sketch": self.sketch.to_dict()
+        }
+
+    @classmethod
+    def from_dict(cls, data: Optional[Dict[str, Any]]) -> "DepthDiffDistribution":
+        distribution = cls()
+        if not data or not data.get("count"):
+            return distribution
+        distribution.sketch = DDSketch.from_dict(data.get("sketch", {}))
+        distribution.histogram = FixedHistogram.from_dict(data.get("histogram", {}))
+        distribution.count = int(data["count"])
+        distribution.total = float(data.get("total", 0.0))
+        distribution.min = data.get("min")
+        distribution.max = data.get("max")
+        return distribution
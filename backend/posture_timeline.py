@@ -0,0 +1,155 @@
+"""
+Postür Zaman Çizelgesi Modülü
+Oturum boyunca postür durumunu kesintisiz, sıra uzunluklu (run-length) bölütler olarak tutar
+
+- Her karede son bölüt uzatılır; yeni bölüt sadece durum değiştiğinde eklenir (O(1))
+- Zaman ekseni oturumun geçen süresidir (duraklamalar hariç)
+- Duraklamalar süresi sıfır olan PAUSED bölütleriyle işaretlenir
+- İyi/kötü süreler ve uyarı sayısı bölütlerden tam olarak türetilebilir
+- Grafikler için sabit çözünürlüklü görünüm render() ile üretilir
+"""
+
+from typing import Optional, Dict, Any, List, Iterable
+
+
+STATUS_GOOD = "IYI"
+STATUS_BAD = "KOTU"
+STATUS_UNKNOWN = "UNKNOWN"
+STATUS_PAUSED = "PAUSED"
+
+# Bölüt alanları (bellekte küçük liste olarak tutulur)
+_START, _END, _STATUS, _DIFF_SUM, _DIFF_COUNT = range(5)
+
+
+class SegmentTimeline:
+    """Durum bölütleri: [başlangıç, bitiş, durum, depth_diff toplamı, ölçüm sayısı]"""
+
+    def __init__(self, segments: Optional[List[list]] = None):
+        self.segments: List[list] = segments if segments is not None else []
+        # Durum başına toplam süre; her karede yeniden toplanmaz
+        self._totals: Dict[str, float] = {}
+        for segment in self.segments:
+            self._totals[segment[_STATUS]] = self._totals.get(segment[_STATUS], 0.0) \
+                + segment[_END] - segment[_START]
+
+    def __len__(self) -> int:
+        return len(self.segments)
+
+    @property
+    def end(self) -> float:
+        return self.segments[-1][_END] if self.segments else 0.0
+
+    def add(self, status: Optional[str], start: float, end: float,
+            depth_diff: Optional[float] = None):
+        """[start, end] aralığını duruma ekle; durum aynıysa son bölüt uzar"""
+        status = status or STATUS_UNKNOWN
+        last = self.segments[-1] if self.segments else None
+        if last is not None and last[_STATUS] == status:
+            added = end - last[_END]
+            last[_END] = end
+        else:
+            added = end - start
+            last = [start, end, status, 0.0, 0]
+            self.segments.append(last)
+        self._totals[status] = self._totals.get(status, 0.0) + added
+        if depth_diff is not None and status != STATUS_UNKNOWN:
+            last[_DIFF_SUM] += depth_diff
+            last[_DIFF_COUNT] += 1
+
+    def add_break(self, at: float):
+        """Duraklama işareti: sonraki kare aynı durumda olsa da yeni bölüt başlar"""
+        self.segments.append([at, at, STATUS_PAUSED, 0.0, 0])
+
+    def total(self, status: str) -> float:
+        """Durumda geçen toplam süre (saniye)"""
+        return self._totals.get(status, 0.0)
+
+    def totals(self) -> Dict[str, float]:
+        return dict(self._totals)
+
+    def count_warnings(self, threshold: float) -> int:
+        """
+        Kesintisiz kötü postür serisi `threshold` saniyeyi aştığında bir uyarı
+        Seri iyi postür veya duraklama ile biter; kişi görünmeyen kareler seriyi bozmaz
+        """
+        warnings = 0
+        streak_start: Optional[float] = None
+        warned = False
+        for start, end, status, _, _ in self.segments:
+            if status in (STATUS_GOOD, STATUS_PAUSED):
+                streak_start = None
+                warned = False
+            elif status == STATUS_BAD:
+                if streak_start is None:
+                    streak_start = start
+                if not warned and end - streak_start >= threshold:
+                    warnings += 1
+                    warned = True
+        return warnings
+
+    def to_list(self) -> List[Dict[str, Any]]:
+        return [
+            {
+                "start": round(start, 2),
+                "end": round(end, 2),
+                "status": status,
+                "mean_depth_diff": round(diff_sum / count, 1) if count else None
+            }
+            for start, end, status, diff_sum, count in self.segments
+        ]
+
+    @classmethod
+    def from_list(cls, items: Iterable[Dict[str, Any]]) -> "SegmentTimeline":
+        segments = []
+        for item in items:
+            mean = item.get("mean_depth_diff")
+            segments.append([item["start"], item["end"], item["status"],
+                             mean or 0.0, 1 if mean is not None else 0])
+        return cls(segments)
+
+    def render(self, points: int = 120, duration: Optional[float] = None) -> List[Dict[str, Any]]:
+        """
+        Sabit çözünürlüklü görünüm: [0, duration] eşit aralıklara bölünür
+        Her nokta aralığın baskın durumunu ve iyi/kötü oranlarını taşır
+        """
+        duration = self.end if duration is None else duration
+        if points < 1 or duration <= 0:
+            return []
+
+        step = duration / points
+        good = [0.0] * points
+        bad = [0.0] * points
+        covered = [0.0] * points
+
+        for start, end, status, _, _ in self.segments:
+            if end <= start:
+                continue
+            first = min(int(start / step), points - 1)
+            last = min(int(end / step), points - 1)
+            for index in range(first, last + 1):
+                overlap = min(end, (index + 1) * step) - max(start, index * step)
+                if overlap <= 0:
+                    continue
+                covered[index] += overlap
+                if status == STATUS_GOOD:
+                    good[index] += overlap
+                elif status == STATUS_BAD:
+                    bad[index] += overlap
+
+        view = []
+        for index in range(points):
+            if covered[index] <= 0:
+                status = STATUS_UNKNOWN
+            elif good[index] >= bad[index] and good[index] > 0:
+                status = STATUS_GOOD
+            elif bad[index] > 0:
+                status = STATUS_BAD
+            else:
+                status = STATUS_UNKNOWN
+            view.append({
+                "time": round(index * step, 1),
+                "status": status,
+                "good_ratio": round(good[index] / step, 3),
+                "bad_ratio": round(bad[index] / step, 3)
+            })
+        return view
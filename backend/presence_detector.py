@@ -0,0 +1,162 @@
+"""
+Varlık (Presence) Algılama Modülü
+Kamera önünde kimse yokken tam hızlı analizi kısar
+
+Durumlar:
+- present: her kare hizalanır, MediaPipe/takip çalışır, çizilir ve kodlanır
+- absent:  art arda `absent_after_frames` karede kişi bulunamadı. Her karede
+  sadece hizalanmamış derinlik seyreltilerek arka planla karşılaştırılır
+  (kare başına ~0.1 ms). Sahnede yeni bir ön plan belirirse veya ön plan son
+  yoklamadan bu yana büyüdüyse aynı karede, değilse `probe_interval` saniyede
+  bir tam analiz (yoklama) yapılır. Yoklama kişiyi bulursa bir sonraki kareden
+  itibaren tam hıza dönülür. Ön plan varken yoklama kişiyi bulamazsa arka plan
+  korunur ve `retry_interval`'dan başlayıp her başarısızlıkta iki katına çıkan
+  aralıkla (en fazla `probe_interval`) tekrar denenir.
+"""
+
+import time
+from typing import Optional, Dict, Any, Callable
+
+import numpy as np
+
+
+PRESENT = "present"
+ABSENT = "absent"
+
+
+class PresenceDetector:
+    """Kişi var/yok durum makinesi ve derinlik tabanlı ucuz ön plan kontrolü"""
+
+    def __init__(self, absent_after_frames: int = 45, probe_interval: float = 2.0,
+                 retry_interval: float = 0.1,
+                 foreground_delta_mm: float = 120.0, foreground_fraction: float = 0.04,
+                 max_range_mm: float = 2000.0, stride: int = 8,
+                 clock: Callable[[], float] = time.monotonic):
+        self.absent_after_frames = absent_after_frames
+        self.probe_interval = probe_interval
+        self.retry_interval = retry_interval
+        self.foreground_delta_mm = foreground_delta_mm
+        self.foreground_fraction = foreground_fraction
+        self.max_range_mm = max_range_mm
+        self.stride = stride
+        self.clock = clock
+
+        self.state = PRESENT
+        self.probes = 0
+        self.skipped_frames = 0
+        self.absences = 0
+        self.last_foreground: Optional[float] = None
+        self.total_absent_seconds = 0.0
+
+        self._misses = 0
+        self._absent_since: Optional[float] = None
+        self._last_probe = 0.0
+        self._background: Optional[np.ndarray] = None
+        self._foreground = False
+        self._next_retry = 0.0                  # Başarısız yoklamadan sonraki bekleme (0: yok)
+        self._probed_fraction = float("inf")    # Son yoklamadan beri en düşük ön plan oranı
+
+    @property
+    def is_absent(self) -> bool:
+        return self.state == ABSENT
+
+    def reset(self):
+        """Kamera yeniden başladığında veya mola bitince tam hızdan başla"""
+        if self._absent_since is not None:
+            self.total_absent_seconds += self.clock() - self._absent_since
+        self.state = PRESENT
+        self._misses = 0
+        self._absent_since = None
+        self._background = None
+        self._foreground = False
+        self._next_retry = 0.0
+        self._probed_fraction = float("inf")
+
+    def update(self, has_person: bool) -> Optional[str]:
+        """Tam analiz yapılan karenin sonucunu işle; durum değiştiyse yeni durumu döndür"""
+        if has_person:
+            self._misses = 0
+            if self.state == ABSENT:
+                self.reset()
+                return PRESENT
+            return None
+
+        if self.state == ABSENT:
+            # Başarısız yoklama: arka plan korunur ki kaçırılan kişi arka plana
+            # gömülmesin. Ön plan sürüyorsa kısa ve giderek uzayan aralıkla tekrar dene
+            if self._foreground:
+                retry = self._next_retry * 2 if self._next_retry else self.retry_interval
+                self._next_retry = min(retry, self.probe_interval)
+            return None
+
+        self._misses += 1
+        if self._misses >= self.absent_after_frames:
+            self.state = ABSENT
+            self.absences += 1
+            self._absent_since = self.clock()
+            self._last_probe = self._absent_since
+            self._background = None
+            return ABSENT
+        return None
+
+    def should_probe(self, depth_image: np.ndarray, depth_scale: float) -> bool:
+        """
+        Kişi yokken her karede çağrılır (hizalanmamış derinlik yeterli)
+        Sahnede yeni ön plan belirdiyse veya yoklama zamanı geldiyse True
+        """
+        small = depth_image[::self.stride, ::self.stride].astype(np.float32)
+        small *= depth_scale * 1000
+        valid = (small > 0) & (small < self.max_range_mm)
+
+        if self._background is None or self._background.shape != small.shape:
+            self._background = np.where(valid, small, 0).astype(np.float32)
+            self._foreground = False
+            self._next_retry = 0.0
+            self._probed_fraction = float("inf")
+            self.skipped_frames += 1
+            return False
+
+        background = self._background
+        closer = valid & ((background == 0) | (small < background - self.foreground_delta_mm))
+        fraction = float(np.count_nonzero(closer)) / closer.size
+        foreground = fraction >= self.foreground_fraction
+        appeared = foreground and not self._foreground
+        self._foreground = foreground
+        if foreground:
+            self.last_foreground = fraction
+        else:
+            self._next_retry = 0.0
+        # Yoklamadan sonra ön plan bir eşik kadar daha büyüdüyse (kişi kadraja giriyor) hemen yokla
+        self._probed_fraction = min(self._probed_fraction, fraction)
+        grown = fraction >= self._probed_fraction + self.foreground_fraction
+
+        now = self.clock()
+        interval = self._next_retry or self.probe_interval
+        if appeared or grown or now - self._last_probe >= interval:
+            self._last_probe = now
+            self._probed_fraction = fraction
+            self.probes += 1
+            return True
+
+        # Ön plan olmayan bölgelerde arka planı yavaşça güncelle (ışık/gürültü kayması)
+        still = valid & ~closer
+        background[still] += 0.1 * (small[still] - background[still])
+        self.skipped_frames += 1
+        return False
+
+    def to_dict(self) -> Dict[str, Any]:
+        absent_seconds = self.total_absent_seconds
+        if self._absent_since is not None:
+            absent_seconds += self.clock() - self._absent_since
+        return {
+            "state": self.state,
+            "absent_after_frames": self.absent_after_frames,
+            "probe_interval": self.probe_interval,
+            "retry_interval": self.retry_interval,
+            "absences": self.absences,
+            "probes": self.probes,
+            "skipped_frames": self.skipped_frames,
+            "total_absent_seconds": round(absent_seconds, 1),
+            "last_foreground_fraction": round(self.last_foreground, 3)
+            if self.last_foreground is not None else None
+        }
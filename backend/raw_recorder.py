@@ -0,0 +1,310 @@
+"""
+Ham Renk + Derinlik Kayıt Modülü
+Analizörü sonradan ayarlamak için kameranın gördüğünü kaydeder
+
+Dosya düzeni (.pkraw):
+    [başlık]   MAGIC | meta uzunluğu (u32) | meta JSON (çözünürlük, intrinsics, derinlik skalası)
+    [kareler]  FRAME_MAGIC | frame no | zaman damgası | renk uzunluğu | derinlik uzunluğu | JPEG | zlib(z16)
+    [indeks]   her kare için (veri ofseti, frame no, zaman damgası, renk uzunluğu, derinlik uzunluğu)
+    [kuyruk]   indeks ofseti | kare sayısı | INDEX_MAGIC
+
+Kuyruk yoksa (ör. yarıda kesilen kayıt) indeks kareler taranarak yeniden kurulur.
+"""
+
+import cv2
+import numpy as np
+import json
+import mmap
+import os
+import queue
+import struct
+import threading
+import time
+import zlib
+from typing import Optional, Dict, Any, List, Iterator, Tuple
+
+from session_recorder import prune_recordings, cleanup_session_dirs
+
+
+MAGIC = b"PKRAW\x00\x01\x00"
+FRAME_MAGIC = b"FRM0"
+INDEX_MAGIC = b"PKRAWIDX"
+
+_META_LEN = struct.Struct("<I")
+_FRAME_HEADER = struct.Struct("<4sQdII")   # magic, frame no, zaman, renk boyu, derinlik boyu
+_INDEX_ENTRY = struct.Struct("<QQdII")     # veri ofseti, frame no, zaman, renk boyu, derinlik boyu
+_TRAILER = struct.Struct("<QI8s")          # indeks ofseti, kare sayısı, magic
+
+# Okuma tarafında indeks doğrudan NumPy yapısal dizisi olarak eşlenir
+_INDEX_DTYPE = np.dtype([
+    ("offset", "<u8"),
+    ("frame_number", "<u8"),
+    ("timestamp", "<f8"),
+    ("color_len", "<u4"),
+    ("depth_len", "<u4"),
+])
+
+
+class RawFrameRecorder:
+    """
+    Senkron renk (JPEG) ve derinlik (kayıpsız zlib, 16-bit) karelerini yazar
+    Sıkıştırma ve disk yazımı yakalama thread'i dışında yapılır
+
+    Ham kayıtlar videodan çok daha büyüktür (tam hızda saatte onlarca GB); bu yüzden
+    video parçalarından ayrı bir yaş/boyut bütçesi vardır. retention_dir verilirse
+    kayıt başlarken altındaki .pkraw dosyalarına bu bütçe uygulanır.
+    """
+
+    def __init__(self, path: str, width: int, height: int,
+                 intrinsics: Optional[Dict[str, Any]] = None,
+                 depth_scale: Optional[float] = None,
+                 jpeg_quality: int = 90, queue_size: int = 16,
+                 retention_dir: Optional[str] = None, max_total_mb: float = 20480.0,
+                 max_age_days: float = 3.0):
+        self.path = path
+        self.width = width
+        self.height = height
+        self.jpeg_quality = jpeg_quality
+        self.retention_dir = retention_dir
+        self.max_total_bytes = int(max_total_mb * 1024 * 1024)
+        self.max_age_seconds = max_age_days * 24 * 3600
+        self.meta = {
+            "width": width,
+            "height": height,
+            "depth_scale": depth_scale,
+            "intrinsics": intrinsics or {},
+            "created_at": time.strftime("%Y-%m-%d %H:%M:%S")
+        }
+
+        self.is_recording = False
+        self._queue: "queue.Queue[Optional[tuple]]" = queue.Queue(maxsize=queue_size)
+        self._thread: Optional[threading.Thread] = None
+        self._file = None
+        self._index: List[Tuple[int, int, float, int, int]] = []
+
+        self.frames_written = 0
+        self.frames_dropped = 0
+
+    def start(self):
+        """Dosyayı aç ve yazıcı thread'ini başlat"""
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._apply_retention()
+        self._file = open(self.path, "wb")
+
+        meta = json.dumps(self.meta).encode("utf-8")
+        self._file.write(MAGIC)
+        self._file.write(_META_LEN.pack(len(meta)))
+        self._file.write(meta)
+
+        self._index = []
+        self.frames_written = 0
+        self.frames_dropped = 0
+        self.is_recording = True
+        self._thread = threading.Thread(target=self._run, name="raw-recorder", daemon=True)
+        self._thread.start()
+        print(f"💾 Ham kayıt başlatıldı: {self.path}")
+
+    def submit(self, color_image: np.ndarray, depth_image: np.ndarray,
+               frame_number: int = 0, timestamp: Optional[float] = None) -> bool:
+        """
+        Ham kareyi kuyruğa ekle
+        Kamera tamponları yeniden kullanıldığı için kopyalanır; kuyruk doluysa atılır
+        """
+        if not self.is_recording:
+            return False
+        if timestamp is None:
+            timestamp = time.time()
+        try:
+            self._queue.put_nowait((color_image.copy(), depth_image.copy(), frame_number, timestamp))
+        except queue.Full:
+            self.frames_dropped += 1
+            return False
+        return True
+
+    def stop(self):
+        """Kuyruğu boşalt, indeksi yaz ve dosyayı kapat"""
+        if not self.is_recording:
+            return
+        self.is_recording = False
+        self._queue.put(None)
+        if self._thread:
+            self._thread.join(timeout=10.0)
+            self._thread = None
+        print(f"💾 Ham kayıt durduruldu: {self.path} "
+              f"({self.frames_written} kare, {self.frames_dropped} atıldı)")
+
+    def get_status(self) -> Dict[str, Any]:
+        return {
+            "recording": self.is_recording,
+            "path": self.path,
+            "frames_written": self.frames_written,
+            "frames_dropped": self.frames_dropped,
+            "queue_size": self._queue.qsize()
+        }
+
+    def _apply_retention(self):
+        """Yaşı veya toplam boyutu aşan en eski ham kayıtları sil (bu kayıt hariç)"""
+        if self.retention_dir is None:
+            return
+        removed = prune_recordings(self.retention_dir, lambda name: name.endswith(".pkraw"),
+                                   self.max_total_bytes, self.max_age_seconds, [self.path])
+        cleanup_session_dirs(self.retention_dir, removed,
+                             active_dir=os.path.dirname(self.path))
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            try:
+                self._write_frame(*item)
+            except Exception as e:
+                print(f"❌ Ham kayıt yazma hatası: {e}")
+        self._finish()
+
+    def _write_frame(self, color_image: np.ndarray, depth_image: np.ndarray,
+                     frame_number: int, timestamp: float):
+        ok, jpeg = cv2.imencode('.jpg', color_image, [cv2.IMWRITE_JPEG_QUALITY, self.jpeg_quality])
+        if not ok:
+            return
+        depth = zlib.compress(np.ascontiguousarray(depth_image, dtype=np.uint16).tobytes(), 1)
+
+        header = _FRAME_HEADER.pack(FRAME_MAGIC, frame_number, timestamp, len(jpeg), len(depth))
+        offset = self._file.tell() + _FRAME_HEADER.size
+        self._file.write(header)
+        self._file.write(jpeg.tobytes())
+        self._file.write(depth)
+
+        self._index.append((offset, frame_number, timestamp, len(jpeg), len(depth)))
+        self.frames_written += 1
+
+    def _finish(self):
+        index_offset = self._file.tell()
+        for entry in self._index:
+            self._file.write(_INDEX_ENTRY.pack(*entry))
+        self._file.write(_TRAILER.pack(index_offset, len(self._index), INDEX_MAGIC))
+        self._file.close()
+        self._file = None
+
+
+class RawRecordingReader:
+    """
+    .pkraw dosyasını bellek eşlemeli (mmap) okur
+    Kareler indeks üzerinden rastgele erişilir; sadece istenen kare çözülür
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._fh = open(path, "rb")
+        self._mm = mmap.mmap(self._fh.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if self._mm[:len(MAGIC)] != MAGIC:
+            self.close()
+            raise ValueError(f"Geçersiz kayıt dosyası: {path}")
+
+        pos = len(MAGIC)
+        (meta_len,) = _META_LEN.unpack_from(self._mm, pos)
+        pos += _META_LEN.size
+        self.meta: Dict[str, Any] = json.loads(self._mm[pos:pos + meta_len].decode("utf-8"))
+        self._data_start = pos + meta_len
+
+        self.width = self.meta["width"]
+        self.height = self.meta["height"]
+        self._index = self._load_index()
+
+    @property
+    def intrinsics(self) -> Dict[str, Any]:
+        return self.meta.get("intrinsics", {})
+
+    @property
+    def depth_scale(self) -> Optional[float]:
+        return self.meta.get("depth_scale")
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def __getitem__(self, i: int) -> Dict[str, Any]:
+        return self.read_frame(i)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _load_index(self) -> np.ndarray:
+        size = len(self._mm)
+        if size >= _TRAILER.size:
+            index_offset, count, magic = _TRAILER.unpack_from(self._mm, size - _TRAILER.size)
+            if magic == INDEX_MAGIC:
+                return np.frombuffer(self._mm, dtype=_INDEX_DTYPE, count=count, offset=index_offset).copy()
+        return self._scan_index(size)
+
+    def _scan_index(self, size: int) -> np.ndarray:
+        """Kuyruk yoksa kareleri baştan tarayarak indeksi kur"""
+        entries = []
+        pos = self._data_start
+        while pos + _FRAME_HEADER.size <= size:
+            magic, frame_number, timestamp, color_len, depth_len = _FRAME_HEADER.unpack_from(self._mm, pos)
+            if magic != FRAME_MAGIC:
+                break
+            offset = pos + _FRAME_HEADER.size
+            if offset + color_len + depth_len > size:
+                break  # Yarım yazılmış son kare
+            entries.append((offset, frame_number, timestamp, color_len, depth_len))
+            pos = offset + color_len + depth_len
+        return np.array(entries, dtype=_INDEX_DTYPE)
+
+    @property
+    def timestamps(self) -> np.ndarray:
+        return self._index["timestamp"]
+
+    def find_frame(self, timestamp: float) -> int:
+        """Verilen zamana en yakın (önceki) karenin sırasını bul"""
+        i = int(np.searchsorted(self._index["timestamp"], timestamp, side="right")) - 1
+        return max(0, min(i, len(self._index) - 1))
+
+    def color_jpeg(self, i: int) -> memoryview:
+        """Çözülmemiş JPEG baytları (kopyasız)"""
+        entry = self._index[i]
+        start = int(entry["offset"])
+        return memoryview(self._mm)[start:start + int(entry["color_len"])]
+
+    def read_color(self, i: int) -> np.ndarray:
+        entry = self._index[i]
+        data = np.frombuffer(self._mm, dtype=np.uint8, count=int(entry["color_len"]),
+                             offset=int(entry["offset"]))
+        return cv2.imdecode(data, cv2.IMREAD_COLOR)
+
+    def read_depth(self, i: int) -> np.ndarray:
+        entry = self._index[i]
+        start = int(entry["offset"]) + int(entry["color_len"])
+        raw = zlib.decompress(self._mm[start:start + int(entry["depth_len"])])
+        return np.frombuffer(raw, dtype=np.uint16).reshape(self.height, self.width)
+
+    def read_frame(self, i: int, color: bool = True, depth: bool = True) -> Dict[str, Any]:
+        if i < 0:
+            i += len(self._index)
+        if not 0 <= i < len(self._index):
+            raise IndexError(i)
+        entry = self._index[i]
+        return {
+            "index": i,
+            "frame_number": int(entry["frame_number"]),
+            "timestamp": float(entry["timestamp"]),
+            "color": self.read_color(i) if color else None,
+            "depth": self.read_depth(i) if depth else None
+        }
+
+    def iter_frames(self, start: int = 0, stop: Optional[int] = None, step: int = 1,
+                    color: bool = True, depth: bool = True) -> Iterator[Dict[str, Any]]:
+        """Kareleri sırayla dolaş; sadece istenen kanallar çözülür"""
+        for i in range(*slice(start, stop, step).indices(len(self._index))):
+            yield self.read_frame(i, color=color, depth=depth)
+
+    def close(self):
+        try:
+            self._mm.close()
+        except BufferError:
+            pass  # Dışarıda hâlâ kopyasız görünümler var; GC kapatacak
+        self._fh.close()
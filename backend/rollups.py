@@ -0,0 +1,182 @@
+"""
+Oturum Özetleri (Rollup) Modülü
+Tamamlanan oturumları gün / hafta / ay bazında önceden toplar
+"""
+
+import datetime
+import threading
+from typing import Optional, Dict, Any, List, Iterable
+from dataclasses import dataclass, field
+
+from posture_sketch import DepthDiffDistribution
+
+
+ROLLUP_PERIODS = ("day", "week", "month")
+
+
+def parse_completed_at(result: Dict[str, Any]) -> Optional[datetime.date]:
+    """Oturum sonucundaki 'completed_at' alanını tarihe çevir"""
+    completed_at = result.get("completed_at")
+    if not completed_at:
+        return None
+    try:
+        return datetime.datetime.strptime(completed_at, "%Y-%m-%d %H:%M:%S").date()
+    except ValueError:
+        return None
+
+
+def period_key(period: str, day: datetime.date) -> str:
+    """Tarihin ait olduğu dönem anahtarını döndür"""
+    if period == "day":
+        return day.isoformat()
+    if period == "week":
+        year, week, _ = day.isocalendar()
+        return f"{year}-W{week:02d}"
+    if period == "month":
+        return f"{day.year}-{day.month:02d}"
+    raise ValueError(f"Geçersiz dönem: {period}")
+
+
+def period_start(period: str, day: datetime.date) -> datetime.date:
+    """Dönemin ilk gününü döndür"""
+    if period == "day":
+        return day
+    if period == "week":
+        return day - datetime.timedelta(days=day.weekday())
+    if period == "month":
+        return day.replace(day=1)
+    raise ValueError(f"Geçersiz dönem: {period}")
+
+
+@dataclass
+class RollupBucket:
+    """Tek bir dönemin toplam değerleri"""
+    key: str
+    start_date: str
+    session_count: int = 0
+    total_time: float = 0.0         # saniye
+    good_posture_time: float = 0.0  # saniye
+    bad_posture_time: float = 0.0   # saniye
+    warning_count: int = 0
+    score_sum: float = 0.0
+    depth_diff: DepthDiffDistribution = field(default_factory=DepthDiffDistribution)
+
+    def add(self, result: Dict[str, Any]):
+        """Bir oturum sonucunu bu döneme ekle"""
+        self.session_count += 1
+        self.total_time += result.get("total_duration", 0.0)
+        self.good_posture_time += result.get("good_posture_time", 0.0)
+        self.bad_posture_time += result.get("bad_posture_time", 0.0)
+        self.warning_count += result.get("warning_count", 0)
+        self.score_sum += result.get("posture_score", 0)
+        if result.get("depth_diff"):
+            self.depth_diff.merge(DepthDiffDistribution.from_dict(result["depth_diff"]))
+
+    def to_dict(self) -> Dict[str, Any]:
+        mean_score = self.score_sum / self.session_count if self.session_count else 0.0
+        return {
+            "key": self.key,
+            "start_date": self.start_date,
+            "session_count": self.session_count,
+            "total_time": round(self.total_time, 1),
+            "good_posture_time": round(self.good_posture_time, 1),
+            "bad_posture_time": round(self.bad_posture_time, 1),
+            "warning_count": self.warning_count,
+            "mean_score": round(mean_score, 1),
+            "depth_diff": {
+                **self.depth_diff.summary(),
+                "histogram": self.depth_diff.histogram.to_dict()
+            }
+        }
+
+
+class RollupStore:
+    """
+    Gün / hafta / ay bazında materyalize edilmiş özetler
+    Oturum bittiğinde güncellenir, sorgular geçmişin uzunluğundan bağımsızdır
+
+    Yeniden oluşturma yeni bir sözlükte yapılır ve kilit altında tek seferde
+    yerine konur; bu sırada gelen sorgular eski (tam) özetleri görür
+    """
+
+    def __init__(self):
+        self.buckets: Dict[str, Dict[str, RollupBucket]] = {p: {} for p in ROLLUP_PERIODS}
+        self._lock = threading.Lock()
+        # Yeniden oluşturma sürerken eklenen oturumlar (yeni özetlere de eklenir)
+        self._pending: Optional[List[Dict[str, Any]]] = None
+
+    @staticmethod
+    def _add_to(buckets: Dict[str, Dict[str, RollupBucket]], result: Dict[str, Any]):
+        day = parse_completed_at(result)
+        if day is None:
+            return
+
+        for period in ROLLUP_PERIODS:
+            key = period_key(period, day)
+            bucket = buckets[period].get(key)
+            if bucket is None:
+                bucket = RollupBucket(
+                    key=key,
+                    start_date=period_start(period, day).isoformat()
+                )
+                buckets[period][key] = bucket
+            bucket.add(result)
+
+    def add(self, result: Dict[str, Any]):
+        """Tamamlanan oturumu tüm dönem özetlerine ekle"""
+        with self._lock:
+            self._add_to(self.buckets, result)
+            if self._pending is not None:
+                self._pending.append(result)
+
+    def begin_rebuild(self):
+        """
+        Bundan sonra eklenen oturumları yeniden oluşturma için kaydetmeye başla
+        Geçmişin anlık görüntüsüyle aynı anda (aynı kilit altında) çağrılmalıdır
+        """
+        with self._lock:
+            self._pending = []
+
+    def rebuild(self, history: Iterable[Dict[str, Any]]):
+        """
+        Özetleri ham oturum geçmişinden yeniden oluştur
+        begin_rebuild çağrılmadıysa geçmişin dolaşma sırasında değişmediği varsayılır
+        """
+        buckets: Dict[str, Dict[str, RollupBucket]] = {p: {} for p in ROLLUP_PERIODS}
+        for result in history:
+            self._add_to(buckets, result)
+
+        with self._lock:
+            for result in self._pending or ():
+                self._add_to(buckets, result)
+            self._pending = None
+            self.buckets = buckets
+
+    def query(self, period: str, start: Optional[datetime.date] = None,
+              end: Optional[datetime.date] = None) -> List[Dict[str, Any]]:
+        """
+        Tarih aralığındaki dönem özetlerini döndür
+        Aralık verilmezse tüm dönemler döner; sadece bitiş verilirse ilk dönemden
+        bitişe, sadece başlangıç verilirse başlangıçtan bugüne kadar
+        """
+        if period not in ROLLUP_PERIODS:
+            raise ValueError(f"Geçersiz dönem: {period}")
+
+        # Başlangıç verilmezse ilk dönemden, bitiş verilmezse bugüne kadar
+        first = ""
+        if start is not None:
+            try:
+                first = period_start(period, start).isoformat()
+            except OverflowError:
+                raise ValueError(f"Geçersiz tarih aralığı: {start} - {end}")
+        if end is None:
+            last = datetime.date.today().isoformat() if start is not None else None
+        else:
+            last = end.isoformat()
+
+        # Sadece mevcut dönemler taranır; maliyet aralığın genişliğine değil veri sayısına bağlıdır
+        with self._lock:
+            selected = [bucket for bucket in self.buckets[period].values()
+                        if first <= bucket.start_date and (last is None or bucket.start_date <= last)]
+            selected.sort(key=lambda bucket: bucket.start_date)
+            return [bucket.to_dict() for bucket in selected]
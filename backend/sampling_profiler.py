@@ -0,0 +1,163 @@
+"""
+Örneklemeli Profil Modülü
+Analiz döngüsünde zamanın nereye gittiğini dış araç bağlamadan ölçer
+
+- Sadece istendiğinde, belirtilen süre boyunca ayrı bir thread çalışır
+- Her `interval_ms`de sys._current_frames() ile tüm thread'lerin yığını okunur
+- Kapalıyken hiçbir kanca (sys.setprofile/settrace) kurulu değildir; maliyet sıfırdır
+- Çıktı: flamegraph.pl / speedscope uyumlu "collapsed stack" satırları
+  ("thread;dış;...;iç sayı") ve fonksiyon başına self/total örnek sayıları
+"""
+
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Optional, Dict, Any, List
+
+
+MAX_PROFILE_SECONDS = 60.0
+
+
+def _frame_label(code) -> str:
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class SamplingProfiler:
+    """Süreli, örneklemeli yığın profili (aynı anda tek profil)"""
+
+    def __init__(self, max_depth: int = 64):
+        self.max_depth = max_depth
+        self._thread: Optional[threading.Thread] = None
+        self._done = threading.Event()
+        self._result: Optional[Dict[str, Any]] = None
+        self._lock = threading.Lock()
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, seconds: float, interval_ms: float = 5.0,
+              threads: Optional[List[str]] = None) -> bool:
+        """
+        Profili arka planda başlat
+        threads: verilirse sadece adı bu parçalardan birini içeren thread'ler örneklenir
+        Zaten bir profil sürüyorsa False döner
+        """
+        if not 0 < seconds <= MAX_PROFILE_SECONDS:
+            raise ValueError(f"Süre 0-{MAX_PROFILE_SECONDS:.0f} saniye arasında olmalı")
+        if not 1 <= interval_ms <= 1000:
+            raise ValueError("Örnekleme aralığı 1-1000 ms arasında olmalı")
+
+        with self._lock:
+            if self.running:
+                return False
+            self._done.clear()
+            self._result = None
+            self._thread = threading.Thread(
+                target=self._run, args=(seconds, interval_ms / 1000, threads),
+                name="sampling-profiler", daemon=True)
+            self._thread.start()
+        return True
+
+    def wait(self, timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """Profil bitene kadar bekle ve sonucu döndür (süre dolarsa None)"""
+        self._done.wait(timeout)
+        return self._result
+
+    @property
+    def result(self) -> Optional[Dict[str, Any]]:
+        """Son tamamlanan profilin sonucu (sürüyorsa None)"""
+        return self._result if self._done.is_set() else None
+
+    def _run(self, seconds: float, interval: float, threads: Optional[List[str]]):
+        own_id = threading.get_ident()
+        stacks: Counter = Counter()
+        thread_samples: Counter = Counter()
+        samples = 0
+
+        started = time.perf_counter()
+        deadline = started + seconds
+        next_tick = started
+        try:
+            while True:
+                now = time.perf_counter()
+                if now >= deadline:
+                    break
+                if now < next_tick:
+                    time.sleep(next_tick - now)
+                next_tick += interval
+
+                names = {t.ident: t.name for t in threading.enumerate()}
+                for ident, frame in sys._current_frames().items():
+                    if ident == own_id:
+                        continue
+                    name = names.get(ident, f"thread-{ident}")
+                    if threads and not any(part in name for part in threads):
+                        continue
+
+                    labels = []
+                    while frame is not None and len(labels) < self.max_depth:
+                        labels.append(_frame_label(frame.f_code))
+                        frame = frame.f_back
+                    labels.append(name)
+                    labels.reverse()
+                    stacks[tuple(labels)] += 1
+                    thread_samples[name] += 1
+                samples += 1
+        finally:
+            self._result = self._summarize(stacks, thread_samples, samples,
+                                           time.perf_counter() - started, interval)
+            self._done.set()
+
+    @staticmethod
+    def _summarize(stacks: Counter, thread_samples: Counter, samples: int,
+                   duration: float, interval: float, top: int = 50) -> Dict[str, Any]:
+        self_counts: Counter = Counter()
+        total_counts: Counter = Counter()
+        for stack, count in stacks.items():
+            self_counts[stack[-1]] += count
+            # Özyinelemede fonksiyon aynı yığında bir kez sayılır
+            for label in set(stack[1:]):
+                total_counts[label] += count
+
+        stack_samples = sum(stacks.values()) or 1
+        functions = [
+            {
+                "function": label,
+                "self": self_counts[label],
+                "total": count,
+                "self_pct": round(100 * self_counts[label] / stack_samples, 1),
+                "total_pct": round(100 * count / stack_samples, 1)
+            }
+            for label, count in total_counts.most_common(top)
+        ]
+
+        return {
+            "duration_s": round(duration, 2),
+            "interval_ms": round(interval * 1000, 2),
+            "samples": samples,
+            "threads": dict(thread_samples),
+            "functions": functions,
+            "collapsed": "\n".join(
+                f"{';'.join(stack)} {count}" for stack, count in stacks.most_common())
+        }
+
+
+if __name__ == "__main__":
+    # Kendi kendini profille: meşgul bir thread ve uyuyan ana thread
+    def _busy():
+        end = time.time() + 1.0
+        while time.time() < end:
+            sum(i * i for i in range(1000))
+
+    worker = threading.Thread(target=_busy, name="busy")
+    profiler = SamplingProfiler()
+    profiler.start(0.5, interval_ms=2)
+    worker.start()
+    report = profiler.wait()
+    worker.join()
+    print(f"⏱️ {report['samples']} örnek, thread'ler: {report['threads']}")
+    for row in report["functions"][:5]:
+        print(f"  {row['total_pct']:5.1f}% total  {row['self_pct']:5.1f}% self  {row['function']}")
@@ -3,12 +3,23 @@ Oturum Yönetimi Modülü
 Çalışma oturumlarını ve istatistiklerini yönetir
 """
 
+import datetime
+import threading
 import time
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Iterator, Callable, Tuple
 from dataclasses import dataclass, field
 from enum import Enum
 import json
 
+from rollups import RollupStore
+from posture_sketch import DepthDiffDistribution
+from posture_metrics import MetricAccumulator
+from posture_timeline import SegmentTimeline, STATUS_GOOD, STATUS_BAD
+from history_store import (
+    RetentionPolicy, HistoryArchive, HistoryCompactor, compact_result, result_age_days,
+    downsample_timeline
+)
+
 
 class SessionStatus(str, Enum):
     IDLE = "idle"
@@ -17,20 +28,39 @@ class SessionStatus(str, Enum):
     COMPLETED = "completed"
 
 
+# Kare döngüsü bundan uzun takılırsa aradaki süre bilinmeyen duruma yazılır
+MAX_FRAME_GAP = 1.0
+
+# Sonuçtaki sabit çözünürlüklü zaman çizelgesinin nokta sayısı
+RESULT_TIMELINE_POINTS = 120
+
+
 @dataclass
 class PostureStats:
     """Postür istatistikleri"""
-    good_posture_time: float = 0.0  # saniye
-    bad_posture_time: float = 0.0   # saniye
     warning_count: int = 0
-    timeline: List[Dict[str, Any]] = field(default_factory=list)  # Zaman çizelgesi
+    # Durum bölütleri; iyi/kötü süreler buradan türetilir
+    timeline: SegmentTimeline = field(default_factory=SegmentTimeline)
+    # depth_diff dağılımı (her karede güncellenir; kare başı mesaja eklenmez)
+    depth_diff: DepthDiffDistribution = field(default_factory=DepthDiffDistribution)
+    # Ek metriklerin süre/değer muhasebesi (ilk metrikli karede oluşturulur)
+    metrics: Optional[MetricAccumulator] = None
+    
+    @property
+    def good_posture_time(self) -> float:
+        return self.timeline.total(STATUS_GOOD)
+    
+    @property
+    def bad_posture_time(self) -> float:
+        return self.timeline.total(STATUS_BAD)
     
     def to_dict(self) -> Dict[str, Any]:
+        # Kare başı mesajlara gider; bölütlerin kendisi /api/session/timeline'dadır
         return {
             "good_posture_time": round(self.good_posture_time, 1),
             "bad_posture_time": round(self.bad_posture_time, 1),
             "warning_count": self.warning_count,
-            "timeline": self.timeline
+            "segment_count": len(self.timeline)
         }
 
 
@@ -50,6 +80,13 @@ class Session:
     warning_threshold: float = 7.0  # 7 saniye
     warning_active: bool = False
     last_status: Optional[str] = None
+    last_elapsed: float = 0.0  # Son işlenen karenin geçen süresi
+    
+    # Duraklatma: duraklatılan süre geçen süreye ve istatistiklere sayılmaz
+    paused_at: Optional[float] = None
+    paused_seconds: float = 0.0
+    pause_reason: Optional[str] = None
+    pauses: List[Dict[str, Any]] = field(default_factory=list)
     
     def to_dict(self) -> Dict[str, Any]:
         elapsed = self.get_elapsed_time()
@@ -62,16 +99,25 @@ class Session:
             "remaining_time": round(remaining, 1),
             "status": self.status.value,
             "stats": self.stats.to_dict(),
+            "depth_diff": {
+                **self.stats.depth_diff.summary(),
+                "histogram": self.stats.depth_diff.histogram.to_dict()
+            },
+            "metrics": self.stats.metrics.to_dict() if self.stats.metrics else {},
             "warning_active": self.warning_active,
-            "bad_posture_seconds": round(self.current_bad_posture_seconds, 1)
+            "bad_posture_seconds": round(self.current_bad_posture_seconds, 1),
+            "pause_reason": self.pause_reason,
+            "paused_seconds": round(self.paused_seconds, 1)
         }
     
     def get_elapsed_time(self) -> float:
         """Geçen süreyi hesapla"""
         if self.status == SessionStatus.RUNNING:
-            return time.time() - self.start_time
+            return time.time() - self.start_time - self.paused_seconds
+        elif self.status == SessionStatus.PAUSED:
+            return self.paused_at - self.start_time - self.paused_seconds
         elif self.status == SessionStatus.COMPLETED:
-            return self.end_time - self.start_time
+            return self.end_time - self.start_time - self.paused_seconds
         return 0.0
     
     def get_remaining_time(self) -> float:
@@ -84,10 +130,25 @@ class Session:
 class SessionManager:
     """Oturum yöneticisi"""
     
-    def __init__(self):
+    def __init__(self, history_dir: Optional[str] = None,
+                 retention: Optional[RetentionPolicy] = None):
         self.current_session: Optional[Session] = None
         self.session_history: List[Dict[str, Any]] = []
         self._session_counter = 0
+        self.rollups = RollupStore()
+        
+        # Geçmiş saklama: eski oturumlar sıkıştırılır, sınırı aşanlar diske taşınır
+        # (history_dir verilmezse sınırı aşanlar sadece bellekten silinir, özetlerde kalır)
+        self.retention = retention or RetentionPolicy()
+        self.archive = HistoryArchive(history_dir) if history_dir else None
+        self._history_lock = threading.Lock()
+        self._rollup_rebuild_lock = threading.Lock()  # Aynı anda tek yeniden oluşturma
+        self._compactor = HistoryCompactor(self.compact_history, self.retention.interval_seconds)
+        
+        # Sürüm sayaçları: koşullu GET (ETag) ve long-poll için
+        self.state_version = 0    # Anlık oturum durumu her değiştiğinde artar
+        self.history_version = 0  # Geçmiş her değiştiğinde artar
+        self._listeners: List[Callable[[], None]] = []
         
     def start_session(self, duration_minutes: int, warning_threshold: float = 7.0) -> Session:
         """Yeni oturum başlat"""
@@ -102,6 +163,7 @@ class SessionManager:
             warning_threshold=warning_threshold
         )
         
+        self._bump()
         print(f"✅ Oturum başlatıldı: {session_id} ({duration_minutes} dakika)")
         return self.current_session
     
@@ -110,14 +172,21 @@ class SessionManager:
         if not self.current_session:
             return None
         
+        if self.current_session.status == SessionStatus.PAUSED:
+            self._close_pause(self.current_session)
         self.current_session.end_time = time.time()
         self.current_session.status = SessionStatus.COMPLETED
         
         # Sonuçları hesapla
         result = self._calculate_results()
         
-        # Geçmişe ekle
-        self.session_history.append(result)
+        # Geçmişe ekle (sıkıştırma arka planda yapılır)
+        # Özet de aynı kilit altında: yeniden oluşturma ile geçmiş görüntüsü tutarlı kalır
+        with self._history_lock:
+            self.session_history.append(result)
+            self.rollups.add(result)
+        self._bump(history=True)
+        self._compactor.wake()
         
         print(f"✅ Oturum tamamlandı: {self.current_session.id}")
         
@@ -126,38 +195,121 @@ class SessionManager:
         
         return session_result
     
-    def update_posture(self, status: Optional[str], frame_time: float = 1/30) -> Dict[str, Any]:
+    def pause_session(self, reason: str) -> bool:
+        """
+        Çalışan oturumu duraklat (ör. kamera takıldığında veya kullanıcı mola verdiğinde)
+        Zaten duraklatılmışsa sadece neden güncellenir; duraklama tek aralık olarak sayılır
+        """
+        session = self.current_session
+        if session and session.status == SessionStatus.PAUSED:
+            if session.pause_reason != reason:
+                session.pause_reason = reason
+                self._bump()
+            return True
+        if not session or session.status != SessionStatus.RUNNING:
+            return False
+        
+        session.paused_at = time.time()
+        session.pause_reason = reason
+        session.status = SessionStatus.PAUSED
+        
+        # Son kareden duraklamaya kadar geçen süre son duruma yazılır, sonra seri kesilir
+        paused_at = session.get_elapsed_time()
+        if paused_at > session.last_elapsed:
+            session.stats.timeline.add(session.last_status, session.last_elapsed, paused_at)
+        session.stats.timeline.add_break(paused_at)
+        session.last_elapsed = paused_at
+        
+        # Duraklama kötü postür süresine sayılmasın
+        session.bad_posture_start = None
+        session.current_bad_posture_seconds = 0.0
+        session.warning_active = False
+        
+        self._bump()
+        print(f"⏸️ Oturum duraklatıldı: {session.id} ({reason})")
+        return True
+    
+    def resume_session(self) -> bool:
+        """Duraklatılmış oturumu devam ettir"""
+        session = self.current_session
+        if not session or session.status != SessionStatus.PAUSED:
+            return False
+        
+        duration = self._close_pause(session)
+        session.status = SessionStatus.RUNNING
+        
+        self._bump()
+        print(f"▶️ Oturum devam ediyor: {session.id} ({duration:.1f}s duraklama)")
+        return True
+    
+    def _close_pause(self, session: Session) -> float:
+        """Süren duraklamayı kapat ve süresini oturumdan düş"""
+        duration = time.time() - session.paused_at
+        session.pauses.append({
+            "reason": session.pause_reason,
+            "at": round(session.get_elapsed_time(), 1),
+            "duration": round(duration, 1)
+        })
+        session.paused_seconds += duration
+        session.paused_at = None
+        session.pause_reason = None
+        return duration
+    
+    def get_pause_reason(self) -> Optional[str]:
+        """Oturum duraklatılmışsa nedenini döndür"""
+        if self.current_session and self.current_session.status == SessionStatus.PAUSED:
+            return self.current_session.pause_reason
+        return None
+    
+    def sync_camera_pause(self, stalled: bool):
+        """Kamera takıldıysa oturumu duraklat, kare akışı geri gelince devam ettir"""
+        if stalled:
+            if self.is_session_active() and not self.is_session_paused():
+                self.pause_session("camera_stall")
+        elif self.get_pause_reason() == "camera_stall":
+            self.resume_session()
+    
+    def update_posture(self, status: Optional[str], frame_time: float = 1/30,
+                       depth_diff: Optional[float] = None,
+                       metrics: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """
         Postür durumunu güncelle
-        Her frame'de çağrılır
+        Her frame'de çağrılır; kare süresi önceki çağrıdan bu yana geçen süredir.
+        frame_time sadece döngü takıldığında son kareye yazılacak süredir.
         """
         if not self.current_session or self.current_session.status != SessionStatus.RUNNING:
             return {}
         
         session = self.current_session
-        current_time = time.time()
         
         # Süre doldu mu kontrol et
         if session.get_remaining_time() <= 0:
             return self.stop_session()
         
+        # Kare, önceki kareden bu yana geçen süreyi kapsar (duraklamalar hariç).
+        # Döngü takıldıysa boşluk bilinmeyen sayılır, durum sadece son kareye yazılır.
+        elapsed = session.get_elapsed_time()
+        frame_start = session.last_elapsed
+        if elapsed - frame_start > MAX_FRAME_GAP:
+            frame_start = elapsed - frame_time
+            session.stats.timeline.add(None, session.last_elapsed, frame_start)
+        session.stats.timeline.add(status, frame_start, elapsed, depth_diff)
+        session.last_elapsed = elapsed
+        frame_time = elapsed - frame_start
+        
         # Postür istatistiklerini güncelle
         if status == "IYI":
-            session.stats.good_posture_time += frame_time
-            
             # Kötü postür sayacını sıfırla
             session.bad_posture_start = None
             session.current_bad_posture_seconds = 0.0
             session.warning_active = False
             
         elif status == "KOTU":
-            session.stats.bad_posture_time += frame_time
-            
-            # Kötü postür süresini takip et
+            # Kötü postür süresini takip et (seri, ilk kötü karenin başında başlar)
             if session.bad_posture_start is None:
-                session.bad_posture_start = current_time
+                session.bad_posture_start = frame_start
             
-            session.current_bad_posture_seconds = current_time - session.bad_posture_start
+            session.current_bad_posture_seconds = elapsed - session.bad_posture_start
             
             # Uyarı kontrolü
             if session.current_bad_posture_seconds >= session.warning_threshold:
@@ -168,15 +320,18 @@ class SessionManager:
             else:
                 session.warning_active = False
         
-        # Timeline'a ekle (her 5 saniyede bir)
-        elapsed = session.get_elapsed_time()
-        if len(session.stats.timeline) == 0 or elapsed - session.stats.timeline[-1].get("time", 0) >= 5:
-            session.stats.timeline.append({
-                "time": round(elapsed, 1),
-                "status": status or "UNKNOWN"
-            })
+        # Geçerli ölçümleri dağılım özetine ekle (O(1))
+        if status is not None and depth_diff is not None:
+            session.stats.depth_diff.add(depth_diff)
+        
+        # Ek metrikler (sütun biçimi: names, values, bad)
+        if metrics:
+            if session.stats.metrics is None or session.stats.metrics.names != metrics["names"]:
+                session.stats.metrics = MetricAccumulator(metrics["names"])
+            session.stats.metrics.update(metrics["values"], metrics["bad"], frame_time)
         
         session.last_status = status
+        self._bump()
         
         return {
             "warning_active": session.warning_active,
@@ -186,15 +341,155 @@ class SessionManager:
             "stats": session.stats.to_dict()
         }
     
+    def add_listener(self, callback: Callable[[], None]):
+        """Durum veya geçmiş değiştiğinde çağrılacak fonksiyonu kaydet"""
+        self._listeners.append(callback)
+    
+    def _bump(self, history: bool = False):
+        """Sürüm sayaçlarını artır ve dinleyicileri uyandır"""
+        self.state_version += 1
+        if history:
+            self.history_version += 1
+        for callback in self._listeners:
+            callback()
+    
     def get_current_stats(self) -> Optional[Dict[str, Any]]:
         """Anlık istatistikleri döndür"""
         if not self.current_session:
             return None
         return self.current_session.to_dict()
     
+    def get_timeline(self, session_id: Optional[str] = None,
+                     points: int = RESULT_TIMELINE_POINTS) -> Optional[Dict[str, Any]]:
+        """
+        Oturumun durum bölütleri ve sabit çözünürlüklü görünümü
+        session_id verilmezse (veya şu anki oturumsa) canlı oturum kullanılır
+        """
+        session = self.current_session
+        if session is not None and session_id in (None, session.id):
+            duration = session.get_elapsed_time()
+            return {
+                "session_id": session.id,
+                "duration": round(duration, 1),
+                "timeline": session.stats.timeline.render(points, duration),
+                "segments": session.stats.timeline.to_list()
+            }
+        
+        with self._history_lock:
+            result = next((r for r in reversed(self.session_history)
+                           if r.get("session_id") == session_id), None)
+        if result is None:
+            return None
+        
+        duration = result.get("total_duration", 0.0)
+        if "segments" in result:
+            timeline = SegmentTimeline.from_list(result["segments"]).render(points, duration)
+        else:
+            # Sıkıştırılmış (veya bölütlerden önceki) oturum: kayıtlı noktalar seyreltilir
+            timeline = downsample_timeline(result.get("timeline", []), points)
+        return {
+            "session_id": session_id,
+            "duration": duration,
+            "timeline": timeline,
+            "segments": result.get("segments", []),
+            "compacted": result.get("compacted", False)
+        }
+    
     def get_history(self) -> List[Dict[str, Any]]:
-        """Oturum geçmişini döndür"""
-        return self.session_history
+        """Bellekteki oturum geçmişini döndür (arşivlenenler hariç)"""
+        with self._history_lock:
+            return list(self.session_history)
+    
+    def iter_history(self) -> Iterator[Dict[str, Any]]:
+        """
+        Arşiv dahil tüm oturum geçmişini eskiden yeniye tek tek dolaş
+        Arşiv diskten akışla okunur; dolaşma sırasında eklenen veya
+        arşive taşınan oturumlar tekrar etmez
+        """
+        with self._history_lock:
+            snapshot = self._history_snapshot()
+        yield from self._iter_snapshot(*snapshot)
+    
+    def _history_snapshot(self) -> Tuple[List[Dict[str, Any]], int]:
+        """Bellekteki geçmişin kopyası ve arşivdeki oturum sayısı (kilit altında çağrılır)"""
+        return list(self.session_history), self.archive.count if self.archive else 0
+    
+    def _iter_snapshot(self, in_memory: List[Dict[str, Any]], archived: int) -> Iterator[Dict[str, Any]]:
+        if archived:
+            yield from self.archive.iter_results(limit=archived)
+        yield from in_memory
+    
+    def start_compactor(self):
+        """Arka plan sıkıştırma thread'ini başlat"""
+        self._compactor.start()
+    
+    def stop_compactor(self):
+        self._compactor.stop()
+    
+    def compact_history(self, now: Optional[datetime.datetime] = None) -> Dict[str, int]:
+        """
+        Saklama kurallarını uygula
+        Ağır iş (kopyalama, diske yazma) kilit dışında yapılır; kilit sadece
+        listeyi güncellerken kısa süre tutulur
+        """
+        policy = self.retention
+        now = now or datetime.datetime.now()
+        
+        with self._history_lock:
+            snapshot = list(self.session_history)
+        total = len(snapshot)
+        
+        # Arşive taşınacaklar: baştan itibaren sayı veya yaş sınırını aşanlar
+        archive_count = max(0, total - policy.max_memory_sessions)
+        while archive_count < total and result_age_days(snapshot[archive_count], now) > policy.max_memory_days:
+            archive_count += 1
+        
+        # Sıkıştırılacaklar: son N oturumda olmayan ve yeterince eski olanlar
+        compacted: Dict[int, Dict[str, Any]] = {}
+        for index in range(total - policy.full_detail_sessions):
+            result = snapshot[index]
+            if not result.get("compacted") and (
+                    index < archive_count or result_age_days(result, now) > policy.full_detail_days):
+                compacted[index] = compact_result(result, policy)
+        
+        if archive_count == 0 and not compacted:
+            return {"compacted": 0, "archived": 0}
+        
+        if archive_count and self.archive is not None:
+            try:
+                self.archive.append([compacted.get(i, snapshot[i]) for i in range(archive_count)])
+            except OSError as e:
+                print(f"⚠️ Geçmiş arşive yazılamadı: {e}")
+                archive_count = 0
+        
+        with self._history_lock:
+            # Bu arada sadece sona ekleme yapılmış olabilir; baştaki kayıtlar aynıdır
+            del self.session_history[:archive_count]
+            if self.archive is not None:
+                self.archive.count += archive_count
+            for index, result in compacted.items():
+                position = index - archive_count
+                if position >= 0 and self.session_history[position] is snapshot[index]:
+                    self.session_history[position] = result
+        
+        compacted_count = len([i for i in compacted if i >= archive_count])
+        if archive_count or compacted_count:
+            print(f"🗜️ Geçmiş sıkıştırıldı: {compacted_count} oturum özetlendi, "
+                  f"{archive_count} oturum arşive taşındı")
+            self._bump(history=True)
+        return {"compacted": compacted_count, "archived": archive_count}
+    
+    def rebuild_rollups(self):
+        """
+        Gün/hafta/ay özetlerini oturum geçmişinden yeniden hesapla
+        Geçmiş görüntüsü ve ekleme kaydı aynı kilit altında başlar: yeniden oluşturma
+        sırasında biten oturumlar ne kaybolur ne iki kez sayılır
+        """
+        with self._rollup_rebuild_lock:
+            with self._history_lock:
+                snapshot = self._history_snapshot()
+                self.rollups.begin_rebuild()
+            self.rollups.rebuild(self._iter_snapshot(*snapshot))
     
     def _calculate_results(self) -> Dict[str, Any]:
         """Oturum sonuçlarını hesapla"""
@@ -203,6 +498,7 @@ class SessionManager:
             return {}
         
         total_time = session.get_elapsed_time()
+        timeline = session.stats.timeline
         good_time = session.stats.good_posture_time
         bad_time = session.stats.bad_posture_time
         
@@ -221,13 +517,22 @@ class SessionManager:
             "bad_posture_time": round(bad_time, 1),
             "good_percentage": round(good_percentage, 1),
             "bad_percentage": round(100 - good_percentage, 1),
-            "warning_count": session.stats.warning_count,
+            "warning_count": timeline.count_warnings(session.warning_threshold),
             "posture_score": score,
-            "timeline": session.stats.timeline,
+            "timeline": timeline.render(RESULT_TIMELINE_POINTS, total_time),
+            "segments": timeline.to_list(),
+            "depth_diff": session.stats.depth_diff.to_dict(),
+            "metrics": session.stats.metrics.to_dict() if session.stats.metrics else {},
+            "paused_seconds": round(session.paused_seconds, 1),
+            "pauses": session.pauses,
             "completed_at": time.strftime("%Y-%m-%d %H:%M:%S")
         }
     
     def is_session_active(self) -> bool:
-        """Aktif oturum var mı kontrol et"""
-        return self.current_session is not None and self.current_session.status == SessionStatus.RUNNING
+        """Aktif (çalışan veya duraklatılmış) oturum var mı kontrol et"""
+        return self.current_session is not None and self.current_session.status in (
+            SessionStatus.RUNNING, SessionStatus.PAUSED)
+    
+    def is_session_paused(self) -> bool:
+        return self.current_session is not None and self.current_session.status == SessionStatus.PAUSED
 
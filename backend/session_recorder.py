@@ -0,0 +1,327 @@
+"""
+Oturum Video Kayıt Modülü
+İşaretlenmiş önizleme karelerini ayrı bir thread'de parça parça videoya yazar
+"""
+
+import cv2
+import numpy as np
+import json
+import os
+import queue
+import re
+import threading
+import time
+from typing import Optional, Dict, Any, List, Callable, Iterable
+
+
+# Desteklenen kapsayıcılar: uzantı -> fourcc
+VIDEO_CODECS = {
+    "avi": "MJPG",
+    "mp4": "mp4v",
+}
+
+# SessionManager'ın ürettiği oturum kimliği: session_<sayaç>_<unix zamanı>
+SESSION_ID_PATTERN = re.compile(r"session_\d+_\d+")
+
+
+def is_valid_session_id(session_id: str) -> bool:
+    """Kimlik kayıt dizini adı olarak güvenli mi (ayraç veya '..' içeremez)"""
+    return SESSION_ID_PATTERN.fullmatch(session_id) is not None
+
+
+class SessionVideoRecorder:
+    """
+    Oturum önizlemesini kaydeder
+
+    - Kareler sınırlı bir kuyruk üzerinden yazıcı thread'ine aktarılır
+    - Kuyruk doluysa kare atılır, yakalama döngüsü asla bloklanmaz
+    - Kayıt düşük FPS ile yapılır ve sabit süreli parçalara bölünür
+    - Toplam disk kullanımı retention sınırları ile tutulur
+    """
+
+    def __init__(self, output_dir: str = "recordings", fps: float = 10.0,
+                 segment_seconds: float = 60.0, container: str = "avi",
+                 queue_size: int = 8, max_total_mb: float = 2048.0,
+                 max_age_days: float = 14.0):
+        if container not in VIDEO_CODECS:
+            raise ValueError(f"Desteklenmeyen video formatı: {container}")
+
+        self.output_dir = output_dir
+        self.fps = fps
+        self.segment_seconds = segment_seconds
+        self.container = container
+        self.max_total_bytes = int(max_total_mb * 1024 * 1024)
+        self.max_age_seconds = max_age_days * 24 * 3600
+
+        self.session_id: Optional[str] = None
+        self.session_start: float = 0.0
+        self.is_recording = False
+
+        self._queue: "queue.Queue[Optional[tuple]]" = queue.Queue(maxsize=queue_size)
+        self._thread: Optional[threading.Thread] = None
+        self._last_accepted = -1.0
+
+        # Yazıcı thread'inin durumu
+        self._writer = None
+        self._segment: Optional[Dict[str, Any]] = None
+        self.segments: List[Dict[str, Any]] = []
+
+        # İstatistikler
+        self.frames_written = 0
+        self.frames_dropped = 0
+
+    # ---- Yakalama tarafı (frame döngüsü) ----
+
+    def start(self, session_id: str):
+        """Yeni oturum kaydını başlat"""
+        if self.is_recording:
+            self.stop()
+
+        self.session_id = session_id
+        self.session_start = time.time()
+        self.segments = []
+        self.frames_written = 0
+        self.frames_dropped = 0
+        self._last_accepted = -1.0
+
+        os.makedirs(self._session_dir(), exist_ok=True)
+        self._apply_retention()
+
+        self.is_recording = True
+        self._thread = threading.Thread(target=self._run, name="video-recorder", daemon=True)
+        self._thread.start()
+        print(f"🎥 Video kaydı başlatıldı: {session_id} ({self.fps} FPS)")
+
+    def submit(self, frame: np.ndarray, timestamp: Optional[float] = None) -> bool:
+        """
+        İşlenmiş kareyi kayda gönder
+        Hedef FPS'e göre seyreltir; kuyruk doluysa kareyi atar
+        """
+        if not self.is_recording:
+            return False
+
+        session_time = (timestamp if timestamp is not None else time.time()) - self.session_start
+        if self._last_accepted >= 0 and session_time - self._last_accepted < 1.0 / self.fps:
+            return False
+
+        try:
+            # Kare tamponu sonraki frame'de yeniden kullanılabilir, kopyala
+            self._queue.put_nowait((frame.copy(), session_time))
+        except queue.Full:
+            self.frames_dropped += 1
+            return False
+
+        self._last_accepted = session_time
+        return True
+
+    def stop(self) -> List[Dict[str, Any]]:
+        """Kaydı durdur, kuyruğu boşalt ve parça indeksini döndür"""
+        if not self.is_recording:
+            return self.segments
+
+        self.is_recording = False
+        self._queue.put(None)  # Yazıcı thread'ine bitiş sinyali
+        if self._thread:
+            self._thread.join(timeout=5.0)
+            self._thread = None
+
+        print(f"🎥 Video kaydı durduruldu: {self.session_id} "
+              f"({self.frames_written} kare, {self.frames_dropped} atıldı)")
+        return self.segments
+
+    def get_status(self) -> Dict[str, Any]:
+        """Kayıt durumunu döndür"""
+        return {
+            "recording": self.is_recording,
+            "session_id": self.session_id,
+            "fps": self.fps,
+            "segment_seconds": self.segment_seconds,
+            "frames_written": self.frames_written,
+            "frames_dropped": self.frames_dropped,
+            "queue_size": self._queue.qsize(),
+            "segments": self.segments
+        }
+
+    # ---- Yazıcı thread'i ----
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+
+            frame, session_time = item
+            try:
+                self._write(frame, session_time)
+            except Exception as e:
+                print(f"❌ Video yazma hatası: {e}")
+
+        self._close_segment()
+        self._write_index()
+
+    def _write(self, frame: np.ndarray, session_time: float):
+        segment = self._segment
+        if segment is None or session_time - segment["start_time"] >= self.segment_seconds:
+            self._close_segment()
+            self._open_segment(frame, session_time)
+            segment = self._segment
+
+        self._writer.write(frame)
+        segment["end_time"] = round(session_time, 2)
+        segment["frames"] += 1
+        self.frames_written += 1
+
+    def _open_segment(self, frame: np.ndarray, session_time: float):
+        index = len(self.segments)
+        filename = f"segment_{index:04d}.{self.container}"
+        path = os.path.join(self._session_dir(), filename)
+
+        h, w = frame.shape[:2]
+        fourcc = cv2.VideoWriter_fourcc(*VIDEO_CODECS[self.container])
+        self._writer = cv2.VideoWriter(path, fourcc, self.fps, (w, h))
+
+        # Parçalar oturum zaman çizelgesine göre indekslenir
+        self._segment = {
+            "file": filename,
+            "start_time": round(session_time, 2),
+            "end_time": round(session_time, 2),
+            "frames": 0
+        }
+
+    def _close_segment(self):
+        if self._writer is not None:
+            self._writer.release()
+            self._writer = None
+        if self._segment is not None:
+            self.segments.append(self._segment)
+            self._segment = None
+            self._write_index()
+            self._apply_retention()
+
+    def _write_index(self):
+        if not self.session_id:
+            return
+        index = {
+            "session_id": self.session_id,
+            "session_start": self.session_start,
+            "fps": self.fps,
+            "segments": self.segments
+        }
+        path = os.path.join(self._session_dir(), "index.json")
+        with open(path, "w") as f:
+            json.dump(index, f, indent=2)
+
+    def _session_dir(self) -> str:
+        return os.path.join(self.output_dir, self.session_id or "unknown")
+
+    def _apply_retention(self):
+        """Yaşı veya toplam boyutu aşan en eski parçaları sil, indeksleri güncelle"""
+        # Yazılmakta olan parçaya dokunma
+        keep = []
+        if self._segment is not None:
+            keep.append(os.path.join(self._session_dir(), self._segment["file"]))
+
+        removed = prune_recordings(self.output_dir, lambda name: name.startswith("segment_"),
+                                   self.max_total_bytes, self.max_age_seconds, keep)
+        if not removed:
+            return
+
+        # Aktif oturumun indeksi bellekteki listeden yazılır
+        session_dir = self._session_dir()
+        if any(os.path.dirname(path) == session_dir for path in removed):
+            self.segments = [segment for segment in self.segments
+                             if os.path.exists(os.path.join(session_dir, segment["file"]))]
+            self._write_index()
+        cleanup_session_dirs(self.output_dir, removed, active_dir=session_dir)
+
+
+def prune_recordings(output_dir: str, is_target: Callable[[str], bool],
+                     max_total_bytes: int, max_age_seconds: float,
+                     keep: Iterable[str] = ()) -> List[str]:
+    """
+    Hedef dosyalardan yaşı aşanları ve toplam boyut sınırına inene kadar en eskileri sil
+    keep: silinmeyecek yollar (ör. yazılmakta olan dosya); silinen yolları döndürür
+    """
+    if not os.path.isdir(output_dir):
+        return []
+
+    keep = {os.path.abspath(path) for path in keep}
+    files = []
+    for root, _, names in os.walk(output_dir):
+        for name in names:
+            if not is_target(name):
+                continue
+            path = os.path.join(root, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, path))
+
+    files.sort()
+    now = time.time()
+    total = sum(size for _, size, _ in files)
+
+    removed = []
+    for mtime, size, path in files:
+        too_old = now - mtime > max_age_seconds
+        if not too_old and total <= max_total_bytes:
+            break
+        if os.path.abspath(path) in keep:
+            continue
+        try:
+            os.remove(path)
+            total -= size
+            removed.append(path)
+            print(f"🗑️ Eski kayıt silindi: {path}")
+        except OSError:
+            pass
+    return removed
+
+
+def cleanup_session_dirs(output_dir: str, removed: Iterable[str], active_dir: Optional[str] = None):
+    """
+    Dosyası silinen oturumların index.json'undan artık olmayan parçaları çıkar
+    Kaydı kalmayan oturum dizinleri (aktif olan hariç) tamamen silinir
+    """
+    for session_dir in sorted({os.path.dirname(path) for path in removed}):
+        if os.path.dirname(os.path.abspath(session_dir)) != os.path.abspath(output_dir) \
+                or session_dir == active_dir:
+            continue
+
+        index_path = os.path.join(session_dir, "index.json")
+        if os.path.isfile(index_path):
+            try:
+                with open(index_path) as f:
+                    index = json.load(f)
+                segments = [segment for segment in index.get("segments", [])
+                            if os.path.exists(os.path.join(session_dir, segment["file"]))]
+                if len(segments) != len(index.get("segments", [])):
+                    index["segments"] = segments
+                    with open(index_path, "w") as f:
+                        json.dump(index, f, indent=2)
+            except (OSError, ValueError, KeyError) as e:
+                print(f"⚠️ Kayıt indeksi güncellenemedi ({index_path}): {e}")
+                continue
+
+        # Sadece (boş) indeks kaldıysa oturum dizinini kaldır
+        try:
+            remaining = [name for name in os.listdir(session_dir) if name != "index.json"]
+            if not remaining:
+                if os.path.isfile(index_path):
+                    os.remove(index_path)
+                os.rmdir(session_dir)
+                print(f"🗑️ Boş kayıt dizini silindi: {session_dir}")
+        except OSError:
+            pass
+
+
+def load_recording_index(output_dir: str, session_id: str) -> Optional[Dict[str, Any]]:
+    """Bir oturumun video parça indeksini oku (geçersiz kimlikte None: dizin dışına çıkılmaz)"""
+    if not is_valid_session_id(session_id):
+        return None
+    path = os.path.join(output_dir, session_id, "index.json")
+    if not os.path.isfile(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
@@ -0,0 +1,77 @@
+"""
+Test ortamı
+- backend/ modülleri düz (paketsiz) içe aktarıldığı için dizin sys.path'e eklenir
+- Kamera (pyrealsense2) ve MediaPipe kurulu değilse, analizörün içe aktarılabilmesi
+  için en küçük yer tutucu modüller yüklenir. Testler kareleri kendi sentetik
+  kaynaklarından ve sabit pozdan verir; gerçek cihaz veya model çağrılmaz
+"""
+
+import os
+import sys
+import types
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def _install_realsense_stub():
+    rs = types.ModuleType("pyrealsense2")
+    rs.stream = types.SimpleNamespace(depth="depth", color="color")
+    rs.format = types.SimpleNamespace(z16="z16", rgb8="rgb8")
+    rs.timestamp_domain = types.SimpleNamespace(hardware_clock=0, global_time=1, system_time=2)
+
+    class pipeline:
+        def start(self, *args):
+            raise RuntimeError("RealSense kurulu değil (test yer tutucusu)")
+
+    class config:
+        def enable_stream(self, *args):
+            pass
+
+    class align:
+        def __init__(self, align_to):
+            pass
+
+        def process(self, frames):
+            return frames
+
+    rs.pipeline, rs.config, rs.align = pipeline, config, align
+    sys.modules["pyrealsense2"] = rs
+
+
+def _install_mediapipe_stub():
+    mp = types.ModuleType("mediapipe")
+
+    class Pose:
+        def __init__(self, **kwargs):
+            pass
+
+        def process(self, image):
+            return types.SimpleNamespace(pose_landmarks=None)
+
+        def close(self):
+            pass
+
+    class DrawingSpec:
+        def __init__(self, color=(224, 224, 224), thickness=2, circle_radius=2):
+            self.color, self.thickness, self.circle_radius = color, thickness, circle_radius
+
+    def draw_landmarks(image, landmark_list, connections=None,
+                       landmark_drawing_spec=None, connection_drawing_spec=None):
+        pass
+
+    mp.solutions = types.SimpleNamespace(
+        pose=types.SimpleNamespace(Pose=Pose, POSE_CONNECTIONS=frozenset()),
+        drawing_utils=types.SimpleNamespace(DrawingSpec=DrawingSpec, draw_landmarks=draw_landmarks)
+    )
+    sys.modules["mediapipe"] = mp
+
+
+try:
+    import pyrealsense2  # noqa: F401
+except ImportError:
+    _install_realsense_stub()
+
+try:
+    import mediapipe  # noqa: F401
+except ImportError:
+    _install_mediapipe_stub()
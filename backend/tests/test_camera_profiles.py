@@ -0,0 +1,47 @@
+"""
+Kamera profilleri arasında ölçüm tutarlılığı
+
+Aynı duruş farklı çözünürlüklerde aynı fiziksel sahne olarak verilir. Göğüs
+noktası, derinlik pencereleri ve takip yarıçapları çözünürlükle ölçeklendiği
+için depth_diff (ve dolayısıyla iyi/kötü eşiği) profiller arasında yakın kalmalıdır.
+"""
+
+import statistics
+
+import pytest
+
+from camera_profiles import CAMERA_PROFILES
+from frame_allocations import start_synthetic_analyzer
+
+
+def _depth_diffs(width: int, height: int, frames: int = 40):
+    analyzer = start_synthetic_analyzer(width, height)
+    diffs, sources = [], set()
+    try:
+        for _ in range(frames):
+            result = analyzer.get_frame()
+            if result is not None and result["status"] is not None:
+                diffs.append(result["depth_diff"])
+                sources.add(result["tracking_source"])
+    finally:
+        analyzer.stop()
+    return diffs, sources
+
+
+@pytest.fixture(scope="module")
+def reference_diff():
+    profile = CAMERA_PROFILES["default"]
+    diffs, _ = _depth_diffs(profile.width, profile.height)
+    return statistics.median(diffs)
+
+
+@pytest.mark.parametrize("name", sorted(CAMERA_PROFILES))
+def test_same_pose_gives_comparable_depth_diff(name, reference_diff):
+    profile = CAMERA_PROFILES[name]
+    diffs, sources = _depth_diffs(profile.width, profile.height)
+
+    assert len(diffs) >= 30
+    # Derinlik takibi de bu çözünürlükte çalışmalı (ölçeklenen arama yarıçapı)
+    assert sources == {"mediapipe", "depth"}
+    # Sahne 0.3 mm/piksel eğimli: sabit piksel ofsetiyle 424x240'ta fark iki katına çıkardı
+    assert abs(statistics.median(diffs) - reference_diff) <= 3.0, (name, diffs)
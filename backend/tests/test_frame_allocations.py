@@ -0,0 +1,54 @@
+"""
+get_frame() sıcak yolunun kare başına bellek ayırma sınırları
+
+Isınmadan sonra bir karede anlık olarak ayrılan bellek neredeyse tamamen
+kodlanmış görüntüdür (cv2.imencode çıktısı, base64 modunda ek olarak base64
+bytes + str). Geri kalan her şey için küçük bir sabit pay tanınır; kalıcı
+büyüme (sızıntı) olmamalıdır.
+"""
+
+import pytest
+
+from frame_allocations import measure_frame_allocations, start_synthetic_analyzer
+
+
+# Kodlanmış görüntü dışındaki her şey için kare başına pay (KB)
+OVERHEAD_KB = 8.0
+
+
+@pytest.fixture(scope="module", params=["jpeg", "base64"])
+def measurement(request):
+    return measure_frame_allocations(frames=150, warmup=60, frame_format=request.param)
+
+
+def test_tracker_and_mediapipe_paths_are_measured(measurement):
+    assert measurement["tracking_sources"]["mediapipe"] > 0
+    assert measurement["tracking_sources"]["depth"] > 0
+
+
+def test_peak_is_bounded_by_encoded_frame(measurement):
+    encoded_kb = measurement["encoded_frame_kb"]
+    if measurement["frame_format"] == "jpeg":
+        # JPEG tamponu kopyalanmadan halka tampona gider
+        budget_kb = encoded_kb
+    else:
+        # JPEG (~3/4 base64 boyutu) + base64 bytes + UTF-8 str
+        budget_kb = 0.75 * encoded_kb + 2 * encoded_kb
+    assert measurement["peak_kb_max"] <= budget_kb + OVERHEAD_KB, measurement
+
+
+def test_no_retained_growth_per_frame(measurement):
+    assert measurement["retained_bytes_per_frame"] < 64, measurement
+
+
+def test_frame_results_are_not_shared_between_calls():
+    analyzer = start_synthetic_analyzer()
+    try:
+        first = analyzer.get_frame()
+        kept = dict(first)
+        second = analyzer.get_frame()
+    finally:
+        analyzer.stop()
+
+    assert first is not second
+    assert first == kept  # Saklanan sonuç sonraki kareyle değişmez
@@ -0,0 +1,81 @@
+"""
+Kamera takılması: bekçi, oturum duraklatma ve devam akışı
+
+Sentetik kaynak FaultInjectingPipeline ile sarılır; kare döngüsü WebSocket
+döngüsündeki sırayla çalıştırılır (get_frame, ardından sync_camera_pause).
+"""
+
+import time
+
+import pytest
+
+from frame_allocations import start_synthetic_analyzer
+from frame_watchdog import FaultInjectingPipeline
+from session_manager import SessionManager
+
+
+@pytest.fixture
+def analyzer():
+    analyzer = start_synthetic_analyzer()
+    yield analyzer
+    analyzer.stop()
+
+
+def _inject(analyzer, faults, sleep=False) -> FaultInjectingPipeline:
+    analyzer.pipeline = FaultInjectingPipeline(analyzer.pipeline, faults=faults, sleep=sleep)
+    return analyzer.pipeline
+
+
+def _session():
+    sessions = SessionManager()
+    sessions.start_session(duration_minutes=1)
+    return sessions
+
+
+def test_stall_pauses_session_and_recovery_resumes_it(analyzer):
+    # 10. kareden sonra 4 bekleme başarısız: kare döngüsünün kısa beklemesi +
+    # kurtarma thread'inde 3 tekrar deneme (pipeline yeniden başlatılmaz)
+    pipeline = _inject(analyzer, faults=[(10, 4)])
+    sessions = _session()
+
+    reasons = []
+    for _ in range(20):
+        analyzer.get_frame()
+        if analyzer._recovery_thread is not None:
+            analyzer._recovery_thread.join()  # Sıra belirli olsun
+        sessions.sync_camera_pause(analyzer.is_stalled)
+        reason = sessions.get_pause_reason()
+        if not reasons or reasons[-1] != reason:
+            reasons.append(reason)
+
+    assert reasons == [None, "camera_stall", None]
+    assert pipeline.injected == 4
+    assert analyzer.watchdog.stalls == 1
+    assert analyzer.watchdog.recoveries == 1
+    assert analyzer.watchdog.restarts == 0
+    pauses = sessions.current_session.pauses
+    assert [pause["reason"] for pause in pauses] == ["camera_stall"]
+
+
+def test_frame_loop_is_not_blocked_by_the_frame_timeout(analyzer):
+    # Arıza her beklemede verilen süre kadar uyur: kurtarma thread'i 2 x 500 ms bekler
+    _inject(analyzer, faults=[(5, 3)], sleep=True)
+    sessions = _session()
+
+    longest_call = 0.0
+    paused = False
+    deadline = time.monotonic() + 5.0
+    while analyzer.watchdog.recoveries == 0 and time.monotonic() < deadline:
+        started = time.perf_counter()
+        frame = analyzer.get_frame()
+        longest_call = max(longest_call, time.perf_counter() - started)
+        sessions.sync_camera_pause(analyzer.is_stalled)
+        paused = paused or sessions.get_pause_reason() == "camera_stall"
+        if frame is None:
+            time.sleep(0.01)
+
+    assert analyzer.watchdog.recoveries == 1
+    assert analyzer.watchdog.last_recovery_seconds >= 2 * analyzer.frame_timeout_ms / 1000
+    assert paused and sessions.get_pause_reason() is None
+    # Kare döngüsü en fazla kısa bekleme kadar bloklanır (500 ms değil)
+    assert longest_call < (analyzer.frame_wait_ms + 100) / 1000
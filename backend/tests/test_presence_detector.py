@@ -0,0 +1,85 @@
+"""
+Kimse yokken yoklama davranışı: kaçırılan yoklamadan sonra yeniden algılama
+gecikmesi ve sabit ön planda yoklama sıklığı
+"""
+
+import numpy as np
+
+from presence_detector import PresenceDetector, PRESENT, ABSENT
+
+
+FPS = 30
+DEPTH_SCALE = 0.001
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _scene(person_fraction: float = 0.0) -> np.ndarray:
+    """Boş oda 3 m; kişi sol kenardan itibaren görüntünün verilen oranını 1 m'de kaplar"""
+    depth = np.full((480, 640), 3000, dtype=np.uint16)
+    depth[:, :int(640 * person_fraction)] = 1000
+    return depth
+
+
+def _absent_detector():
+    clock = FakeClock()
+    detector = PresenceDetector(absent_after_frames=3, clock=clock)
+    for _ in range(3):
+        detector.update(False)
+    assert detector.state == ABSENT
+    # İlk karede boş sahne arka plan olur
+    assert not detector.should_probe(_scene(), DEPTH_SCALE)
+    return detector, clock
+
+
+def _frames_until_probe(detector, clock, depth, limit: int = 5 * FPS) -> int:
+    for frame in range(1, limit + 1):
+        clock.now += 1 / FPS
+        if detector.should_probe(depth, DEPTH_SCALE):
+            return frame
+    return limit + 1
+
+
+def test_person_appearing_is_probed_on_the_same_frame():
+    detector, clock = _absent_detector()
+    assert _frames_until_probe(detector, clock, _scene(0.3)) == 1
+    assert detector.update(True) == PRESENT
+
+
+def test_redetects_within_a_few_frames_after_a_missed_probe():
+    detector, clock = _absent_detector()
+    person = _scene(0.3)
+    assert _frames_until_probe(detector, clock, person) == 1
+    detector.update(False)  # MediaPipe kişiyi bu karede kaçırdı
+
+    # Arka plan korunur: tekrar deneme probe_interval (2 s) yerine ~retry_interval sonra
+    frames = _frames_until_probe(detector, clock, person)
+    assert frames <= round(detector.retry_interval * FPS) + 1
+    assert detector.update(True) == PRESENT
+
+
+def test_growing_foreground_is_probed_on_the_next_frame():
+    detector, clock = _absent_detector()
+    assert _frames_until_probe(detector, clock, _scene(0.06)) == 1
+    detector.update(False)  # Kadraja yeni giren kişinin küçük bir kısmı görünüyordu
+
+    assert _frames_until_probe(detector, clock, _scene(0.3)) == 1
+
+
+def test_static_foreground_backs_off_to_probe_interval():
+    detector, clock = _absent_detector()
+    chair = _scene(0.1)
+    probes = 0
+    for _ in range(10 * FPS):
+        clock.now += 1 / FPS
+        if detector.should_probe(chair, DEPTH_SCALE):
+            probes += 1
+            detector.update(False)
+    # 0.1 + 0.2 + 0.4 + 0.8 + 1.6 s, sonra 2 s'de bir: tam hıza göre çok seyrek
+    assert probes <= 10
@@ -0,0 +1,30 @@
+"""
+Kayıt indeksi okuma: oturum kimliği dosya yoluna güvenli şekilde çevrilmeli
+"""
+
+import json
+import os
+
+import pytest
+
+from session_recorder import load_recording_index
+
+
+@pytest.fixture
+def recordings(tmp_path):
+    root = tmp_path / "recordings"
+    (root / "session_1_1700000000").mkdir(parents=True)
+    (root / "session_1_1700000000" / "index.json").write_text(json.dumps({"segments": []}))
+    # Kayıt dizininin dışında başka bir index.json
+    (tmp_path / "index.json").write_text(json.dumps({"secret": True}))
+    return str(root)
+
+
+def test_reads_index_of_a_valid_session(recordings):
+    assert load_recording_index(recordings, "session_1_1700000000") == {"segments": []}
+
+
+@pytest.mark.parametrize("session_id", ["..", "../recordings/session_1_1700000000",
+                                        "session_1_1700000000/..", os.sep + "tmp", "session_1_x"])
+def test_rejects_ids_outside_the_session_format(recordings, session_id):
+    assert load_recording_index(recordings, session_id) is None
@@ -0,0 +1,59 @@
+"""
+Rollup sorguları ve yeniden oluşturma
+"""
+
+import datetime
+
+from rollups import RollupStore
+
+
+def _result(day: str, duration: float = 60.0):
+    return {"completed_at": f"{day} 10:00:00", "total_duration": duration,
+            "good_posture_time": duration, "posture_score": 80}
+
+
+def _store(*days):
+    store = RollupStore()
+    for day in days:
+        store.add(_result(day))
+    return store
+
+
+def test_end_only_query_is_open_ended_at_the_start():
+    store = _store("2024-01-02", "2024-01-05", "2024-02-01")
+    rows = store.query("day", end=datetime.date(2024, 1, 31))
+    assert [row["key"] for row in rows] == ["2024-01-02", "2024-01-05"]
+
+
+def test_start_only_query_runs_until_today():
+    store = _store("2024-01-02", "2024-01-05")
+    rows = store.query("day", start=datetime.date(2024, 1, 3))
+    assert [row["key"] for row in rows] == ["2024-01-05"]
+
+
+def test_queries_during_rebuild_see_the_previous_totals():
+    days = ["2024-01-02", "2024-01-03", "2024-01-04"]
+    store = _store(*days)
+    seen = []
+
+    def history():
+        for day in days:
+            seen.append(sum(row["session_count"] for row in store.query("day")))
+            yield _result(day)
+
+    store.rebuild(history())
+    assert seen == [3, 3, 3]
+    assert sum(row["session_count"] for row in store.query("day")) == 3
+
+
+def test_sessions_added_during_rebuild_are_counted_once():
+    store = _store("2024-01-02")
+    store.begin_rebuild()
+
+    def history():
+        yield _result("2024-01-02")
+        store.add(_result("2024-01-03"))  # Geçmiş görüntüsünden sonra biten oturum
+
+    store.rebuild(history())
+    rows = store.query("day")
+    assert [(row["key"], row["session_count"]) for row in rows] == [("2024-01-02", 1), ("2024-01-03", 1)]
@@ -0,0 +1,55 @@
+// Build sonrası: dist/ altındaki metin dosyalarının .br ve .gz kopyalarını üretir
+//
+// Backend (POSTUR_SERVE_FRONTEND=1) bu kopyaları Accept-Encoding'e göre doğrudan
+// gönderir; istek başına sıkıştırma yapılmaz. En yüksek seviyeler kullanılır çünkü
+// maliyet sadece build sırasında ödenir.
+
+import { readdirSync, readFileSync, statSync, writeFileSync } from 'node:fs'
+import { join, extname, relative } from 'node:path'
+import { fileURLToPath } from 'node:url'
+import { gzipSync, brotliCompressSync, constants } from 'node:zlib'
+
+const DIST = fileURLToPath(new URL('../dist', import.meta.url))
+const EXTENSIONS = new Set(['.html', '.js', '.mjs', '.css', '.svg', '.json', '.map', '.txt', '.wasm'])
+const MIN_SIZE = 1024 // Daha küçük dosyalarda kazanç başlık maliyetinden az
+
+function* walk(dir) {
+  for (const name of readdirSync(dir)) {
+    const path = join(dir, name)
+    if (statSync(path).isDirectory()) {
+      yield* walk(path)
+    } else {
+      yield path
+    }
+  }
+}
+
+let originalTotal = 0
+let brotliTotal = 0
+let count = 0
+
+for (const path of walk(DIST)) {
+  if (!EXTENSIONS.has(extname(path))) continue
+  const data = readFileSync(path)
+  if (data.length < MIN_SIZE) continue
+
+  const br = brotliCompressSync(data, {
+    params: {
+      [constants.BROTLI_PARAM_QUALITY]: constants.BROTLI_MAX_QUALITY,
+      [constants.BROTLI_PARAM_SIZE_HINT]: data.length
+    }
+  })
+  const gz = gzipSync(data, { level: 9 })
+
+  // Sıkıştırılmış hali daha büyükse kopya yazılmaz; backend orijinali gönderir
+  if (br.length < data.length) writeFileSync(`${path}.br`, br)
+  if (gz.length < data.length) writeFileSync(`${path}.gz`, gz)
+
+  originalTotal += data.length
+  brotliTotal += Math.min(br.length, data.length)
+  count += 1
+  console.log(`  ${relative(DIST, path)}: ${data.length} -> br ${br.length}, gz ${gz.length}`)
+}
+
+const ratio = originalTotal ? ((brotliTotal / originalTotal) * 100).toFixed(1) : '0'
+console.log(`🗜️ ${count} dosya sıkıştırıldı (brotli: toplam boyutun %${ratio}'i)`)
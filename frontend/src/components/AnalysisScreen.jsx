@@ -101,14 +101,18 @@ const formatTime = (seconds) => {
 }
 
 export default function AnalysisScreen({ duration, onComplete, onCancel }) {
-  const { isConnected, lastMessage, error } = useWebSocket()
+  const { isConnected, lastMessage, error, hasFrame, attachCanvas } = useWebSocket()
   const [sessionStarted, setSessionStarted] = useState(false)
   const [sessionData, setSessionData] = useState(null)
-  const [frameImage, setFrameImage] = useState(null)
   const [showWarning, setShowWarning] = useState(false)
+  const [pauseReason, setPauseReason] = useState(null)
   const [isLoading, setIsLoading] = useState(true)
+  // Kamera arka planda açılır; hazır/başarısız bilgisi WebSocket'ten gelir
+  const [jobId, setJobId] = useState(null)
+  const [cameraJob, setCameraJob] = useState(null)
   
   const hasCompletedRef = useRef(false)
+  const startRequestedRef = useRef(false)
 
   // Oturumu başlat
   useEffect(() => {
@@ -127,19 +131,20 @@ export default function AnalysisScreen({ duration, onComplete, onCancel }) {
         const data = await response.json()
         
         if (data.success) {
-          console.log('✅ Oturum başlatıldı:', data.session_id)
-          setSessionStarted(true)
+          console.log('📷 Kamera başlatılıyor:', data.job_id)
+          startRequestedRef.current = true
+          setJobId(data.job_id)
         } else {
           console.error('❌ Oturum başlatılamadı:', data.message)
-          alert(data.message)
+          alert(data.message || data.detail)
+          setIsLoading(false)
           onCancel()
         }
       } catch (e) {
         console.error('❌ API hatası:', e)
         alert('Sunucuya bağlanılamadı. Backend çalışıyor mu?')
-        onCancel()
-      } finally {
         setIsLoading(false)
+        onCancel()
       }
     }
 
@@ -147,25 +152,46 @@ export default function AnalysisScreen({ duration, onComplete, onCancel }) {
 
     // Cleanup
     return () => {
-      // Component unmount olurken oturumu durdur
-      if (sessionStarted && !hasCompletedRef.current) {
+      // Component unmount olurken oturumu durdur (kamera hâlâ açılıyorsa başlatma iptal edilir)
+      if (startRequestedRef.current && !hasCompletedRef.current) {
         fetch('/api/session/stop', { method: 'POST' }).catch(() => {})
       }
     }
   }, [duration, onCancel])
 
+  // Bu ekranın başlattığı kamera işi sonuçlandı mı
+  useEffect(() => {
+    if (!jobId || !cameraJob || cameraJob.job_id !== jobId) return
+
+    if (cameraJob.state === 'ready') {
+      console.log('✅ Oturum başlatıldı:', cameraJob.session_id)
+      setSessionStarted(true)
+      setIsLoading(false)
+    } else if (cameraJob.state === 'failed' || cameraJob.state === 'cancelled') {
+      console.error('❌ Kamera başlatılamadı:', cameraJob.message)
+      setIsLoading(false)
+      if (cameraJob.state === 'failed') alert(cameraJob.message)
+      onCancel()
+    }
+  }, [jobId, cameraJob, onCancel])
+
   // WebSocket mesajlarını işle
   useEffect(() => {
     if (!lastMessage) return
 
-    if (lastMessage.type === 'frame') {
-      // Frame verisi
+    if (lastMessage.type === 'camera') {
+      // Kamera başlatma işi durumu (starting, ready, failed, cancelled)
+      setCameraJob(lastMessage)
+    } else if (lastMessage.type === 'frame') {
+      // Frame verisi (görüntü worker tarafından doğrudan canvas'a çizilir)
+      setPauseReason(null)
       setSessionData({
         status: lastMessage.status,
         depthDiff: lastMessage.depth_diff,
         leftShoulderDepth: lastMessage.left_shoulder_depth,
         rightShoulderDepth: lastMessage.right_shoulder_depth,
         chestDepth: lastMessage.chest_depth,
+        presence: lastMessage.presence,
         warningActive: lastMessage.warning_active,
         badPostureSeconds: lastMessage.bad_posture_seconds,
         elapsedTime: lastMessage.elapsed_time,
@@ -173,11 +199,6 @@ export default function AnalysisScreen({ duration, onComplete, onCancel }) {
         stats: lastMessage.stats
       })
 
-      // Frame görüntüsü
-      if (lastMessage.frame_base64) {
-        setFrameImage(`data:image/jpeg;base64,${lastMessage.frame_base64}`)
-      }
-
       // Uyarı kontrolü
       if (lastMessage.warning_active) {
         setShowWarning(true)
@@ -185,6 +206,10 @@ export default function AnalysisScreen({ duration, onComplete, onCancel }) {
       } else {
         setShowWarning(false)
       }
+    } else if (lastMessage.type === 'paused') {
+      // Oturum duraklatıldı (ör. kamera takıldı); süre ilerlemez
+      setPauseReason(lastMessage.reason)
+      setShowWarning(false)
     } else if (lastMessage.type === 'completed') {
       // Oturum tamamlandı
       hasCompletedRef.current = true
@@ -212,6 +237,30 @@ export default function AnalysisScreen({ duration, onComplete, onCancel }) {
     }
   }
 
+  // Sistem duraklatması (kamera takıldı, kimse yok) kendiliğinden biter; mola butonu kapalı
+  const isAutoPaused = pauseReason !== null && pauseReason !== 'user'
+
+  // Mola ver / devam et (kamera açık kalır, analiz durur)
+  const handlePauseToggle = async () => {
+    if (isAutoPaused) return
+    const isPaused = pauseReason === 'user'
+    try {
+      const response = await fetch(isPaused ? '/api/session/resume' : '/api/session/pause', {
+        method: 'POST'
+      })
+      const data = await response.json()
+
+      if (data.success) {
+        setPauseReason(isPaused ? null : 'user')
+        setShowWarning(false)
+      } else {
+        console.error('❌ Duraklatma hatası:', data.message)
+      }
+    } catch (e) {
+      console.error('Duraklatma hatası:', e)
+    }
+  }
+
   // Yükleniyor ekranı
   if (isLoading) {
     return (
@@ -261,6 +310,27 @@ export default function AnalysisScreen({ duration, onComplete, onCancel }) {
 
       {/* Ana içerik */}
       <div className="container mx-auto px-4 py-6">
+        {/* Duraklatma bildirimi */}
+        {pauseReason === 'camera_stall' && (
+          <div className="glass rounded-2xl p-3 mb-4 text-center border-2 border-yellow-300 bg-yellow-50/60">
+            <span className="mr-2">⏸️</span>
+            Kamera görüntüsü kesildi, yeniden bağlanılıyor. Oturum süresi duraklatıldı.
+          </div>
+        )}
+        {pauseReason === 'user' && (
+          <div className="glass rounded-2xl p-3 mb-4 text-center border-2 border-blue-300 bg-blue-50/60">
+            <span className="mr-2">☕</span>
+            Mola veriliyor. Süre ve postür takibi duraklatıldı.
+          </div>
+        )}
+        {(pauseReason === 'absent' || (!pauseReason && sessionData?.presence === 'absent')) && (
+          <div className="glass rounded-2xl p-3 mb-4 text-center border-2 border-gray-300 bg-gray-50/60">
+            <span className="mr-2">👤</span>
+            Kamera önünde kimse görünmüyor.
+            {pauseReason === 'absent' && ' Oturum süresi duraklatıldı.'}
+          </div>
+        )}
+
         {/* Üst bar - Timer */}
         <div className="flex justify-center mb-6">
           <div className="glass rounded-3xl p-4 shadow-glass">
@@ -320,13 +390,13 @@ export default function AnalysisScreen({ duration, onComplete, onCancel }) {
           {/* Orta - Kamera görüntüsü */}
           <div className="lg:col-span-1">
             <div className="glass rounded-3xl overflow-hidden shadow-glass">
-              {frameImage ? (
-                <img 
-                  src={frameImage} 
-                  alt="Kamera görüntüsü"
-                  className="w-full h-auto"
-                />
-              ) : (
+              {/* Canvas her zaman bağlı kalır; kontrolü bir kez worker'a aktarılır */}
+              <canvas
+                ref={attachCanvas}
+                aria-label="Kamera görüntüsü"
+                className={hasFrame ? 'w-full h-auto block' : 'hidden'}
+              />
+              {!hasFrame && (
                 <div className="aspect-video bg-gray-200 flex items-center justify-center">
                   <div className="text-center text-gray-500">
                     <span className="text-4xl block mb-2">📷</span>
@@ -373,6 +443,20 @@ export default function AnalysisScreen({ duration, onComplete, onCancel }) {
               </p>
             </div>
 
+            {/* Mola butonu */}
+            <button
+              onClick={handlePauseToggle}
+              disabled={isAutoPaused}
+              className="w-full py-4 rounded-xl font-bold text-lg bg-blue-100 hover:bg-blue-200 
+                         text-blue-700 transition-all flex items-center justify-center gap-2
+                         disabled:opacity-50 disabled:cursor-not-allowed disabled:hover:bg-blue-100"
+            >
+              <span>{pauseReason === 'user' ? '▶️' : '⏸️'}</span>
+              <span>
+                {pauseReason === 'user' ? 'Devam Et' : isAutoPaused ? 'Otomatik Duraklatıldı' : 'Mola Ver'}
+              </span>
+            </button>
+
             {/* Bitir butonu */}
             <button
               onClick={handleStop}
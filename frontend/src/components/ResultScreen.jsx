@@ -152,10 +152,12 @@ export default function ResultScreen({ result, onGoHome, onNewSession }) {
     { name: 'Bozuk', value: result?.bad_posture_time || 0, color: '#FF6B6B' }
   ]
 
-  // Timeline verisi
-  const timelineData = (result?.timeline || []).map((item, index) => ({
-    time: Math.floor(item.time / 60),
-    value: item.status === 'IYI' ? 1 : item.status === 'KOTU' ? -1 : 0,
+  // Timeline verisi (sabit çözünürlüklü görünüm; her nokta aralıktaki iyi/kötü oranını taşır)
+  const timelineData = (result?.timeline || []).map((item) => ({
+    time: Math.round(item.time / 6) / 10,
+    value: item.good_ratio !== undefined
+      ? item.good_ratio - item.bad_ratio
+      : item.status === 'IYI' ? 1 : item.status === 'KOTU' ? -1 : 0,
     status: item.status
   }))
 
@@ -259,7 +261,7 @@ export default function ResultScreen({ result, onGoHome, onNewSession }) {
                   />
                   <Tooltip 
                     labelFormatter={(value) => `${value}. dakika`}
-                    formatter={(value) => [value === 1 ? 'İyi Postür' : 'Kötü Postür', 'Durum']}
+                    formatter={(value) => [value > 0 ? 'İyi Postür' : value < 0 ? 'Kötü Postür' : 'Belirsiz', 'Durum']}
                   />
                   <Area 
                     type="stepAfter" 
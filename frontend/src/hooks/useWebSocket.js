@@ -1,99 +1,116 @@
 import { useState, useEffect, useCallback, useRef } from 'react'
 
-const WS_URL = 'ws://localhost:8000/ws/posture'
-const RECONNECT_INTERVAL = 3000
+// Sayfa ?debug=1 ile açıldıysa sunucu kare başına aşama zaman damgalarını da gönderir
+const DEBUG_LATENCY = new URLSearchParams(window.location.search).get('debug') === '1'
+// Adres sayfanın kaynağından türetilir: geliştirmede Vite proxy'si, üretimde backend'in kendisi
+const WS_PROTOCOL = window.location.protocol === 'https:' ? 'wss:' : 'ws:'
+const WS_URL = `${WS_PROTOCOL}//${window.location.host}/ws/posture` + (DEBUG_LATENCY ? '?debug=1' : '')
 
+// WebSocket alma ve kare çözme işi Web Worker'da yapılır.
+// Bu hook sadece sayısal metrikleri (değiştiklerinde) React state'ine taşır;
+// kamera görüntüsü attachCanvas ile verilen canvas'a doğrudan çizilir.
 export default function useWebSocket() {
   const [isConnected, setIsConnected] = useState(false)
   const [lastMessage, setLastMessage] = useState(null)
   const [error, setError] = useState(null)
-  
-  const wsRef = useRef(null)
-  const reconnectTimeoutRef = useRef(null)
-  const shouldReconnectRef = useRef(true)
+  const [hasFrame, setHasFrame] = useState(false)
 
-  // WebSocket bağlantısı kur
-  const connect = useCallback(() => {
-    if (wsRef.current?.readyState === WebSocket.OPEN) {
-      return
-    }
+  const workerRef = useRef(null)
+  const canvasRef = useRef(null)
+  const transferredRef = useRef(new WeakSet())
 
-    try {
-      console.log('🔌 WebSocket bağlanıyor...')
-      const ws = new WebSocket(WS_URL)
+  // Worker mesajlarını işle
+  const handleWorkerMessage = useCallback((event) => {
+    const msg = event.data
 
-      ws.onopen = () => {
-        console.log('✅ WebSocket bağlandı')
-        setIsConnected(true)
-        setError(null)
-      }
-
-      ws.onmessage = (event) => {
-        try {
-          const data = JSON.parse(event.data)
-          setLastMessage(data)
-        } catch (e) {
-          console.error('JSON parse hatası:', e)
+    switch (msg.type) {
+      case 'message':
+        setLastMessage(msg.data)
+        break
+      case 'status':
+        setIsConnected(msg.connected)
+        if (msg.error !== undefined) {
+          setError(msg.error)
         }
-      }
-
-      ws.onclose = (event) => {
-        console.log('🔌 WebSocket kapandı:', event.code, event.reason)
-        setIsConnected(false)
-        
-        // Otomatik yeniden bağlan
-        if (shouldReconnectRef.current) {
-          reconnectTimeoutRef.current = setTimeout(() => {
-            connect()
-          }, RECONNECT_INTERVAL)
+        break
+      case 'first-frame':
+        setHasFrame(true)
+        break
+      case 'trace':
+        console.debug('⏱️ Kare izi', msg.frameNumber, msg.trace)
+        break
+      case 'bitmap': {
+        // OffscreenCanvas desteklenmiyorsa bitmap burada çizilir
+        const canvas = canvasRef.current
+        if (canvas) {
+          canvas.width = msg.bitmap.width
+          canvas.height = msg.bitmap.height
+          canvas.getContext('bitmaprenderer').transferFromImageBitmap(msg.bitmap)
+        } else {
+          msg.bitmap.close()
         }
+        break
       }
+      default:
+        break
+    }
+  }, [])
 
-      ws.onerror = (event) => {
-        console.error('❌ WebSocket hatası:', event)
-        setError('Bağlantı hatası oluştu')
-        setIsConnected(false)
-      }
+  // Kamera görüntüsünün çizileceği canvas (callback ref olarak kullanılır)
+  const attachCanvas = useCallback((canvas) => {
+    canvasRef.current = canvas
+    if (!canvas || !workerRef.current) return
+    if (transferredRef.current.has(canvas)) return
 
-      wsRef.current = ws
-    } catch (e) {
-      console.error('WebSocket oluşturma hatası:', e)
-      setError('Bağlantı kurulamadı')
+    if ('transferControlToOffscreen' in canvas) {
+      const offscreen = canvas.transferControlToOffscreen()
+      transferredRef.current.add(canvas)
+      workerRef.current.postMessage({ type: 'canvas', canvas: offscreen }, [offscreen])
     }
   }, [])
 
+  // Bağlan
+  const connect = useCallback(() => {
+    workerRef.current?.postMessage({ type: 'connect', url: WS_URL })
+  }, [])
+
   // Bağlantıyı kapat
   const disconnect = useCallback(() => {
-    shouldReconnectRef.current = false
-    
-    if (reconnectTimeoutRef.current) {
-      clearTimeout(reconnectTimeoutRef.current)
-    }
-    
-    if (wsRef.current) {
-      wsRef.current.close()
-      wsRef.current = null
-    }
-    
+    workerRef.current?.postMessage({ type: 'disconnect' })
     setIsConnected(false)
   }, [])
 
-  // Component mount olduğunda bağlan
+  // Component mount olduğunda worker'ı başlat ve bağlan
   useEffect(() => {
-    shouldReconnectRef.current = true
+    const worker = new Worker(
+      new URL('../workers/frameWorker.js', import.meta.url),
+      { type: 'module' }
+    )
+    worker.onmessage = handleWorkerMessage
+    workerRef.current = worker
+
+    // Canvas worker'dan önce bağlandıysa şimdi aktar
+    if (canvasRef.current) {
+      attachCanvas(canvasRef.current)
+    }
+
     connect()
 
     return () => {
-      disconnect()
+      worker.postMessage({ type: 'disconnect' })
+      worker.terminate()
+      workerRef.current = null
+      setIsConnected(false)
     }
-  }, [connect, disconnect])
+  }, [handleWorkerMessage, attachCanvas, connect])
 
   return {
     isConnected,
     lastMessage,
     error,
+    hasFrame,
+    attachCanvas,
     connect,
     disconnect
   }
 }
-
@@ -0,0 +1,200 @@
+// Kare alma ve çözme işini ana thread dışında yapan Web Worker
+//
+// - WebSocket bağlantısı burada açılır, JSON burada parse edilir
+// - JPEG kareler createImageBitmap ile çözülüp OffscreenCanvas'a çizilir
+// - Ana thread'e sadece sayısal metrikler gönderilir; değişmedikçe gönderilmez
+//   ve ekran yenileme hızıyla sınırlanır
+// - Her ACK_EVERY çizilen karede bir sunucuya ack gönderilir (gecikme ölçümü):
+//   kare numarası ve mesajın alınmasından çizilene kadar geçen süre
+
+const RECONNECT_INTERVAL = 3000
+const ACK_EVERY = 10
+
+let ws = null
+let url = null
+let shouldReconnect = true
+let reconnectTimer = null
+
+// Çizim hedefi: OffscreenCanvas yoksa bitmap ana thread'e aktarılır
+let ctx = null
+let hasFrame = false
+
+// Kare çözme: aynı anda tek kare, bekleyenlerden sadece en yenisi tutulur
+let decoding = false
+let pendingFrame = null
+let renderedFrames = 0
+
+// Metrik gönderimi
+let lastMetricsKey = null
+let pendingMetrics = null
+let flushScheduled = false
+
+const scheduleFlush = self.requestAnimationFrame
+  ? (cb) => self.requestAnimationFrame(cb)
+  : (cb) => setTimeout(cb, 16)
+
+function post(message, transfer) {
+  self.postMessage(message, transfer || [])
+}
+
+function flushMetrics() {
+  flushScheduled = false
+  if (pendingMetrics) {
+    post({ type: 'message', data: pendingMetrics })
+    pendingMetrics = null
+  }
+}
+
+function queueMetrics(metrics) {
+  const key = JSON.stringify(metrics)
+  if (key === lastMetricsKey) return
+  lastMetricsKey = key
+  pendingMetrics = metrics
+
+  if (!flushScheduled) {
+    flushScheduled = true
+    scheduleFlush(flushMetrics)
+  }
+}
+
+function sendAck(frame) {
+  renderedFrames += 1
+  if (frame.frameNumber == null || renderedFrames % ACK_EVERY !== 0) return
+  if (!ws || ws.readyState !== WebSocket.OPEN) return
+  ws.send(JSON.stringify({
+    type: 'ack',
+    frame_number: frame.frameNumber,
+    client_hold_ms: performance.now() - frame.receivedAt
+  }))
+}
+
+async function decodeFrame(frame) {
+  decoding = true
+  try {
+    const blob = await (await fetch(`data:image/jpeg;base64,${frame.base64}`)).blob()
+    const bitmap = await createImageBitmap(blob)
+
+    if (ctx) {
+      const canvas = ctx.canvas
+      if (canvas.width !== bitmap.width || canvas.height !== bitmap.height) {
+        canvas.width = bitmap.width
+        canvas.height = bitmap.height
+      }
+      ctx.drawImage(bitmap, 0, 0)
+      bitmap.close()
+    } else {
+      post({ type: 'bitmap', bitmap }, [bitmap])
+    }
+    sendAck(frame)
+
+    if (!hasFrame) {
+      hasFrame = true
+      post({ type: 'first-frame' })
+    }
+  } catch (e) {
+    console.error('Kare çözme hatası:', e)
+  } finally {
+    decoding = false
+    if (pendingFrame) {
+      const next = pendingFrame
+      pendingFrame = null
+      decodeFrame(next)
+    }
+  }
+}
+
+function handleMessage(data) {
+  if (data.type === 'frame') {
+    // frame_number ve trace her karede değişir; metrik karşılaştırmasına girmez
+    const { frame_base64: frameBase64, frame_number: frameNumber, trace, ...metrics } = data
+    if (frameBase64) {
+      const frame = { base64: frameBase64, frameNumber, receivedAt: performance.now() }
+      if (decoding) {
+        pendingFrame = frame
+      } else {
+        decodeFrame(frame)
+      }
+    }
+    if (trace) {
+      post({ type: 'trace', frameNumber, trace })
+    }
+    queueMetrics(metrics)
+    return
+  }
+
+  // Diğer mesajlar (completed, error, waiting) sırayı korumak için hemen iletilir
+  flushMetrics()
+  lastMetricsKey = null
+  post({ type: 'message', data })
+}
+
+function connect() {
+  if (ws && ws.readyState === WebSocket.OPEN) return
+
+  try {
+    console.log('🔌 WebSocket bağlanıyor...')
+    ws = new WebSocket(url)
+
+    ws.onopen = () => {
+      console.log('✅ WebSocket bağlandı')
+      post({ type: 'status', connected: true, error: null })
+    }
+
+    ws.onmessage = (event) => {
+      try {
+        handleMessage(JSON.parse(event.data))
+      } catch (e) {
+        console.error('JSON parse hatası:', e)
+      }
+    }
+
+    ws.onclose = (event) => {
+      console.log('🔌 WebSocket kapandı:', event.code, event.reason)
+      post({ type: 'status', connected: false })
+
+      // Otomatik yeniden bağlan
+      if (shouldReconnect) {
+        reconnectTimer = setTimeout(connect, RECONNECT_INTERVAL)
+      }
+    }
+
+    ws.onerror = () => {
+      post({ type: 'status', connected: false, error: 'Bağlantı hatası oluştu' })
+    }
+  } catch (e) {
+    console.error('WebSocket oluşturma hatası:', e)
+    post({ type: 'status', connected: false, error: 'Bağlantı kurulamadı' })
+  }
+}
+
+function disconnect() {
+  shouldReconnect = false
+  if (reconnectTimer) {
+    clearTimeout(reconnectTimer)
+    reconnectTimer = null
+  }
+  if (ws) {
+    ws.close()
+    ws = null
+  }
+}
+
+self.onmessage = (event) => {
+  const msg = event.data
+
+  switch (msg.type) {
+    case 'connect':
+      url = msg.url
+      shouldReconnect = true
+      connect()
+      break
+    case 'disconnect':
+      disconnect()
+      break
+    case 'canvas':
+      ctx = msg.canvas.getContext('2d')
+      break
+    default:
+      break
+  }
+}